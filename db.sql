@@ -65,7 +65,7 @@ CREATE TABLE noticias (
   id SERIAL PRIMARY KEY,
   titulo VARCHAR NOT NULL,
   contenido TEXT NOT NULL,
-  url VARCHAR,
+  url VARCHAR UNIQUE,
   fecha_publicacion TIMESTAMP,
   fuente_id INT REFERENCES fuentes(id) ON DELETE SET NULL,
   tema_id INT REFERENCES temas(id) ON DELETE SET NULL,
@@ -85,7 +85,8 @@ CREATE TABLE modelos_ml (
   activo BOOLEAN DEFAULT false,
   created_at TIMESTAMP DEFAULT now(),
   updated_at TIMESTAMP,
-  modelo_base INT REFERENCES modelos_ml(id) ON DELETE CASCADE
+  modelo_base INT REFERENCES modelos_ml(id) ON DELETE CASCADE,
+  backend VARCHAR
 );
 
 CREATE TABLE clasificacion_noticias (
@@ -98,6 +99,27 @@ CREATE TABLE clasificacion_noticias (
   fecha_clasificacion TIMESTAMP DEFAULT now()
 );
 
+CREATE TABLE cache_predicciones (
+  id SERIAL PRIMARY KEY,
+  modelo_id INT NOT NULL REFERENCES modelos_ml(id) ON DELETE CASCADE,
+  texto_hash VARCHAR(64) NOT NULL,
+  resultado resultado_enum NOT NULL,
+  confianza DECIMAL(5,2),
+  explicacion TEXT,
+  created_at TIMESTAMP DEFAULT now(),
+  UNIQUE (modelo_id, texto_hash)
+);
+
+CREATE TABLE trabajos_enriquecimiento (
+  id VARCHAR(32) PRIMARY KEY,
+  noticia_id INT REFERENCES noticias(id) ON DELETE CASCADE,
+  estado VARCHAR(16) NOT NULL DEFAULT 'pending',
+  resultado JSON,
+  error TEXT,
+  created_at TIMESTAMP DEFAULT now(),
+  updated_at TIMESTAMP
+);
+
 CREATE TABLE reportes_fuente (
   id SERIAL PRIMARY KEY,
   fuente_id INT REFERENCES fuentes(id) ON DELETE CASCADE,
@@ -144,5 +166,22 @@ CREATE TABLE keywords (
 CREATE TABLE noticias_keywords (
   id SERIAL PRIMARY KEY,
   noticia_id INT REFERENCES noticias(id) ON DELETE CASCADE,
-  keyword_id INT REFERENCES keywords(id) ON DELETE CASCADE
-);
\ No newline at end of file
+  keyword_id INT REFERENCES keywords(id) ON DELETE CASCADE,
+  UNIQUE (noticia_id, keyword_id)
+);
+
+CREATE TABLE frecuencia_terminos (
+  termino VARCHAR(100) PRIMARY KEY,
+  documentos INT NOT NULL DEFAULT 0
+);
+
+-- Índices de las consultas calientes (en bases existentes los crea database/migrations/0003)
+CREATE INDEX idx_noticias_created_at ON noticias (created_at);
+CREATE INDEX idx_noticias_fecha_publicacion ON noticias (fecha_publicacion) WHERE fecha_publicacion IS NOT NULL;
+CREATE INDEX idx_noticias_tema_id ON noticias (tema_id);
+CREATE INDEX idx_noticias_fuente_id ON noticias (fuente_id);
+CREATE INDEX idx_historial_consultas_usuario ON historial_consultas (usuario_id, fecha_consulta);
+CREATE INDEX idx_trabajos_enriquecimiento_noticia ON trabajos_enriquecimiento (noticia_id);
+CREATE INDEX idx_noticias_keywords_keyword ON noticias_keywords (keyword_id, noticia_id);
+CREATE INDEX idx_clasificacion_noticia_modelo ON clasificacion_noticias (noticia_id, modelo_id);
+CREATE INDEX idx_clasificacion_falsas ON clasificacion_noticias (noticia_id) WHERE resultado = 'falsa';
@@ -1,129 +1,365 @@
-from flask import Blueprint, request, jsonify
-from core.classify_service import predict_news
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, stream_with_context
 from utils.article_extractor import extract_news_data
+from utils.text_analysis import TextAnalysis
+from utils import nlp_resources
+from config import Config
 from utils.db_utils import (
-    get_or_create_source, save_news, get_active_model, 
-    save_classification, save_consultation, classify_topic, 
-    extract_keywords, save_news_keywords, find_existing_news_by_url
+    get_active_model, save_classification, save_consultation, classify_topic, 
+    extract_keywords, save_news_keywords, save_document_terms, get_stored_news, NewsIngestion,
+    get_source_cache_stats
 )
-import os
-import requests
+from utils import metrics, web_search, stage_timing
+from utils.topic_index import topic_index
+from utils.idf_store import idf_store
+from database.db import get_query_stats
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import time
+import threading
 import logging
 
 # Basic logging configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Google Search API configuration
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GOOGLE_CX = os.getenv("GOOGLE_CX")
-
 # Create Blueprint
 classify_bp = Blueprint("classify_bp", __name__)
 
-def search_related_news(query, limit=5):
-    """Search for related news using Google Search API."""
-    if not GOOGLE_API_KEY or not GOOGLE_CX:
-        logger.warning("Google Search API credentials not configured")
+# Thread pool for related-news enrichment (see `get_enrichment_pool`)
+_enrichment_pool = None
+_enrichment_pool_lock = threading.Lock()
+
+related_enrichment_total = metrics.counter(
+    "related_news_enrichment_total", "Related news items by enrichment outcome", labelnames=("outcome",)
+)
+
+def get_enrichment_pool():
+    """Bounded thread pool shared by every related-news enrichment, created on first use."""
+    global _enrichment_pool
+
+    if _enrichment_pool is None:
+        with _enrichment_pool_lock:
+            if _enrichment_pool is None:
+                _enrichment_pool = ThreadPoolExecutor(
+                    max_workers=Config.RELATED_NEWS_MAX_WORKERS,
+                    thread_name_prefix="related-news"
+                )
+    return _enrichment_pool
+
+def _extract_related_text(news_url):
+    """Downloads and parses a related article; returns its text or None."""
+    try:
+        extracted_data = extract_news_data(news_url)
+        if extracted_data and extracted_data.get("Texto Completo"):
+            return extracted_data["Texto Completo"]
+    except Exception as e:
+        logger.debug(f"Could not extract related news {news_url}: {str(e)}")
+    return None
+
+def enrich_related_news(related_news, deadline):
+    """
+    Fills in `classification`/`confidence` for each related news item before `deadline`.
+
+    Articles are downloaded and extracted concurrently on the enrichment pool and the
+    ones that arrive in time are classified together in a single batch, in the calling
+    thread so it never queues behind other requests' downloads. Items whose extraction
+    misses the deadline keep `classification: "unknown"`; their downloads finish in the
+    background without delaying the response.
+    """
+    if not related_news:
+        return related_news
+
+    pool = get_enrichment_pool()
+    futures = {
+        pool.submit(_extract_related_text, item["url"]): index
+        for index, item in enumerate(related_news)
+    }
+
+    done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    if not_done:
+        related_enrichment_total.labels(outcome="extract_timeout").inc(len(not_done))
+        logger.info(f"{len(not_done)} related news missed the enrichment deadline during extraction")
+
+    texts_to_classify = []
+    for future in done:
+        text = future.result()
+        if text:
+            texts_to_classify.append((futures[future], text))
+    if not texts_to_classify:
+        return related_news
+
+    if time.monotonic() >= deadline:
+        related_enrichment_total.labels(outcome="classify_timeout").inc(len(texts_to_classify))
+        return related_news
+
+    try:
+        from core.classify_service import predict_news_batch
+        
+        predictions = predict_news_batch([text for _, text in texts_to_classify])
+    except Exception as e:
+        logger.debug(f"Could not classify related news: {str(e)}")
+        return related_news
+
+    for (index, _), (result, conf, _) in zip(texts_to_classify, predictions):
+        related_news[index]["classification"] = result
+        related_news[index]["confidence"] = conf
+    related_enrichment_total.labels(outcome="classified").inc(len(texts_to_classify))
+
+    return related_news
+
+# Search parameters of the related news (also the search cache key)
+RELATED_NEWS_LANGUAGE = "lang_es"  # Restrict to Spanish language results
+RELATED_NEWS_COUNTRY = "mx"        # Geographic location: Mexico (for Spanish content priority)
+
+# Domains to exclude (non-news sites)
+EXCLUDED_DOMAINS = [
+    'youtube.com', 'youtu.be', 'facebook.com', 'instagram.com', 
+    'twitter.com', 'x.com', 'tiktok.com', 'linkedin.com',
+    'reddit.com', 'pinterest.com', 'wikipedia.org'
+]
+
+def _related_news_items(items, limit):
+    """Search results as related news items, skipping non-news domains."""
+    related_news = []
+    
+    for item in items:
+        if len(related_news) >= limit:
+            break
+            
+        news_url = item.get("link", "")
+        
+        # Check if URL is from excluded domain
+        if any(domain in news_url.lower() for domain in EXCLUDED_DOMAINS):
+            logger.debug(f"Skipping excluded domain: {news_url}")
+            continue
+        
+        related_news.append({
+            "title": item.get("title", ""),
+            "snippet": item.get("snippet", ""),
+            "url": news_url,
+            "classification": "unknown",
+            "confidence": 0
+        })
+    return related_news
+
+def cached_related_news(query, limit=5):
+    """
+    Related news from the search cache only: no search request and no article
+    downloads, so items keep `classification: "unknown"`. None on a cache miss.
+    """
+    items = web_search.cached(
+        f"{query} noticias", num=limit + 5, lr=RELATED_NEWS_LANGUAGE, gl=RELATED_NEWS_COUNTRY
+    )
+    return _related_news_items(items, limit) if items is not None else None
+
+def search_related_news(query, limit=5, budget=None):
+    """
+    Search for related news through the configured search provider (Google Custom
+    Search by default). Identical queries are served from the search cache.
+
+    The whole call (search plus enrichment) is bounded by `budget` seconds
+    (`RELATED_NEWS_BUDGET_S` by default).
+    """
+    if not web_search.is_available():
+        logger.warning("Search provider not configured")
         return []
     
-    # Domains to exclude (non-news sites)
-    excluded_domains = [
-        'youtube.com', 'youtu.be', 'facebook.com', 'instagram.com', 
-        'twitter.com', 'x.com', 'tiktok.com', 'linkedin.com',
-        'reddit.com', 'pinterest.com', 'wikipedia.org'
-    ]
+    budget = Config.RELATED_NEWS_BUDGET_S if budget is None else budget
+    deadline = time.monotonic() + budget
     
     try:
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            "q": f"{query} noticias",
-            "key": GOOGLE_API_KEY,
-            "cx": GOOGLE_CX,
-            "num": limit + 5,  # Request more to account for filtered results
-            "lr": "lang_es",   # Restrict to Spanish language results
-            "gl": "mx"         # Geographic location: Mexico (for Spanish content priority)
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        items = web_search.search(
+            f"{query} noticias",
+            num=limit + 5,  # Request more to account for filtered results
+            lr=RELATED_NEWS_LANGUAGE,
+            gl=RELATED_NEWS_COUNTRY,
+            timeout=min(Config.SEARCH_TIMEOUT_S, budget)
+        )
+        related_news = _related_news_items(items, limit)
         
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get("items", [])
-            
-            related_news = []
-            processed_count = 0
-            
-            for item in items:
-                if processed_count >= limit:
-                    break
-                    
-                news_url = item.get("link", "")
-                title = item.get("title", "")
-                snippet = item.get("snippet", "")
-                
-                # Check if URL is from excluded domain
-                is_excluded = any(domain in news_url.lower() for domain in excluded_domains)
-                if is_excluded:
-                    logger.debug(f"Skipping excluded domain: {news_url}")
-                    continue
-                
-                # Try to classify each related news
-                classification = "unknown"
-                confidence = 0
-                
-                try:
-                    # Try to extract and classify the article
-                    extracted_data = extract_news_data(news_url)
-                    if extracted_data and extracted_data.get("Texto Completo"):
-                        result, conf, _ = predict_news(extracted_data["Texto Completo"])
-                        classification = result
-                        confidence = conf
-                except Exception as e:
-                    logger.debug(f"Could not classify related news {news_url}: {str(e)}")
-                
-                related_news.append({
-                    "title": title,
-                    "snippet": snippet,
-                    "url": news_url,
-                    "classification": classification,
-                    "confidence": confidence
-                })
-                
-                processed_count += 1
-            
-            return related_news
-        else:
-            logger.error(f"Google Search API error: {response.status_code}")
-            return []
+        # Extract concurrently and classify in one batch within the remaining budget
+        return enrich_related_news(related_news, deadline)
             
+    except web_search.SearchError as e:
+        logger.error(str(e))
+        return []
     except Exception as e:
         logger.error(f"Error searching related news: {str(e)}")
         return []
 
+def enrich_news(news_id, analysis, fallback_query, save_keywords=True, keywords=None, save_terms=False):
+    """
+    Slow part of /predict: keywords (optionally saved for `news_id`) and related news.
+    Already stored `keywords` skip the extraction. With `save_terms` the lemmas of a
+    newly stored article are added to the corpus document frequencies. Returns a
+    JSON-serializable dict so it can also run as a background enrichment job.
+    """
+    if keywords is None:
+        with stage_timing.stage("keywords"):
+            keywords = extract_keywords(analysis)
+        if save_keywords:
+            with stage_timing.stage("keywords_save"):
+                save_news_keywords(news_id, keywords)
+    if save_terms:
+        save_document_terms([analysis.lemmas])
+
+    search_query = " ".join(keywords[:3]) if keywords else fallback_query
+    with stage_timing.stage("related_news"):
+        related_news = search_related_news(search_query)
+    return {
+        "keywords": keywords,
+        "related_news": related_news
+    }
+
+def _is_async_request(data):
+    """Async mode is opt-in through `"async": true` in the body or `?async=true`."""
+    flag = data.get("async", request.args.get("async", ""))
+    if isinstance(flag, str):
+        return flag.lower() in ("1", "true", "yes")
+    return bool(flag)
+
+def _job_reference(job_id, status, keywords):
+    return {
+        "keywords": keywords,
+        "related_news": None,
+        "enrichment_job_id": job_id,
+        "enrichment_status": status,
+        "enrichment_url": url_for("classify_bp.enrichment_status", job_id=job_id)
+    }
+
+def _enrichment_response(news_id, analysis, fallback_query, save_keywords, async_mode, keywords=None,
+                         save_terms=False):
+    """
+    Runs the enrichment inline, or schedules it and returns the job reference. Inline
+    results are kept in memory as a finished job so repeated requests for the URL reuse them.
+    """
+    from core.enrichment_jobs import enrichment_jobs, STATUS_PENDING
+
+    if not async_mode:
+        enrichment = enrich_news(news_id, analysis, fallback_query, save_keywords, keywords, save_terms)
+        enrichment_jobs.record(news_id, enrichment)
+        return enrichment
+
+    job_id = enrichment_jobs.submit(
+        current_app._get_current_object(), enrich_news,
+        news_id, analysis, fallback_query, save_keywords, keywords, save_terms,
+        news_id=news_id
+    )
+    return _job_reference(job_id, STATUS_PENDING, keywords)
+
+def _known_news_enrichment(stored, async_mode):
+    """
+    Keywords and related news for a stored article without any network fetch or NLP:
+    the result of its latest enrichment (within `SEARCH_CACHE_TTL`) or, while a
+    background job computes it, a reference to that job. Sync callers then also get
+    the related news in the search cache for the same query (empty on a miss).
+    """
+    from core.enrichment_jobs import enrichment_jobs, STATUS_DONE
+
+    keywords = stored["keywords"] or None
+    job = enrichment_jobs.latest_for_news(stored["id"], max_age=Config.SEARCH_CACHE_TTL)
+    if job is not None and job["status"] == STATUS_DONE and job["result"]:
+        return {
+            "keywords": keywords or job["result"].get("keywords"),
+            "related_news": job["result"].get("related_news")
+        }
+
+    if job is None:
+        # Stored keywords are reused; rows saved without them get extracted (and saved) by the job
+        enrichment = _enrichment_response(
+            stored["id"], TextAnalysis(stored["contenido"]), stored["titulo"] or "",
+            True, True, keywords=keywords
+        )
+    else:
+        enrichment = _job_reference(job["id"], job["status"], keywords)
+
+    if not async_mode:
+        search_query = " ".join(keywords[:3]) if keywords else stored["titulo"] or ""
+        enrichment["related_news"] = cached_related_news(search_query) or []
+    return enrichment
+
+def _known_news_response(stored, data, user_id, async_mode):
+    """
+    Fast path for a URL that is already in the database: title, content, keywords and
+    the latest classification come from `get_stored_news` (one query), with no article
+    download and no NLP. Only news stored without a classification is run through
+    the model, using the stored content. Related news are never searched or downloaded
+    inline here (see `_known_news_enrichment`).
+    """
+    news_id = stored["id"]
+    logger.info(f"News with URL {data['url']} already exists in DB with ID {news_id}")
+
+    if stored["clasificacion_id"] is not None:
+        result, confidence, explanation = stored["resultado"], stored["confianza"], stored["explicacion"]
+        classification_id = stored["clasificacion_id"]
+    else:
+        from core.classify_service import predict_news
+
+        with stage_timing.stage("inference"):
+            result, confidence, explanation = predict_news(stored["contenido"])
+        with stage_timing.stage("classification_save"):
+            classification_id = save_classification(news_id, get_active_model(), result, confidence, explanation)
+
+    # Register user consultation
+    consultation_id = None
+    if user_id:
+        with stage_timing.stage("consultation_save"):
+            consultation_id = save_consultation(user_id, news_id)
+
+    with stage_timing.stage("enrichment_lookup"):
+        enrichment = _known_news_enrichment(stored, async_mode)
+
+    return jsonify({
+        "consultation_id": consultation_id,
+        "news_id": news_id,
+        "classification_id": classification_id,
+        "source": data["url"],
+        "Título": stored["titulo"],
+        "Texto Completo": stored["contenido"],
+        "Fecha de Publicación": stored["fecha_publicacion"].strftime('%Y-%m-%d') if stored["fecha_publicacion"] else None,
+        "classification": result,
+        "confidence": confidence,
+        "explanation": explanation,
+        "topic": stored["tema"] or "Unclassified",
+        **enrichment,
+        "message": "News found in database"
+    }), 200
+
 @classify_bp.route("/predict", methods=["POST"])
 def classify():
-    """Receives news (text or URL), saves it to database and classifies it."""
+    """
+    Receives news (text or URL), saves it to database and classifies it.
+
+    By default the response includes keywords and related news. With async mode the
+    verdict is returned as soon as the model finishes, together with an
+    `enrichment_job_id`; keywords and related news are then fetched from
+    `/enrichment/<job_id>` (polling) or `/enrichment/<job_id>/stream` (SSE).
+    """
     data = request.json
 
     if not data:
         return jsonify({"error": "Please send JSON with 'text' or 'url'"}), 400
 
     try:
+        from core.classify_service import predict_news
+        
+        timer = stage_timing.request_timer("predict")
+        async_mode = _is_async_request(data)
         user_id = data.get("user_id", None)  # Optional user
         extracted_data = {}
-        existing_news = None
 
         if "url" in data:
-            # Check if news already exists in database
-            existing_news = find_existing_news_by_url(data["url"])
-            
-            extracted_data = extract_news_data(data["url"])
+            # Known URL: answer from the stored result without downloading the article again
+            with timer.stage("stored_lookup"):
+                stored = get_stored_news(data["url"])
+            if stored:
+                return _known_news_response(stored, data, user_id, async_mode)
+
+            with timer.stage("url_extraction"):
+                extracted_data = extract_news_data(data["url"])
             if not extracted_data:
                 return jsonify({"error": "Could not extract content from URL."}), 400
 
-            # Save source
-            source_id = get_or_create_source(data["url"])
             text = extracted_data["Texto Completo"]
 
         elif "text" in data:
@@ -131,98 +367,59 @@ def classify():
             extracted_data = {
                 "Título": "Not available",
                 "Texto Completo": text,
-                "Autor": "Unknown",
                 "Fecha de Publicación": None
             }
-            source_id = None
         else:
             return jsonify({"error": "JSON must contain 'text' or 'url'."}), 400
 
-        # If news already exists, only register consultation
-        if existing_news:
-            news_id = existing_news.id
-            logger.info(f"News with URL {data.get('url')} already exists in DB with ID {news_id}")
-            
-            # Get existing classification (assume it already has one)
-            classification = existing_news.clasificaciones[0] if existing_news.clasificaciones else None
-            
-            if classification:
-                result = classification.resultado
-                confidence = float(classification.confianza) if classification.confianza is not None else 0
-                explanation = classification.explicacion
-                classification_id = classification.id
-            else:
-                # If no classification exists, classify now
-                result, confidence, explanation = predict_news(text)
-                model_id = get_active_model()
-                classification_id = save_classification(news_id, model_id, result, confidence, explanation)
-            
-            # Get topic if exists
-            topic_name = existing_news.tema.nombre if existing_news.tema else "Unclassified"
-            
-            # Register user consultation
-            consultation_id = None
-            if user_id:
-                consultation_id = save_consultation(user_id, news_id)
-                
-            # Extract keywords from content for response
-            keywords = extract_keywords(text)
-            
-            # Search for related news
-            search_query = " ".join(keywords[:3]) if keywords else extracted_data.get("Título", "")
-            related_news = search_related_news(search_query)
-            
-            return jsonify({
-                "consultation_id": consultation_id,
-                "news_id": news_id,
-                "classification_id": classification_id,
-                "source": data.get("url", "Direct text input"),
-                **extracted_data,
-                "classification": result,
-                "confidence": confidence,
-                "explanation": explanation,
-                "topic": topic_name,
-                "keywords": keywords,
-                "related_news": related_news,
-                "message": "News found in database"
-            }), 200
-            
+        # Normalize and tokenize once; topic, keywords and inference share the same analysis
+        analysis = TextAnalysis(text)
+
         # STEP 1: Classify topic dynamically
-        topic_name, topic_id = classify_topic(text)
-        
-        # STEP 2: Save news with topic
-        news_id = save_news(
-            extracted_data["Título"],
-            extracted_data["Texto Completo"],
-            data.get("url"),
-            extracted_data["Fecha de Publicación"],
-            source_id,
-            topic_id
-        )
+        with timer.stage("topic"):
+            topic_name, topic_id = classify_topic(analysis)
         
-        # STEP 3: Extract and save keywords
-        keywords = extract_keywords(text)
-        save_news_keywords(news_id, keywords)
-
-        # STEP 4: Classify news as true or false
-        result, confidence, explanation = predict_news(text)
+        # STEP 2: Classify news as true or false
+        with timer.stage("inference"):
+            result, confidence, explanation = predict_news(analysis)
 
         # Get active model
         model_id = get_active_model()
         if not model_id:
             return jsonify({"error": "No active model available for classification."}), 500
 
-        # Save classification
-        classification_id = save_classification(news_id, model_id, result, confidence, explanation)
+        # STEP 3: Extract keywords (in async mode they are extracted and saved by the enrichment job)
+        keywords = None
+        if not async_mode:
+            with timer.stage("keywords"):
+                keywords = extract_keywords(analysis)
 
-        # STEP 5: Save in consultation history
-        consultation_id = None
-        if user_id:
-            consultation_id = save_consultation(user_id, news_id)
+        # STEP 4: Save source, news, keywords, classification and consultation in one transaction
+        ingestion = NewsIngestion(
+            extracted_data["Título"],
+            extracted_data["Texto Completo"],
+            data.get("url"),
+            extracted_data["Fecha de Publicación"]
+        )
+        ingestion.set_topic(topic_id)
+        ingestion.set_classification(model_id, result, confidence, explanation)
+        ingestion.set_consultation(user_id)
+        if keywords is not None:
+            # The lemmas are already computed for the keywords; count them in the same transaction
+            ingestion.set_keywords(keywords)
+            ingestion.set_terms(analysis.lemmas)
+        with timer.stage("save"):
+            saved = ingestion.commit()
 
-        # STEP 6: Search for related news
-        search_query = " ".join(keywords[:3]) if keywords else extracted_data.get("Título", "")
-        related_news = search_related_news(search_query)
+        news_id = saved["news_id"]
+        classification_id = saved["classification_id"]
+        consultation_id = saved["consultation_id"]
+
+        # STEP 5: Search for related news (inline, or in the background in async mode)
+        enrichment = _enrichment_response(
+            news_id, analysis, extracted_data.get("Título", ""), True, async_mode, keywords=keywords,
+            save_terms=async_mode and saved["created"]
+        )
 
         return jsonify({
             "consultation_id": consultation_id,
@@ -234,11 +431,160 @@ def classify():
             "confidence": confidence,
             "explanation": explanation,
             "topic": topic_name,
-            "keywords": keywords,
-            "related_news": related_news,
+            **enrichment,
             "message": "New news processed and stored"
         }), 200
     
     except Exception as e:
         logger.error(f"Error during classification: {str(e)}")
         return jsonify({"error": f"Error during processing: {str(e)}"}), 500
+
+def _extract_batch_urls(urls, deadline):
+    """
+    Downloads and extracts `urls` ({result index: url}) concurrently on the enrichment
+    pool. Returns {index: extracted data or None}; URLs that miss `deadline` are left
+    out (and cancelled if they had not started yet).
+    """
+    pool = get_enrichment_pool()
+    futures = {pool.submit(extract_news_data, url): index for index, url in urls.items()}
+
+    done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logger.info(f"{len(not_done)} batch URLs missed the extraction deadline")
+
+    extracted = {}
+    for future in done:
+        try:
+            extracted[futures[future]] = future.result()
+        except Exception as e:
+            logger.debug(f"Could not extract batch URL: {str(e)}")
+            extracted[futures[future]] = None
+    return extracted
+
+@classify_bp.route("/predict-batch", methods=["POST"])
+def classify_batch():
+    """Classifies many texts/URLs in one call and returns results in input order."""
+    data = request.json
+
+    if not data or not isinstance(data.get("items"), list) or not data["items"]:
+        return jsonify({"error": "Please send JSON with a non-empty 'items' list of {'text'} or {'url'} objects"}), 400
+
+    items = data["items"]
+    if len(items) > Config.PREDICT_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.PREDICT_BATCH_MAX_ITEMS} items are allowed per request."}), 400
+
+    try:
+        from core.classify_service import predict_news_batch
+        
+        results = []
+        pending = []  # (result index, text)
+        urls = {}  # result index -> url
+
+        for index, item in enumerate(items):
+            entry = {"index": index}
+
+            if isinstance(item, dict) and item.get("url"):
+                entry["source"] = item["url"]
+                urls[index] = item["url"]
+            elif isinstance(item, dict) and item.get("text"):
+                entry["source"] = "Direct text input"
+                pending.append((index, item["text"]))
+            else:
+                entry["error"] = "Item must contain 'text' or 'url'."
+
+            results.append(entry)
+
+        # All URLs are downloaded concurrently within one time budget for the whole batch
+        if urls:
+            extracted = _extract_batch_urls(urls, time.monotonic() + Config.PREDICT_BATCH_EXTRACT_BUDGET_S)
+            for index in urls:
+                if index not in extracted:
+                    results[index]["error"] = "URL extraction timed out."
+                elif not extracted[index] or not extracted[index].get("Texto Completo"):
+                    results[index]["error"] = "Could not extract content from URL."
+                else:
+                    results[index]["Título"] = extracted[index]["Título"]
+                    pending.append((index, extracted[index]["Texto Completo"]))
+
+        # Single batched inference over every valid item
+        predictions = predict_news_batch([text for _, text in pending])
+        for (index, _), (result, confidence, explanation) in zip(pending, predictions):
+            results[index].update({
+                "classification": result,
+                "confidence": confidence,
+                "explanation": explanation
+            })
+
+        return jsonify({
+            "count": len(results),
+            "classified": len(pending),
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error during batch classification: {str(e)}")
+        return jsonify({"error": f"Error during processing: {str(e)}"}), 500
+
+@classify_bp.route("/enrichment/<job_id>", methods=["GET"])
+def enrichment_status(job_id):
+    """Returns the status of an enrichment job and, once done, its keywords and related news."""
+    from core.enrichment_jobs import enrichment_jobs
+
+    job = enrichment_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Enrichment job not found."}), 404
+    return jsonify(job), 200
+
+@classify_bp.route("/enrichment/<job_id>/stream", methods=["GET"])
+def enrichment_stream(job_id):
+    """
+    Server-sent events for an enrichment job: a `status` event on every change and a
+    final `result` (or `error`) event, after which the stream closes.
+    """
+    from core.enrichment_jobs import enrichment_jobs, STATUS_DONE, FINAL_STATUSES
+
+    job = enrichment_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Enrichment job not found."}), 404
+
+    def events(job):
+        deadline = time.monotonic() + Config.ENRICHMENT_STREAM_TIMEOUT
+        last_status = None
+        while job is not None:
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: status\ndata: {json.dumps({'status': last_status})}\n\n"
+            if job["status"] in FINAL_STATUSES:
+                event = "result" if job["status"] == STATUS_DONE else "error"
+                yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+                return
+            if time.monotonic() >= deadline:
+                yield f"event: timeout\ndata: {json.dumps({'status': last_status})}\n\n"
+                return
+            # Comment line as keep-alive for proxies while waiting
+            yield ": keep-alive\n\n"
+            job = enrichment_jobs.wait(job_id, last_status, timeout=min(15, deadline - time.monotonic()))
+
+    return Response(
+        stream_with_context(events(job)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@classify_bp.route("/stats", methods=["GET"])
+def stats():
+    """Returns runtime statistics of the inference engine."""
+    from core.classify_service import get_inference_stats, get_cache_stats
+
+    return jsonify({
+        "inference": get_inference_stats(),
+        "prediction_cache": get_cache_stats(),
+        "lemma_cache": nlp_resources.get_lemma_cache_stats(),
+        "search_cache": web_search.get_stats(),
+        "topic_index": topic_index.get_stats(),
+        "keyword_idf": idf_store.get_stats(),
+        "source_cache": get_source_cache_stats(),
+        "sql": get_query_stats()
+    }), 200
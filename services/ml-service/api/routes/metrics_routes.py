@@ -0,0 +1,67 @@
+"""
+Métricas del servicio en el formato de texto de Prometheus (`GET /metrics`).
+
+Registrar el blueprint también instala la latencia por ruta de todas las
+peticiones (`http_request_duration_seconds`). Los gauges de cachés se calculan
+al leer las métricas, así que no añaden trabajo a las peticiones.
+
+Con `serve.py` cada worker es un proceso con sus propias métricas: `/metrics`
+en el puerto compartido responde el worker que acepte la conexión, por lo que
+en producción se usa `--metrics-port`, que abre un puerto por worker.
+"""
+from flask import Blueprint, Response, g, request
+import time
+from utils import metrics, nlp_resources, web_search
+from utils.db_utils import get_source_cache_stats
+from core.prediction_cache import prediction_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones por ruta", labelnames=("endpoint", "method", "status")
+)
+cache_hit_ratio = metrics.gauge("cache_hit_ratio", "Fracción de consultas servidas por la caché", labelnames=("cache",))
+cache_entries = metrics.gauge("cache_entries", "Entradas en memoria de la caché", labelnames=("cache",))
+
+# caché -> (función de estadísticas, clave de la tasa de aciertos)
+_CACHES = {
+    "prediction": (prediction_cache.get_stats, "hit_ratio"),
+    "lemma": (nlp_resources.get_lemma_cache_stats, "hit_rate"),
+    "search": (web_search.search_cache.get_stats, "hit_rate"),
+    "source": (get_source_cache_stats, "hit_rate"),
+}
+
+for _cache, (_get_stats, _ratio_key) in _CACHES.items():
+    cache_hit_ratio.labels(cache=_cache).set_function(lambda get_stats=_get_stats, key=_ratio_key: get_stats()[key])
+    cache_entries.labels(cache=_cache).set_function(lambda get_stats=_get_stats: get_stats()["size"])
+
+
+@metrics_bp.before_app_request
+def _start_request_timer():
+    g._request_started_at = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def _observe_request(response):
+    # En las respuestas en streaming (SSE) mide hasta que empieza el envío
+    started_at = g.get("_request_started_at")
+    if started_at is not None:
+        request_seconds.labels(
+            endpoint=request.endpoint or "unmatched", method=request.method, status=response.status_code
+        ).observe(time.perf_counter() - started_at)
+    return response
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Todas las métricas del proceso para Prometheus."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+def metrics_wsgi_app(environ, start_response):
+    """Aplicación WSGI mínima que solo sirve las métricas (puerto propio de cada worker)."""
+    body = metrics.render().encode("utf-8")
+    start_response("200 OK", [("Content-Type", CONTENT_TYPE), ("Content-Length", str(len(body)))])
+    return [body]
@@ -1,15 +1,12 @@
 from flask import Blueprint, request, jsonify
-import pandas as pd
-from sklearn.model_selection import train_test_split
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments
-from sklearn.metrics import classification_report
 import os
 import tempfile
 import logging
 from datetime import datetime
 from database.db import db
 from database.models import ModeloML
+from core.prediction_cache import prediction_cache
+from utils.db_utils import invalidate_active_model_cache
 from config import Config
 
 logging.basicConfig(level=logging.INFO)
@@ -17,7 +14,12 @@ logger = logging.getLogger(__name__)
 
 train_bp = Blueprint("train_bp", __name__)
 
-class FakeNewsDataset(torch.utils.data.Dataset):
+# Backends de inferencia válidos (mismos valores que `core.backends.BACKENDS`, sin importar torch)
+BACKENDS = ("pytorch", "onnx", "quantized")
+
+class FakeNewsDataset:
+    """Dataset map-style para el `Trainer` (torch se importa solo al entrenar)."""
+
     def __init__(self, encodings, labels):
         self.encodings = encodings
         self.labels = labels
@@ -26,6 +28,8 @@ class FakeNewsDataset(torch.utils.data.Dataset):
         return len(self.labels)
 
     def __getitem__(self, idx):
+        import torch
+
         item = {key: torch.tensor(val[idx]) for key, val in self.encodings.items()}
         item["labels"] = torch.tensor(self.labels[idx])
         return item
@@ -34,6 +38,14 @@ class FakeNewsDataset(torch.utils.data.Dataset):
 def train_model():
     """Entrena o reentrea el modelo de clasificación de noticias falsas"""
     try:
+        # Imports diferidos: pandas, scikit-learn, torch y transformers solo se necesitan al entrenar
+        import pandas as pd
+        import torch
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report
+        from transformers import AutoTokenizer, Trainer, TrainingArguments
+        from core.model_registry import load_sequence_classifier
+        
         # Validar archivo
         if 'file' not in request.files or request.files['file'].filename == '':
             return jsonify({"error": "Se requiere un archivo CSV de entrenamiento"}), 400
@@ -104,9 +116,8 @@ def train_model():
         try:
             # Cargar el modelo
             tokenizer = AutoTokenizer.from_pretrained(model_path)
-            model = AutoModelForSequenceClassification.from_pretrained(
-                model_path, from_tf=False, use_safetensors=False
-            )
+            # Copia privada de los pesos: el entrenamiento los modifica
+            model = load_sequence_classifier(model_path, mmap=False)
         except Exception as e:
             os.unlink(temp_file.name)
             return jsonify({"error": f"Error al cargar modelo desde {model_path}: {str(e)}"}), 500
@@ -161,22 +172,10 @@ def train_model():
         new_model_path = f"./models/model_{version}"
         os.makedirs(new_model_path, exist_ok=True)
         
-        model.save_pretrained(new_model_path)
+        # Guardar en safetensors: al servirlo se carga con mmap y los procesos comparten los pesos
+        model.save_pretrained(new_model_path, safe_serialization=True)
         tokenizer.save_pretrained(new_model_path)
         
-        # Convertir safetensors a bin si es necesario
-        safetensor_path = os.path.join(new_model_path, "model.safetensors")
-        bin_path = os.path.join(new_model_path, "pytorch_model.bin")
-        
-        if os.path.exists(safetensor_path):
-            try:
-                from safetensors.torch import load_file
-                weights = load_file(safetensor_path)
-                torch.save(weights, bin_path)
-                os.remove(safetensor_path)
-            except Exception as e:
-                logger.warning(f"No se pudo convertir safetensors a bin: {str(e)}")
-        
         # Registrar el nuevo modelo en la base de datos
         new_model = ModeloML(
             nombre="News Classifier",
@@ -233,7 +232,8 @@ def list_models():
                 "f1_score": float(model.f1_score) if model.f1_score else None,
                 "fecha_entrenamiento": model.fecha_entrenamiento.isoformat() if model.fecha_entrenamiento else None,
                 "activo": model.activo,
-                "modelo_base": model.modelo_base
+                "modelo_base": model.modelo_base,
+                "backend": model.backend
             })
             
         return jsonify({"models": result}), 200
@@ -246,15 +246,25 @@ def list_models():
 def activate_model(model_id):
     """Activa un modelo específico y desactiva los demás"""
     try:
-        ModeloML.query.update({"activo": False})
-        
         model = ModeloML.query.get(model_id)
         if not model:
             return jsonify({"error": f"No se encontró modelo con ID {model_id}"}), 404
-            
+        
+        # Modelos que dejan de estar activos (sus predicciones en caché quedan obsoletas)
+        previous_ids = [m.id for m in ModeloML.query.filter_by(activo=True).all() if m.id != model_id]
+        
+        ModeloML.query.update({"activo": False})
         model.activo = True
         db.session.commit()
         
+        for previous_id in previous_ids:
+            prediction_cache.invalidate_model(previous_id)
+        
+        # Cargar y calentar el nuevo modelo en segundo plano; se cambia en caliente al terminar
+        from core.model_manager import model_manager
+        invalidate_active_model_cache()
+        model_manager.request_refresh()
+        
         return jsonify({
             "success": True,
             "message": f"Modelo {model_id} activado correctamente",
@@ -271,6 +281,45 @@ def activate_model(model_id):
         logger.error(f"Error al activar modelo: {str(e)}")
         return jsonify({"error": f"Error al activar modelo: {str(e)}"}), 500
     
+@train_bp.route("/models/<int:model_id>/backend", methods=["PUT"])
+def set_model_backend(model_id):
+    """Define el backend de inferencia (pytorch, onnx o quantized) de un modelo"""
+    try:
+        data = request.json or {}
+        backend = data.get("backend")
+        
+        # `null` vuelve a usar el backend definido en la configuración
+        if backend is not None and backend not in BACKENDS:
+            return jsonify({"error": f"Backend no válido. Opciones: {', '.join(BACKENDS)}"}), 400
+        
+        model = ModeloML.query.get(model_id)
+        if not model:
+            return jsonify({"error": f"No se encontró modelo con ID {model_id}"}), 404
+        
+        model.backend = backend
+        model.updated_at = datetime.now()
+        db.session.commit()
+        
+        # Si es el modelo en servicio, recargarlo en segundo plano con el nuevo backend
+        if model.activo:
+            from core.model_manager import model_manager
+            model_manager.request_refresh()
+        
+        return jsonify({
+            "success": True,
+            "message": f"Backend del modelo {model_id} actualizado a {backend or Config.INFERENCE_BACKEND}",
+            "model": {
+                "id": model.id,
+                "version": model.version,
+                "backend": model.backend
+            }
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al actualizar backend del modelo: {str(e)}")
+        return jsonify({"error": f"Error al actualizar backend del modelo: {str(e)}"}), 500
+
 @train_bp.route("/models/<int:model_id>", methods=["DELETE"])
 def delete_model(model_id):
     """Elimina un modelo por ID, incluyendo sus archivos y modelos derivados"""
@@ -3,7 +3,9 @@ from api.routes.classify_routes import classify_bp
 from api.routes.train_routes import train_bp
 from api.routes.chatbot_routes import chatbot_bp
 from api.routes.analytics_routes import analytics_bp
+from api.routes.metrics_routes import metrics_bp
 from database.db import db, init_db
+from utils.stage_timing import init_stage_timing
 from database.models import *  # Importar todos los modelos
 from config import Config
 from cron_jobs import start_scheduler
@@ -19,11 +21,36 @@ app.config.from_object(Config)
 # Inicializar la base de datos
 init_db(app)
 
+# Cabecera Server-Timing con las etapas cronometradas de cada petición
+init_stage_timing(app)
+
 # Registrar los Blueprints
 app.register_blueprint(classify_bp, url_prefix="/api/ml/classify")
 app.register_blueprint(train_bp, url_prefix="/api/ml/train")
 app.register_blueprint(chatbot_bp, url_prefix="/api/ml/chatbot")
 app.register_blueprint(analytics_bp, url_prefix="/api/ml/analytics")
+# `/metrics` para Prometheus (y latencia por ruta de todas las peticiones)
+app.register_blueprint(metrics_bp)
+
+def warm_up_in_background():
+    """
+    Importa los módulos pesados (torch, transformers, NLTK) y carga el modelo en un hilo
+    aparte, para que el servidor empiece a aceptar peticiones sin esperar a la carga.
+    """
+    import threading
+
+    def _warm_up():
+        from core.classify_service import load_model
+        from core.model_manager import model_manager
+        from utils import nlp_resources
+
+        with app.app_context():
+            load_model()
+            nlp_resources.get_stop_words()
+        model_manager.start(app)
+
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
 
 if __name__ == "__main__":
     # Verificar si es el proceso principal (no el reloader)
@@ -31,7 +58,8 @@ if __name__ == "__main__":
     if not os.environ.get('WERKZEUG_RUN_MAIN'):
         with app.app_context():
             start_scheduler(app)
-            from core.classify_service import load_model
-            load_model()
+    else:
+        # Solo el proceso hijo del reloader atiende peticiones: cargar ahí el modelo sin bloquear el arranque
+        warm_up_in_background()
             
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5000, debug=True)
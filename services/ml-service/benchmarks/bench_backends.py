@@ -0,0 +1,66 @@
+"""
+Compara la latencia de inferencia en CPU de los backends disponibles.
+
+Uso (desde services/ml-service):
+    python -m benchmarks.bench_backends --model-path models/bert_health_model
+    python -m benchmarks.bench_backends --backends pytorch,quantized --runs 50 --batch-size 8
+"""
+import argparse
+import statistics
+import time
+import torch
+import torch.nn.functional as F
+from config import Config
+from core.backends import BACKENDS, build_backend
+
+SAMPLE_TEXTS = [
+    "Los científicos han demostrado que las vacunas contra COVID-19 son seguras y efectivas.",
+    "Un remedio casero con limón y bicarbonato cura el cáncer en una semana, aseguran en redes sociales.",
+    "La Secretaría de Salud reportó un aumento de casos de dengue en el sureste del país durante el último mes, "
+    "por lo que recomendó eliminar criaderos de mosquitos y acudir al médico ante síntomas como fiebre alta.",
+    "Beber agua caliente cada 15 minutos elimina cualquier virus del organismo.",
+]
+
+
+def _timed_runs(backend, texts, runs):
+    inputs = backend.tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    backend.logits(inputs)  # Calentamiento
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        F.softmax(backend.logits(inputs), dim=-1)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends de inferencia en CPU")
+    parser.add_argument("--model-path", default=Config.MODEL_PATH or "models/bert_health_model")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=len(SAMPLE_TEXTS))
+    args = parser.parse_args()
+
+    device = torch.device("cpu")
+    texts = (SAMPLE_TEXTS * args.batch_size)[:args.batch_size]
+    results = {}
+
+    for name in args.backends.split(","):
+        start = time.perf_counter()
+        backend = build_backend(args.model_path, name.strip(), device)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        single = _timed_runs(backend, texts[:1], args.runs)
+        batched = _timed_runs(backend, texts, args.runs)
+        results[name] = (backend.name, load_ms, statistics.median(single), statistics.median(batched))
+
+    baseline = results.get("pytorch")
+    print(f"{'backend':<12}{'efectivo':<12}{'carga ms':>10}{'1 texto ms':>12}{'batch ms':>12}{'speedup':>9}")
+    for name, (effective, load_ms, single_ms, batched_ms) in results.items():
+        speedup = f"{baseline[3] / batched_ms:.2f}x" if baseline else "-"
+        print(f"{name:<12}{effective:<12}{load_ms:>10.0f}{single_ms:>12.1f}{batched_ms:>12.1f}{speedup:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Cuenta los viajes a la BD (sentencias SQL + COMMIT) y el tiempo por noticia guardada,
+comparando la ruta anterior (una función y un commit por paso) con `NewsIngestion`.
+
+Escribe noticias sintéticas con URLs `https://bench.invalid/...` en la BD configurada
+y las elimina al terminar. La relevancia de las keywords de prueba queda incrementada.
+
+Uso (desde services/ml-service):
+    python -m benchmarks.bench_ingestion --articles 50 --user-id 1
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+KEYWORDS = ["vacuna", "influenza", "salud", "campaña", "hospital"]
+
+
+def _article(index):
+    return {
+        "titulo": f"Noticia de prueba {index}",
+        "contenido": "La Secretaría de Salud amplió la campaña de vacunación contra la influenza. " * 5,
+        "url": f"https://bench.invalid/noticias/{uuid.uuid4().hex}",
+        "fecha_publicacion": datetime.utcnow()
+    }
+
+
+def _legacy(article, modelo_id, usuario_id):
+    from utils.db_utils import (
+        get_or_create_source, save_news, save_news_keywords, save_classification, save_consultation
+    )
+
+    fuente_id = get_or_create_source(article["url"])
+    noticia_id = save_news(
+        article["titulo"], article["contenido"], article["url"], article["fecha_publicacion"], fuente_id
+    )
+    save_news_keywords(noticia_id, KEYWORDS)
+    save_classification(noticia_id, modelo_id, "verdadera", 90.0, "Prueba")
+    if usuario_id:
+        save_consultation(usuario_id, noticia_id)
+
+
+def _unit_of_work(article, modelo_id, usuario_id):
+    from utils.db_utils import NewsIngestion
+
+    ingestion = NewsIngestion(article["titulo"], article["contenido"], article["url"], article["fecha_publicacion"])
+    ingestion.set_keywords(KEYWORDS)
+    ingestion.set_classification(modelo_id, "verdadera", 90.0, "Prueba")
+    ingestion.set_consultation(usuario_id)
+    ingestion.commit()
+
+
+def _measure(fn, articles, modelo_id, usuario_id):
+    from utils.db_utils import count_round_trips
+
+    trips, times = [], []
+    for article in articles:
+        start = time.perf_counter()
+        with count_round_trips() as counter:
+            fn(article, modelo_id, usuario_id)
+        times.append((time.perf_counter() - start) * 1000)
+        trips.append(counter.total)
+    return trips, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Viajes a la BD por noticia guardada")
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--user-id", type=int, default=None, help="Usuario existente para registrar consultas")
+    args = parser.parse_args()
+
+    from app import app
+    from database.db import db
+    from database.models import Noticia
+    from utils.db_utils import get_active_model
+
+    with app.app_context():
+        modelo_id = get_active_model()
+        print(f"{'ruta':<16}{'viajes/noticia':>16}{'ms p50':>10}{'ms max':>10}")
+        try:
+            for name, fn in (("anterior", _legacy), ("unit-of-work", _unit_of_work)):
+                articles = [_article(i) for i in range(args.articles)]
+                trips, times = _measure(fn, articles, modelo_id, args.user_id)
+                print(f"{name:<16}{statistics.mean(trips):>16.1f}{statistics.median(times):>10.1f}{max(times):>10.1f}")
+        finally:
+            Noticia.query.filter(Noticia.url.like("https://bench.invalid/%")).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Mide el tiempo de arranque en frío y la memoria por proceso al cargar el modelo.
+
+Compara la carga anterior (deserializar `pytorch_model.bin` con pickle) con la carga
+desde safetensors mapeado en memoria. Cada medición se hace en un proceso nuevo;
+con `--processes N` se cargan N procesos a la vez para ver cuánta memoria comparten.
+
+Uso (desde services/ml-service):
+    python -m benchmarks.bench_model_load --model-path models/bert_health_model --processes 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODES = ("pickle", "mmap")
+
+
+def _load_once(model_path, mode):
+    """Se ejecuta en el proceso hijo: carga el modelo e informa tiempo y memoria."""
+    import psutil
+
+    start = time.perf_counter()
+    if mode == "pickle":
+        from transformers import AutoModelForSequenceClassification
+        model = AutoModelForSequenceClassification.from_pretrained(model_path, from_tf=False, use_safetensors=False)
+    else:
+        from core.model_registry import load_sequence_classifier
+        model = load_sequence_classifier(model_path, mmap=True)
+    model.eval()
+    load_s = time.perf_counter() - start
+
+    memory = psutil.Process().memory_full_info()
+    print(json.dumps({
+        "load_s": load_s,
+        "rss_mb": memory.rss / 2 ** 20,
+        "uss_mb": memory.uss / 2 ** 20,  # Memoria privada del proceso
+        "pss_mb": getattr(memory, "pss", 0) / 2 ** 20,  # Memoria compartida repartida entre procesos
+    }))
+    sys.stdout.flush()
+    # Mantener el proceso vivo hasta que el padre haya medido a todos
+    sys.stdin.read()
+
+
+def _run(model_path, mode, processes):
+    children = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_model_load", "--child", mode, "--model-path", model_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(processes)
+    ]
+    results = [json.loads(child.stdout.readline()) for child in children]
+    for child in children:
+        child.stdin.close()
+        child.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga del modelo (pickle vs safetensors mmap)")
+    parser.add_argument("--model-path", default="models/bert_health_model")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _load_once(args.model_path, args.child)
+        return
+
+    print(f"{'modo':<8}{'carga s':>10}{'RSS MB':>10}{'USS MB':>10}{'PSS MB':>10}   ({args.processes} procesos)")
+    for mode in MODES:
+        results = _run(args.model_path, mode, args.processes)
+        avg = {key: sum(r[key] for r in results) / len(results) for key in results[0]}
+        print(f"{mode:<8}{avg['load_s']:>10.2f}{avg['rss_mb']:>10.0f}{avg['uss_mb']:>10.0f}{avg['pss_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Mide el tiempo de arranque del ml-service: cuánto tarda `import app` y qué
+paquetes de primer nivel se llevan ese tiempo.
+
+Usa `python -X importtime` en un proceso nuevo y agrega el tiempo acumulado de
+cada módulo importado directamente por el código del servicio. Las librerías
+pesadas (torch, transformers, sklearn, nltk, langchain, newspaper) no deberían
+aparecer: se importan al usarse por primera vez o en el hilo de calentamiento.
+
+Uso (desde services/ml-service):
+    python -m benchmarks.bench_startup --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+HEAVY_MODULES = ("torch", "transformers", "sklearn", "nltk", "langchain", "langchain_community",
+                 "langchain_google_genai", "newspaper", "pandas", "onnxruntime")
+
+
+def _measure(statement):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env
+    )
+    wall_s = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return wall_s, result.stderr
+
+
+def _parse(importtime_output):
+    """Devuelve {paquete de primer nivel: microsegundos acumulados}."""
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = cumulative.strip()
+        # Solo los módulos de primer nivel del árbol (un único espacio de sangría) para no contar dos veces
+        if name.startswith("  ") or not cumulative.isdigit():
+            continue
+        name = name.strip()
+        totals[name.split(".")[0]] += int(cumulative)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque del ml-service")
+    parser.add_argument("--statement", default="import app", help="Código a medir")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    wall_s, output = _measure(args.statement)
+    totals = _parse(output)
+
+    print(f"'{args.statement}': {wall_s:.2f}s de reloj (incluye el arranque del intérprete)")
+    print(f"{'paquete':<28}{'acumulado ms':>14}")
+    for name, micros in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<28}{micros / 1000:>14.1f}")
+
+    heavy = [name for name in HEAVY_MODULES if name in totals]
+    if heavy:
+        print(f"\nAviso: se importan al arrancar: {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
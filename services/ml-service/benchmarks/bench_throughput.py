@@ -0,0 +1,75 @@
+"""
+Mide el throughput de clasificación de un ml-service en ejecución.
+
+Envía peticiones concurrentes a `/api/ml/classify/predict-batch` (sin escrituras
+de noticias en la BD) con textos únicos para no acertar en la caché de predicciones.
+
+Uso (desde services/ml-service), comparando ambos modos contra el mismo puerto:
+    python app.py                        # modo actual de un solo proceso
+    python -m benchmarks.bench_throughput --concurrency 16 --duration 30
+
+    python serve.py --workers 4          # modo pre-fork
+    python -m benchmarks.bench_throughput --concurrency 16 --duration 30
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_TEXT = (
+    "La Secretaría de Salud informó que la campaña de vacunación contra la influenza "
+    "se extenderá hasta marzo en todas las unidades médicas del país."
+)
+
+
+def _client(url, deadline, latencies, errors, lock):
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        payload = {"items": [{"text": f"{BASE_TEXT} Ref {uuid.uuid4().hex}"}]}
+        start = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=60)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput del ml-service")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/api/ml/classify/predict-batch")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20, help="Segundos de carga")
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(_client, args.url, deadline, latencies, errors, lock)
+    elapsed = time.monotonic() - started
+
+    if not latencies:
+        print(f"Sin respuestas correctas ({len(errors)} errores)")
+        return
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"peticiones: {len(latencies)}  errores: {len(errors)}  duración: {elapsed:.1f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latencia ms  p50: {statistics.median(latencies):.1f}  p99: {p99:.1f}  max: {latencies[-1]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
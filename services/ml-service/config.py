@@ -19,3 +19,92 @@ class Config:
 
     # Ruta del Modelo
     MODEL_PATH = os.getenv("MODEL_PATH")
+
+    # Motor de micro-batching para inferencia
+    INFERENCE_BATCHING_ENABLED = os.getenv("INFERENCE_BATCHING_ENABLED", "true").lower() == "true"
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 16))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+    INFERENCE_BATCH_CHUNK_SIZE = int(os.getenv("INFERENCE_BATCH_CHUNK_SIZE", 32))
+    PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", 100))
+    # Presupuesto (segundos) para descargar en paralelo las URLs de una petición a /predict-batch
+    PREDICT_BATCH_EXTRACT_BUDGET_S = float(os.getenv("PREDICT_BATCH_EXTRACT_BUDGET_S", 20))
+
+    # Caché de predicciones (LRU en memoria + tabla `cache_predicciones`)
+    PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+    PREDICTION_CACHE_PERSISTENT = os.getenv("PREDICTION_CACHE_PERSISTENT", "true").lower() == "true"
+
+    # Límites (en tokens) de los buckets de longitud para reducir el relleno
+    INFERENCE_BUCKET_BOUNDARIES = sorted(
+        int(bound) for bound in os.getenv("INFERENCE_BUCKET_BOUNDARIES", "32,64,128,256,512").split(",") if bound.strip()
+    )
+
+    # Backend de inferencia por defecto: pytorch, onnx o quantized (int8 dinámico).
+    # Cada fila de `modelos_ml` puede sobrescribirlo con su columna `backend`.
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch")
+
+    # Gestión del modelo activo: TTL del id cacheado y periodo de revisión en segundo plano
+    ACTIVE_MODEL_TTL = float(os.getenv("ACTIVE_MODEL_TTL", 5))
+    MODEL_POLL_INTERVAL = float(os.getenv("MODEL_POLL_INTERVAL", 5))
+
+    # Datos de NLTK: se leen de un directorio local; descargar solo si se permite explícitamente
+    NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data"))
+    NLTK_AUTO_DOWNLOAD = os.getenv("NLTK_AUTO_DOWNLOAD", "false").lower() == "true"
+
+    # Tamaño máximo de la caché LRU de lemas
+    LEMMA_CACHE_SIZE = int(os.getenv("LEMMA_CACHE_SIZE", 50000))
+
+    # Índice de temas: cada cuántos segundos se comprueba si cambió la tabla `temas`, y similitud mínima
+    TOPIC_INDEX_CHECK_INTERVAL = float(os.getenv("TOPIC_INDEX_CHECK_INTERVAL", 30))
+    TOPIC_MIN_SIMILARITY = float(os.getenv("TOPIC_MIN_SIMILARITY", 0.01))
+
+    # Frecuencias de documento para las keywords: cada cuántos segundos se recargan de la BD
+    IDF_REFRESH_INTERVAL = float(os.getenv("IDF_REFRESH_INTERVAL", 300))
+
+    # Enriquecimiento de noticias relacionadas: hilos de descarga y presupuesto total (segundos)
+    RELATED_NEWS_MAX_WORKERS = int(os.getenv("RELATED_NEWS_MAX_WORKERS", 8))
+    RELATED_NEWS_BUDGET_S = float(os.getenv("RELATED_NEWS_BUDGET_S", 8))
+
+    # Búsqueda web (noticias relacionadas y chatbot): proveedor y caché de resultados
+    SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "google")
+    SEARCH_FIXTURE_PATH = os.getenv(
+        "SEARCH_FIXTURE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures", "search_results.json")
+    )
+    SEARCH_TIMEOUT_S = float(os.getenv("SEARCH_TIMEOUT_S", 10))
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 6 * 3600))
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 2000))
+    SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", "")  # Vacío: solo memoria
+
+    # Cliente HTTP compartido (descarga de artículos y API de búsqueda)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 32))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 15))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5))
+    HTTP_MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", 5 * 1024 * 1024))
+    HTTP_USER_AGENT = os.getenv(
+        "HTTP_USER_AGENT",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    )
+
+    # Enriquecimiento asíncrono de /predict (keywords y noticias relacionadas en segundo plano)
+    ENRICHMENT_MAX_WORKERS = int(os.getenv("ENRICHMENT_MAX_WORKERS", 4))
+    ENRICHMENT_JOB_TTL = float(os.getenv("ENRICHMENT_JOB_TTL", 600))
+    ENRICHMENT_POLL_INTERVAL = float(os.getenv("ENRICHMENT_POLL_INTERVAL", 0.5))
+    ENRICHMENT_STREAM_TIMEOUT = float(os.getenv("ENRICHMENT_STREAM_TIMEOUT", 60))
+    # Filas de `trabajos_enriquecimiento` más antiguas que esto (segundos) se borran cada `ENRICHMENT_PURGE_INTERVAL`
+    ENRICHMENT_ROW_RETENTION = float(os.getenv("ENRICHMENT_ROW_RETENTION", 24 * 3600))
+    ENRICHMENT_PURGE_INTERVAL = float(os.getenv("ENRICHMENT_PURGE_INTERVAL", 3600))
+
+    # Índice en memoria de URLs ya analizadas (URL -> id de noticia) para la ruta rápida de /predict
+    KNOWN_URL_INDEX_SIZE = int(os.getenv("KNOWN_URL_INDEX_SIZE", 100000))
+
+    # Caché en memoria de fuentes (netloc -> id de fuente)
+    SOURCE_CACHE_SIZE = int(os.getenv("SOURCE_CACHE_SIZE", 10000))
+
+    # Instrumentación SQL: umbral de sentencia lenta (ms), repeticiones de una misma sentencia
+    # en una petición antes de avisar de un posible N+1, y sentencias más lentas guardadas por petición
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 200))
+    SQL_REPEATED_QUERY_THRESHOLD = int(os.getenv("SQL_REPEATED_QUERY_THRESHOLD", 10))
+    SQL_SLOWEST_PER_REQUEST = int(os.getenv("SQL_SLOWEST_PER_REQUEST", 5))
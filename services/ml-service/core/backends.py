@@ -0,0 +1,195 @@
+import os
+import logging
+import torch
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+from core.model_registry import load_sequence_classifier
+
+logger = logging.getLogger(__name__)
+
+BACKEND_PYTORCH = "pytorch"
+BACKEND_ONNX = "onnx"
+BACKEND_QUANTIZED = "quantized"
+BACKENDS = (BACKEND_PYTORCH, BACKEND_ONNX, BACKEND_QUANTIZED)
+
+# Artefactos generados junto a `models/model_<version>`
+ONNX_DIR = "onnx"
+ONNX_FILE = "model.onnx"
+QUANTIZED_DIR = "quantized"
+QUANTIZED_FILE = "model_int8.pt"
+
+
+class InferenceBackend:
+    """
+    Backend de inferencia: expone el tokenizer del modelo y calcula los logits
+    de un batch ya tokenizado (tensores de PyTorch), de forma que `predict_news`
+    mantiene el mismo contrato de respuesta sea cual sea el runtime.
+    """
+
+    name = None
+
+    def __init__(self, model_path, device):
+        self.model_path = model_path
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    def logits(self, inputs):
+        raise NotImplementedError
+
+    def after_fork(self, num_threads):
+        """Reinicializa el estado no compartible tras un fork (pools de hilos del runtime)."""
+
+
+class PytorchBackend(InferenceBackend):
+    """Modelo PyTorch en precisión completa (modo eager)."""
+
+    name = BACKEND_PYTORCH
+
+    def __init__(self, model_path, device):
+        super().__init__(model_path, device)
+        self.model = load_sequence_classifier(model_path)
+        self.model.to(device)
+        self.model.eval()
+
+    def logits(self, inputs):
+        inputs = {key: val.to(self.device) for key, val in inputs.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class QuantizedPytorchBackend(InferenceBackend):
+    """Modelo PyTorch con cuantización dinámica int8 de las capas lineales (solo CPU)."""
+
+    name = BACKEND_QUANTIZED
+
+    def __init__(self, model_path, device):
+        super().__init__(model_path, torch.device("cpu"))
+        artifact = os.path.join(model_path, QUANTIZED_DIR, QUANTIZED_FILE)
+
+        if os.path.exists(artifact):
+            # Reconstruir la arquitectura cuantizada y cargar los pesos int8 guardados,
+            # sin pasar por los pesos en precisión completa
+            config = AutoConfig.from_pretrained(model_path)
+            base_model = AutoModelForSequenceClassification.from_config(config)
+            self.model = self._quantize(base_model)
+            self.model.load_state_dict(torch.load(artifact, map_location="cpu"))
+        else:
+            base_model = load_sequence_classifier(model_path)
+            self.model = self._quantize(base_model)
+            try:
+                os.makedirs(os.path.dirname(artifact), exist_ok=True)
+                torch.save(self.model.state_dict(), artifact)
+                logger.info(f"Modelo cuantizado int8 guardado en {artifact}")
+            except Exception as e:
+                logger.warning(f"No se pudo guardar el modelo cuantizado en {artifact}: {str(e)}")
+
+        self.model.eval()
+
+    @staticmethod
+    def _quantize(model):
+        model.eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def logits(self, inputs):
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class _LogitsWrapper(torch.nn.Module):
+    """Adapta el modelo para exportarlo a ONNX con entradas posicionales y salida de logits."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *tensors):
+        return self.model(**dict(zip(self.input_names, tensors))).logits
+
+
+class OnnxBackend(InferenceBackend):
+    """Modelo exportado a ONNX y ejecutado con ONNX Runtime en CPU."""
+
+    name = BACKEND_ONNX
+
+    def __init__(self, model_path, device):
+        super().__init__(model_path, torch.device("cpu"))
+
+        self.artifact = os.path.join(model_path, ONNX_DIR, ONNX_FILE)
+        if not os.path.exists(self.artifact):
+            self._export(self.artifact)
+
+        self._create_session()
+
+    def _create_session(self, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.artifact, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def after_fork(self, num_threads):
+        # El pool de hilos de ONNX Runtime no sobrevive a un fork: se crea una sesión por worker
+        self._create_session(num_threads)
+
+    def _export(self, artifact):
+        model = load_sequence_classifier(self.model_path)
+        model.eval()
+
+        sample = self.tokenizer("Texto de ejemplo para exportar el modelo", return_tensors="pt")
+        input_names = list(sample.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        os.makedirs(os.path.dirname(artifact), exist_ok=True)
+        with torch.no_grad():
+            torch.onnx.export(
+                _LogitsWrapper(model, input_names),
+                tuple(sample[name] for name in input_names),
+                artifact,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        logger.info(f"Modelo exportado a ONNX en {artifact}")
+
+    def logits(self, inputs):
+        feeds = {name: inputs[name].cpu().numpy() for name in self.input_names if name in inputs}
+        return torch.from_numpy(self.session.run(["logits"], feeds)[0])
+
+
+_BACKEND_CLASSES = {
+    BACKEND_PYTORCH: PytorchBackend,
+    BACKEND_ONNX: OnnxBackend,
+    BACKEND_QUANTIZED: QuantizedPytorchBackend,
+}
+
+
+def build_backend(model_path, backend_name, device):
+    """
+    Construye el backend solicitado para `model_path`.
+
+    Si el backend no existe, no está disponible (p. ej. falta `onnxruntime`) o no
+    aplica al dispositivo (ONNX/int8 solo en CPU), se usa PyTorch eager.
+    """
+    backend_name = (backend_name or BACKEND_PYTORCH).lower()
+
+    if backend_name not in _BACKEND_CLASSES:
+        logger.warning(f"Backend de inferencia desconocido '{backend_name}'. Usando {BACKEND_PYTORCH}.")
+        backend_name = BACKEND_PYTORCH
+
+    if backend_name != BACKEND_PYTORCH and device.type != "cpu":
+        logger.info(f"El backend '{backend_name}' solo aplica en CPU. Usando {BACKEND_PYTORCH} en {device}.")
+        backend_name = BACKEND_PYTORCH
+
+    if backend_name != BACKEND_PYTORCH:
+        try:
+            return _BACKEND_CLASSES[backend_name](model_path, device)
+        except Exception as e:
+            logger.warning(f"No se pudo inicializar el backend '{backend_name}' ({str(e)}). Usando {BACKEND_PYTORCH}.")
+
+    return PytorchBackend(model_path, device)
@@ -1,94 +1,254 @@
 import torch
 import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import os
+from collections import OrderedDict
 from config import Config
-from database.models import ModeloML
+from core.inference_engine import BatchingEngine
+from core.model_manager import model_manager
+from core.prediction_cache import prediction_cache
+from utils import metrics
+from utils.text_analysis import TextAnalysis, encode_many
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Variables globales para mantener el modelo cargado
-tokenizer = None
-model = None
-model_id = None
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# Motor de micro-batching compartido por todas las peticiones
+_engine = None
+_engine_lock = threading.Lock()
+
+LABELS = ["verdadera", "falsa"]
+MAX_TOKENS = 512
+
+# Métricas de longitud de tokens y relleno (padding) por forward pass
+token_length_histogram = metrics.histogram(
+    "inference_token_length", "Longitud en tokens de los textos clasificados",
+    buckets=Config.INFERENCE_BUCKET_BOUNDARIES
+)
+real_tokens_total = metrics.counter("inference_real_tokens_total", "Tokens reales procesados")
+padded_tokens_total = metrics.counter("inference_padded_tokens_total", "Tokens procesados incluyendo relleno")
+unbucketed_tokens_total = metrics.counter(
+    "inference_unbucketed_tokens_total", "Tokens que se habrían procesado rellenando todo el batch a su máximo"
+)
+
+# Latencia de inferencia: por lote (tokenización y forward passes) y por predicción (incluye la espera en el motor)
+inference_batch_seconds = metrics.histogram(
+    "inference_batch_seconds", "Duración de la inferencia de un lote", labelnames=("backend",)
+)
+inference_batch_size = metrics.histogram(
+    "inference_batch_size", "Textos por lote de inferencia", labelnames=("backend",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+prediction_seconds = metrics.histogram(
+    "inference_prediction_seconds", "Latencia de una predicción no cacheada de `predict_news`"
+)
+inference_queue_depth = metrics.gauge("inference_queue_depth", "Textos en cola del motor de batching")
 
 def load_model():
-    """Carga el modelo activo desde la base de datos."""
-    global tokenizer, model, model_id
-    
-    try:
-        # Obtener el modelo activo de la base de datos
-        modelo_activo = ModeloML.query.filter_by(activo=True).first()
-        
-        # Si no hay modelo activo, intentar usar el modelo predeterminado
-        if not modelo_activo:
-            default_model_path = Config.MODEL_PATH
-            logger.warning(f"No hay modelo activo en la BD. Usando modelo predeterminado: {default_model_path}")
-            tokenizer = AutoTokenizer.from_pretrained(default_model_path)
-            model = AutoModelForSequenceClassification.from_pretrained(default_model_path, from_tf=False, use_safetensors=False)
-            model_id = None
-            return
-            
-        # Si el modelo ya está cargado, no hacer nada
-        if model_id == modelo_activo.id:
-            return
-            
-        # Construir la ruta al modelo
-        model_path = os.path.join('models', f"model_{modelo_activo.version}")
-        
-        # Si la ruta no existe, intentar usar el modelo predeterminado
-        if not os.path.exists(model_path):
-            logger.warning(f"Ruta del modelo {model_path} no encontrada. Usando modelo predeterminado.")
-            model_path = Config.MODEL_PATH
-            
-        logger.info(f"Cargando modelo desde: {model_path}")
-        
-        # Cargar el modelo
-        tokenizer = AutoTokenizer.from_pretrained(model_path)
-        model = AutoModelForSequenceClassification.from_pretrained(model_path, from_tf=False, use_safetensors=False)
-        model.to(device)
-        model_id = modelo_activo.id
-        
-        logger.info(f"Modelo {model_id} cargado correctamente")
-        
-    except Exception as e:
-        logger.error(f"Error al cargar el modelo: {str(e)}")
-        # En caso de error, intentar cargar el modelo predeterminado
-        try:
-            default_model_path = Config.MODEL_PATH
-            tokenizer = AutoTokenizer.from_pretrained(default_model_path)
-            model = AutoModelForSequenceClassification.from_pretrained(default_model_path, from_tf=False, use_safetensors=False)
-            model.to(device)
-            model_id = None
-            logger.warning(f"Se ha cargado el modelo predeterminado debido a un error")
-        except Exception as inner_e:
-            logger.error(f"Error crítico al cargar modelo predeterminado: {str(inner_e)}")
-            raise
+    """Carga el modelo activo desde la base de datos (de forma síncrona, si cambió)."""
+    return model_manager.load_active()
 
-def predict_news(text):
-    """Clasifica una noticia y devuelve su resultado."""
-    global tokenizer, model, device
-    
-    # Asegurar que el modelo está cargado
-    if model is None or tokenizer is None:
-        load_model()
-        
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    inputs = {key: val.to(device) for key, val in inputs.items()}
-
-    model.eval()
-    with torch.no_grad():
-        outputs = model(**inputs)
-
-    probs = F.softmax(outputs.logits, dim=-1)
-    confidence, predicted_class = torch.max(probs, dim=1)
-
-    verdad_prob = probs[0, 0].item()
+def _format_prediction(probs_row):
+    """Convierte una fila de probabilidades en (resultado, confianza, explicación)."""
+    predicted_class = int(torch.argmax(probs_row).item())
+    verdad_prob = probs_row[0].item()
     confiabilidad = round(verdad_prob * 100, 2)
 
-    labels = ["verdadera", "falsa"]
-    return labels[predicted_class.item()], confiabilidad, \
-           "La noticia parece confiable." if labels[predicted_class.item()] == "verdadera" else \
-           "La noticia muestra patrones de desinformación."
\ No newline at end of file
+    label = LABELS[predicted_class]
+    explicacion = "La noticia parece confiable." if label == "verdadera" else \
+                  "La noticia muestra patrones de desinformación."
+    return label, confiabilidad, explicacion
+
+def _bucket_for(length):
+    """Límite superior del bucket de longitud al que pertenece un texto."""
+    for bound in Config.INFERENCE_BUCKET_BOUNDARIES:
+        if length <= bound:
+            return bound
+    return MAX_TOKENS
+
+def _infer_batch(texts, loaded=None):
+    """
+    Ejecuta la inferencia de una lista de textos (o `TextAnalysis`) agrupándolos por longitud.
+
+    Los textos se tokenizan sin relleno (reutilizando los ids ya memorizados en cada análisis), se ordenan y reparten en buckets según
+    `INFERENCE_BUCKET_BOUNDARIES`, y cada bucket se rellena solo hasta su propio
+    máximo, de modo que un artículo largo no obliga a procesar tweets cortos a 512 tokens.
+    """
+    # Referencia fija al modelo: un cambio en caliente no afecta a este batch
+    loaded = loaded or model_manager.get()
+    current_tokenizer, current_model = loaded.tokenizer, loaded.backend
+    started_at = time.perf_counter()
+
+    encodings = encode_many([TextAnalysis.of(text) for text in texts], current_tokenizer, MAX_TOKENS)
+    lengths = [len(encoding["input_ids"]) for encoding in encodings]
+
+    buckets = {}
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        buckets.setdefault(_bucket_for(lengths[index]), []).append(index)
+
+    results = [None] * len(lengths)
+    padded_tokens = 0
+
+    for indices in buckets.values():
+        features = {key: [encodings[i][key] for i in indices] for key in encodings[indices[0]]}
+        inputs = current_tokenizer.pad(features, padding=True, return_tensors="pt")
+        padded_tokens += inputs["input_ids"].numel()
+
+        probs = F.softmax(current_model.logits(inputs), dim=-1)
+        for row, index in enumerate(indices):
+            results[index] = _format_prediction(probs[row])
+
+    inference_batch_seconds.labels(backend=current_model.name).observe(time.perf_counter() - started_at)
+    inference_batch_size.labels(backend=current_model.name).observe(len(lengths))
+    for length in lengths:
+        token_length_histogram.observe(length)
+    real_tokens_total.inc(sum(lengths))
+    padded_tokens_total.inc(padded_tokens)
+    unbucketed_tokens_total.inc(max(lengths) * len(lengths) if lengths else 0)
+
+    return results
+
+def _infer_engine_batch(items):
+    """Procesa un batch del motor; cada elemento es (modelo, análisis) y se agrupa por modelo."""
+    groups = OrderedDict()
+    for index, (loaded, _) in enumerate(items):
+        groups.setdefault(id(loaded), (loaded, []))[1].append(index)
+
+    results = [None] * len(items)
+    for loaded, indices in groups.values():
+        for index, result in zip(indices, _infer_batch([items[i][1] for i in indices], loaded)):
+            results[index] = result
+    return results
+
+def get_engine():
+    """Devuelve el motor de batching, creándolo y arrancándolo la primera vez."""
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = BatchingEngine(
+                    _infer_engine_batch,
+                    max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+                    max_wait_ms=Config.INFERENCE_MAX_WAIT_MS
+                )
+                engine.start()
+                inference_queue_depth.set_function(engine.queue_depth)
+                _engine = engine
+    return _engine
+
+def get_cache_stats():
+    """Aciertos y fallos de la caché de predicciones."""
+    return prediction_cache.get_stats()
+
+def get_inference_stats():
+    """Estadísticas del motor de batching y del relleno por longitud."""
+    if not Config.INFERENCE_BATCHING_ENABLED:
+        batching = {"enabled": False}
+    elif _engine is None:
+        batching = {"enabled": True, "started": False}
+    else:
+        batching = _engine.get_stats()
+
+    real = real_tokens_total.labels().snapshot()
+    padded = padded_tokens_total.labels().snapshot()
+    unbucketed = unbucketed_tokens_total.labels().snapshot()
+
+    current = model_manager.current
+    return {
+        "model": {
+            "id": current.model_id,
+            "version": current.version,
+            "backend": current.backend.name
+        } if current else None,
+        "batching": batching,
+        "bucket_boundaries": list(Config.INFERENCE_BUCKET_BOUNDARIES),
+        "token_length_histogram": token_length_histogram.labels().snapshot(),
+        "padding": {
+            "real_tokens": real,
+            "padded_tokens": padded,
+            "unbucketed_tokens": unbucketed,
+            # Fracción de cómputo desperdiciada en relleno, con y sin buckets
+            "padding_ratio": round(1 - real / padded, 4) if padded else 0,
+            "unbucketed_padding_ratio": round(1 - real / unbucketed, 4) if unbucketed else 0
+        }
+    }
+
+def predict_news(text):
+    """Clasifica una noticia (texto o `TextAnalysis`) y devuelve su resultado."""
+    # Modelo en servicio al recibir la petición (se carga en el hilo del llamador si aún no existe)
+    loaded = model_manager.get()
+
+    analysis = TextAnalysis.of(text)
+    key = analysis.hash
+    cached = prediction_cache.get(loaded.model_id, key)
+    if cached is not None:
+        return cached
+
+    started_at = time.perf_counter()
+    if not Config.INFERENCE_BATCHING_ENABLED:
+        result = _infer_batch([analysis], loaded)[0]
+    else:
+        # El hilo del motor agrupa esta petición con otras concurrentes
+        result = get_engine().submit((loaded, analysis)).result()
+    prediction_seconds.observe(time.perf_counter() - started_at)
+
+    prediction_cache.put(loaded.model_id, key, result)
+    return result
+
+def predict_news_batch(texts, batch_size=None):
+    """
+    Clasifica una lista de noticias (textos o `TextAnalysis`) en bloques de `batch_size` textos.
+
+    Devuelve una lista de tuplas (resultado, confianza, explicación) en el mismo
+    orden que `texts`. Los textos ya clasificados por el modelo activo se sirven
+    desde la caché y los duplicados dentro de la lista se infieren una sola vez.
+    """
+    if not texts:
+        return []
+
+    loaded = model_manager.get()
+    batch_size = max(1, int(batch_size or Config.INFERENCE_BATCH_CHUNK_SIZE))
+
+    analyses = [TextAnalysis.of(text) for text in texts]
+    hashes = [analysis.hash for analysis in analyses]
+    predictions = prediction_cache.get_many(loaded.model_id, hashes)
+
+    # Textos únicos que faltan en la caché
+    pending = {}
+    for key, analysis in zip(hashes, analyses):
+        if key not in predictions and key not in pending:
+            pending[key] = analysis
+
+    pending_keys = list(pending.keys())
+    computed = {}
+    for start in range(0, len(pending_keys), batch_size):
+        chunk = pending_keys[start:start + batch_size]
+        for key, result in zip(chunk, _infer_batch([pending[k] for k in chunk], loaded)):
+            computed[key] = result
+
+    if computed:
+        prediction_cache.put_many(loaded.model_id, computed)
+        predictions.update(computed)
+
+    return [predictions[key] for key in hashes]
+
+def predict_news_each(texts):
+    """
+    Como `predict_news_batch`, pero un fallo del lote no pierde todos los textos:
+    se reintenta texto a texto con `predict_news` y los que vuelven a fallar
+    quedan como None en su posición.
+    """
+    try:
+        return predict_news_batch(texts)
+    except Exception as e:
+        logger.error(f"Error al clasificar el lote; se clasifica texto a texto: {str(e)}")
+
+    predictions = []
+    for text in texts:
+        try:
+            predictions.append(predict_news(text))
+        except Exception as e:
+            logger.error(f"Error al clasificar un texto del lote: {str(e)}")
+            predictions.append(None)
+    return predictions
@@ -0,0 +1,285 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, or_
+from database.db import db
+from database.models import TrabajoEnriquecimiento
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED)
+
+
+def _row_state(row):
+    return {
+        "id": row.id,
+        "news_id": row.noticia_id,
+        "status": row.estado,
+        "result": row.resultado,
+        "error": row.error
+    }
+
+
+class EnrichmentJobs:
+    """
+    Trabajos de enriquecimiento (keywords, noticias relacionadas) que se ejecutan
+    después de responder la clasificación.
+
+    El estado vive en memoria en el proceso que ejecuta el trabajo y se refleja en
+    la tabla `trabajos_enriquecimiento`, de modo que un cliente puede consultarlo
+    aunque la petición de seguimiento llegue a otro worker. Los trabajos terminados
+    se olvidan de la memoria tras `ENRICHMENT_JOB_TTL` segundos, y las filas tras
+    `retention` segundos (`purge`, como mucho una vez cada `purge_interval`).
+
+    El último trabajo de cada noticia (`latest_for_news`) permite responder las
+    consultas repetidas de una URL conocida con el resultado ya calculado.
+    """
+
+    def __init__(self, max_workers=4, ttl=600, retention=86400, purge_interval=3600):
+        self.max_workers = max(1, int(max_workers))
+        self.ttl = ttl
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+        self._jobs = {}  # id -> dict con el estado del trabajo
+        self._finished = OrderedDict()  # id -> instante de finalización, en orden
+        self._latest_by_news = {}  # noticia_id -> id de su último trabajo en memoria
+        self._condition = threading.Condition()
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Los hilos no sobreviven a un fork: cada worker crea su propio pool
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="enrichment")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    # Persistencia
+
+    def _persist_insert(self, job):
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(TrabajoEnriquecimiento.__table__.insert().values(
+                    id=job["id"],
+                    noticia_id=job["news_id"],
+                    estado=job["status"],
+                    resultado=job["result"],
+                    created_at=datetime.utcnow()
+                ))
+        except Exception as e:
+            logger.warning(f"No se pudo registrar el trabajo de enriquecimiento {job['id']}: {str(e)}")
+
+    def _persist_update(self, job):
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(TrabajoEnriquecimiento)
+                    .where(TrabajoEnriquecimiento.id == job["id"])
+                    .values(
+                        estado=job["status"],
+                        resultado=job["result"],
+                        error=job["error"],
+                        updated_at=datetime.utcnow()
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"No se pudo actualizar el trabajo de enriquecimiento {job['id']}: {str(e)}")
+
+    def _persisted(self, job_id):
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(TrabajoEnriquecimiento).where(TrabajoEnriquecimiento.id == job_id)
+                ).first()
+        except Exception as e:
+            logger.warning(f"No se pudo leer el trabajo de enriquecimiento {job_id}: {str(e)}")
+            return None
+        return _row_state(row) if row is not None else None
+
+    # Ciclo de vida
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._condition:
+            # Los terminados quedan al final en orden de finalización: basta recorrer desde el más antiguo
+            while self._finished:
+                job_id, finished_at = next(iter(self._finished.items()))
+                if now - finished_at < self.ttl:
+                    break
+                self._finished.popitem(last=False)
+                job = self._jobs.pop(job_id, None)
+                if job is not None and self._latest_by_news.get(job["news_id"]) == job_id:
+                    del self._latest_by_news[job["news_id"]]
+
+    def _set(self, job, **changes):
+        with self._condition:
+            job.update(changes)
+            if job["status"] in FINAL_STATUSES:
+                self._finished[job["id"]] = time.monotonic()
+            self._condition.notify_all()
+
+    def _run(self, app, job, fn, args):
+        self._set(job, status=STATUS_RUNNING)
+        with app.app_context():
+            try:
+                result = fn(*args)
+                self._set(job, status=STATUS_DONE, result=result)
+            except Exception as e:
+                logger.error(f"Error en el trabajo de enriquecimiento {job['id']}: {str(e)}")
+                self._set(job, status=STATUS_FAILED, error=str(e))
+            self._persist_update(job)
+
+    def submit(self, app, fn, *args, news_id=None):
+        """
+        Ejecuta `fn(*args)` en segundo plano dentro del contexto de `app` y devuelve
+        el id del trabajo. `fn` debe devolver un resultado serializable a JSON.
+        """
+        job = self._add(news_id, STATUS_PENDING)
+        self._get_executor().submit(self._run, app, job, fn, args)
+        return job["id"]
+
+    def record(self, news_id, result):
+        """
+        Recuerda en memoria (durante `ttl`) un enriquecimiento calculado en la propia
+        petición; no se guarda en la tabla, que así no crece con todo el tráfico síncrono.
+        """
+        return self._add(news_id, STATUS_DONE, result, persist=False)["id"]
+
+    def _add(self, news_id, status, result=None, persist=True):
+        self._expire()
+        self._maybe_purge()
+        job = {
+            "id": uuid.uuid4().hex,
+            "news_id": news_id,
+            "status": status,
+            "result": result,
+            "error": None
+        }
+        with self._condition:
+            self._jobs[job["id"]] = job
+            if news_id is not None:
+                self._latest_by_news[news_id] = job["id"]
+            if status in FINAL_STATUSES:
+                self._finished[job["id"]] = time.monotonic()
+        if persist:
+            self._persist_insert(job)
+        return job
+
+    def _maybe_purge(self):
+        if time.monotonic() - self._purged_at < self.purge_interval:
+            return
+        self._purged_at = time.monotonic()
+        self.purge()
+
+    def purge(self):
+        """
+        Borra las filas creadas hace más de `retention` segundos y marca como fallidos
+        los trabajos sin terminar de hace más de `ttl` (su worker murió).
+        """
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                deleted = conn.execute(
+                    delete(TrabajoEnriquecimiento)
+                    .where(TrabajoEnriquecimiento.created_at < now - timedelta(seconds=self.retention))
+                ).rowcount
+                abandoned = conn.execute(
+                    update(TrabajoEnriquecimiento)
+                    .where(
+                        TrabajoEnriquecimiento.estado.in_((STATUS_PENDING, STATUS_RUNNING)),
+                        TrabajoEnriquecimiento.created_at < now - timedelta(seconds=self.ttl)
+                    )
+                    .values(estado=STATUS_FAILED, error="Trabajo abandonado", updated_at=now)
+                ).rowcount
+        except Exception as e:
+            logger.warning(f"No se pudieron purgar los trabajos de enriquecimiento: {str(e)}")
+            return
+        logger.info(f"Trabajos de enriquecimiento purgados: {deleted} borrados, {abandoned} abandonados")
+
+    def latest_for_news(self, news_id, max_age):
+        """
+        Estado del último trabajo no fallido de la noticia creado hace menos de
+        `max_age` segundos (en memoria o, si lo ejecutó otro worker, en la tabla),
+        o None si no hay ninguno. Las filas sin terminar de hace más de `ttl` se
+        ignoran: su worker murió y el trabajo nunca terminará.
+        """
+        with self._condition:
+            job = self._jobs.get(self._latest_by_news.get(news_id))
+            if job is not None and job["status"] != STATUS_FAILED:
+                return {key: job[key] for key in ("id", "news_id", "status", "result", "error")}
+
+        now = datetime.utcnow()
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(TrabajoEnriquecimiento)
+                    .where(
+                        TrabajoEnriquecimiento.noticia_id == news_id,
+                        TrabajoEnriquecimiento.estado != STATUS_FAILED,
+                        TrabajoEnriquecimiento.created_at >= now - timedelta(seconds=max_age),
+                        or_(
+                            TrabajoEnriquecimiento.estado == STATUS_DONE,
+                            TrabajoEnriquecimiento.created_at >= now - timedelta(seconds=self.ttl)
+                        )
+                    )
+                    .order_by(TrabajoEnriquecimiento.created_at.desc())
+                    .limit(1)
+                ).first()
+        except Exception as e:
+            logger.warning(f"No se pudo leer el último enriquecimiento de la noticia {news_id}: {str(e)}")
+            return None
+        return _row_state(row) if row is not None else None
+
+    def get(self, job_id):
+        """Estado público del trabajo, o None si no existe."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return {key: job[key] for key in ("id", "news_id", "status", "result", "error")}
+        return self._persisted(job_id)
+
+    def wait(self, job_id, last_status=None, timeout=None):
+        """
+        Espera hasta que el estado del trabajo cambie respecto a `last_status` (o
+        termine) y devuelve el estado actual. Si el trabajo corre en otro proceso se
+        consulta la tabla periódicamente.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else Config.ENRICHMENT_POLL_INTERVAL)
+        while True:
+            with self._condition:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    while job["status"] == last_status and job["status"] not in FINAL_STATUSES:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+
+            state = self.get(job_id)
+            if state is None or state["status"] != last_status or state["status"] in FINAL_STATUSES:
+                return state
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return state
+            time.sleep(min(Config.ENRICHMENT_POLL_INTERVAL, remaining))
+
+
+enrichment_jobs = EnrichmentJobs(
+    max_workers=Config.ENRICHMENT_MAX_WORKERS,
+    ttl=Config.ENRICHMENT_JOB_TTL,
+    retention=Config.ENRICHMENT_ROW_RETENTION,
+    purge_interval=Config.ENRICHMENT_PURGE_INTERVAL
+)
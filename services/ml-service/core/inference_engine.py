@@ -0,0 +1,129 @@
+import threading
+import time
+import queue
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingEngine:
+    """
+    Motor de micro-batching en proceso.
+
+    Los llamadores encolan textos y reciben un `Future`; un hilo dedicado agrupa
+    las peticiones pendientes hasta `max_batch_size` elementos o hasta que pasen
+    `max_wait_ms` milisegundos desde la primera, ejecuta un único forward pass
+    con `run_batch` y resuelve cada futuro con su resultado.
+    """
+
+    def __init__(self, run_batch, max_batch_size=16, max_wait_ms=10):
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        # Estadísticas
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._last_batch_size = 0
+        self._max_batch_seen = 0
+        self._batch_size_counts = {}
+
+    def start(self):
+        """Arranca el hilo de trabajo si todavía no está en ejecución."""
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="inference-batcher")
+                self._worker.daemon = True
+                self._worker.start()
+                logger.info(
+                    f"Motor de batching iniciado (max_batch_size={self.max_batch_size}, "
+                    f"max_wait_ms={self.max_wait * 1000:.1f})"
+                )
+
+    def submit(self, text):
+        """Encola un texto y devuelve un `Future` con su predicción."""
+        if self._worker is None or not self._worker.is_alive():
+            self.start()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect_batch(self):
+        """Bloquea hasta tener al menos un elemento y agrupa los que lleguen a tiempo."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Recoger lo que ya esté en cola sin esperar más
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect_batch()
+
+            # Descartar peticiones canceladas por el llamador
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self._process(batch)
+
+    def _process(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            results = self._run_batch(texts)
+        except Exception as e:
+            logger.error(f"Error en el forward pass del batch ({len(batch)} elementos): {str(e)}")
+            with self._stats_lock:
+                self._errors += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+        with self._stats_lock:
+            size = len(batch)
+            self._batches += 1
+            self._items += size
+            self._last_batch_size = size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+
+    def queue_depth(self):
+        """Textos encolados a la espera de un batch."""
+        return self._queue.qsize()
+
+    def get_stats(self):
+        """Devuelve profundidad de cola y estadísticas de tamaño de batch."""
+        with self._stats_lock:
+            return {
+                "enabled": True,
+                "queue_depth": self.queue_depth(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_batch_seen,
+                "batch_size_counts": dict(sorted(self._batch_size_counts.items())),
+            }
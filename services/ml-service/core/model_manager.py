@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import logging
+from collections import namedtuple
+import torch
+from flask import current_app, has_app_context
+from config import Config
+from database.models import ModeloML
+from core.backends import build_backend
+from core.prediction_cache import prediction_cache
+from utils import metrics
+from utils.db_utils import get_active_model
+
+logger = logging.getLogger(__name__)
+
+# Modelo listo para servir: se reemplaza entero, nunca se modifica en sitio.
+# `backend_name` es el backend pedido (fila o Config); `backend.name` puede diferir si hubo que usar PyTorch.
+LoadedModel = namedtuple("LoadedModel", ["model_id", "version", "path", "backend", "tokenizer", "backend_name"])
+
+WARMUP_TEXTS = [
+    "Texto breve de calentamiento.",
+    "Texto de calentamiento más largo para inicializar el backend con una secuencia de varios tokens " * 8,
+]
+
+model_load_seconds = metrics.histogram(
+    "model_load_seconds", "Duración de la carga y calentamiento de un modelo",
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 40, 80)
+)
+model_swaps_total = metrics.counter("model_swaps_total", "Cambios de modelo activo realizados en caliente")
+model_swap_seconds = metrics.histogram(
+    "model_swap_seconds", "Duración del cambio de modelo en servicio (incluye vaciar su caché de predicciones en memoria)"
+)
+
+
+class ModelManager:
+    """
+    Mantiene el modelo activo y lo reemplaza sin tiempo de inactividad.
+
+    Un hilo en segundo plano consulta el modelo activo (id cacheado con TTL corto
+    en `get_active_model`), carga y calienta el nuevo modelo fuera del camino de
+    las peticiones y cambia la referencia de forma atómica. Cada petición toma
+    la referencia actual una sola vez, por lo que las peticiones en curso terminan
+    con el modelo anterior y las siguientes usan el nuevo.
+    """
+
+    def __init__(self, poll_interval=5):
+        self.poll_interval = poll_interval
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._current = None
+        self._load_lock = threading.Lock()
+        self._refresh_event = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """Devuelve el modelo actual, cargándolo de forma síncrona la primera vez."""
+        current = self._current
+        if current is None:
+            current = self.load_active()
+            # Procesos que no pasaron por `start` (p. ej. el hijo del reloader) también vigilan cambios
+            if self._thread is None and has_app_context():
+                self.start(current_app._get_current_object())
+        return current
+
+    @property
+    def current(self):
+        """Modelo en servicio, o None si todavía no se ha cargado ninguno."""
+        return self._current
+
+    def _resolve_active(self):
+        """Obtiene (id, versión, ruta, backend) del modelo que debería estar en servicio."""
+        active_id = get_active_model(max_age=0)
+        modelo_activo = ModeloML.query.get(active_id) if active_id else None
+
+        # Si no hay modelo activo, usar el modelo predeterminado
+        if not modelo_activo:
+            return None, None, Config.MODEL_PATH, Config.INFERENCE_BACKEND
+
+        # Construir la ruta al modelo; si no existe, usar el predeterminado
+        model_path = os.path.join('models', f"model_{modelo_activo.version}")
+        if not os.path.exists(model_path):
+            logger.warning(f"Ruta del modelo {model_path} no encontrada. Usando modelo predeterminado.")
+            model_path = Config.MODEL_PATH
+
+        return modelo_activo.id, modelo_activo.version, model_path, modelo_activo.backend or Config.INFERENCE_BACKEND
+
+    def warm_up(self, backend=None):
+        """Ejecuta forward passes de prueba: el primero de cada forma paga inicializaciones perezosas."""
+        backend = backend or self._current.backend
+        for text in WARMUP_TEXTS:
+            backend.logits(backend.tokenizer([text], return_tensors="pt", truncation=True, max_length=512))
+
+    def _build(self, model_id, version, model_path, backend_name, warmup=True):
+        """Carga y calienta un modelo sin tocar el que está en servicio."""
+        start = time.perf_counter()
+        logger.info(f"Cargando modelo desde: {model_path}")
+
+        backend = build_backend(model_path, backend_name, self.device)
+        if warmup:
+            self.warm_up(backend)
+
+        elapsed = time.perf_counter() - start
+        model_load_seconds.observe(elapsed)
+        logger.info(f"Modelo {model_id} ({backend.name}) cargado y calentado en {elapsed:.2f}s")
+        return LoadedModel(model_id, version, model_path, backend, backend.tokenizer, backend_name)
+
+    def _swap(self, loaded):
+        start = time.perf_counter()
+        previous = self._current
+        self._current = loaded
+        if previous is not None and previous.model_id != loaded.model_id:
+            model_swaps_total.inc()
+            logger.info(f"Modelo en servicio cambiado de {previous.model_id} a {loaded.model_id}")
+            if previous.model_id is not None:
+                # Solo la memoria: la tabla se limpia al desactivar el modelo (`activate_model`)
+                prediction_cache.forget_model(previous.model_id)
+            model_swap_seconds.observe(time.perf_counter() - start)
+
+    def load_active(self, force=False, warmup=True):
+        """
+        Carga el modelo activo de la base de datos si difiere del que está en servicio.
+        Con `warmup=False` no se ejecuta ningún forward pass (p. ej. en el proceso maestro
+        antes de hacer fork, para no inicializar los pools de hilos de torch).
+        """
+        with self._load_lock:
+            try:
+                model_id, version, model_path, backend_name = self._resolve_active()
+
+                # Cambiar el backend de la fila activa también provoca la recarga
+                current = self._current
+                if (current is not None and not force and current.model_id == model_id
+                        and current.backend_name == backend_name):
+                    return current
+
+                self._swap(self._build(model_id, version, model_path, backend_name, warmup))
+
+            except Exception as e:
+                logger.error(f"Error al cargar el modelo: {str(e)}")
+                if self._current is not None:
+                    # Seguir sirviendo con el modelo anterior
+                    return self._current
+                # En caso de error sin modelo previo, intentar cargar el modelo predeterminado
+                try:
+                    self._swap(self._build(None, None, Config.MODEL_PATH, Config.INFERENCE_BACKEND, warmup))
+                    logger.warning(f"Se ha cargado el modelo predeterminado debido a un error")
+                except Exception as inner_e:
+                    logger.error(f"Error crítico al cargar modelo predeterminado: {str(inner_e)}")
+                    raise
+
+            return self._current
+
+    def request_refresh(self):
+        """Pide al hilo en segundo plano que revise el modelo activo sin esperar al siguiente ciclo."""
+        self._refresh_event.set()
+
+    def _watch(self, app):
+        while True:
+            self._refresh_event.wait(self.poll_interval)
+            self._refresh_event.clear()
+            try:
+                with app.app_context():
+                    self.load_active()
+            except Exception as e:
+                logger.error(f"Error al revisar el modelo activo: {str(e)}")
+
+    def start(self, app):
+        """Inicia el hilo que detecta cambios de modelo activo y los aplica en caliente."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._watch, args=(app,), name="model-manager")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("Gestor de modelos iniciado en segundo plano")
+
+
+model_manager = ModelManager(poll_interval=Config.MODEL_POLL_INTERVAL)
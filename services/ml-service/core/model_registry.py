@@ -0,0 +1,107 @@
+import json
+import os
+import struct
+import logging
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+from transformers.modeling_utils import no_init_weights
+
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_FILE = "model.safetensors"
+PICKLE_FILE = "pytorch_model.bin"
+
+# Tipos de safetensors soportados por el cargador mmap
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def ensure_safetensors(model_path):
+    """
+    Garantiza que `model_path` tenga sus pesos en `model.safetensors`.
+    Los modelos antiguos guardados solo como `pytorch_model.bin` se convierten una vez.
+    """
+    safetensors_path = os.path.join(model_path, SAFETENSORS_FILE)
+    if os.path.exists(safetensors_path):
+        return safetensors_path
+
+    if not os.path.exists(os.path.join(model_path, PICKLE_FILE)):
+        return None
+
+    try:
+        logger.info(f"Convirtiendo {model_path}/{PICKLE_FILE} a {SAFETENSORS_FILE}")
+        model = AutoModelForSequenceClassification.from_pretrained(model_path, from_tf=False, use_safetensors=False)
+        model.save_pretrained(model_path, safe_serialization=True)
+        return safetensors_path
+    except Exception as e:
+        logger.warning(f"No se pudo convertir {model_path} a safetensors: {str(e)}")
+        return None
+
+
+def _mmap_state_dict(path):
+    """
+    Mapea un archivo safetensors en memoria (MAP_PRIVATE) y devuelve tensores que son
+    vistas sobre ese mapeo, sin copiar los pesos a memoria privada del proceso.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    flat = torch.empty(0, dtype=torch.uint8).set_(storage)
+
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        raw = flat[data_start + start:data_start + end]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if (data_start + start) % itemsize:
+            # Desalineado: no se puede reinterpretar sin copiar
+            raw = raw.clone()
+        state_dict[name] = raw.view(dtype).reshape(info["shape"])
+    return state_dict
+
+
+def load_sequence_classifier(model_path, mmap=True):
+    """
+    Carga un modelo de clasificación desde el registro.
+
+    Con `mmap=True` los pesos quedan respaldados por la page cache del archivo
+    safetensors: varios workers, o el modelo viejo y el nuevo durante un cambio en
+    caliente, comparten las mismas páginas en lugar de deserializar cada uno su copia.
+    """
+    safetensors_path = ensure_safetensors(model_path)
+
+    if safetensors_path and mmap:
+        try:
+            config = AutoConfig.from_pretrained(model_path)
+            with no_init_weights():
+                model = AutoModelForSequenceClassification.from_config(config)
+
+            state_dict = _mmap_state_dict(safetensors_path)
+            result = model.load_state_dict(state_dict, strict=False, assign=True)
+            if result.missing_keys:
+                raise ValueError(f"faltan pesos en el checkpoint: {result.missing_keys[:5]}")
+
+            model.eval()
+            return model
+        except Exception as e:
+            logger.warning(f"No se pudo cargar {model_path} con mmap ({str(e)}); usando from_pretrained")
+
+    return AutoModelForSequenceClassification.from_pretrained(
+        model_path, from_tf=False, use_safetensors=safetensors_path is not None
+    )
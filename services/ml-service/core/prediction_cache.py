@@ -0,0 +1,190 @@
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from database.db import db
+from database.models import PrediccionCache
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Caché de predicciones en dos niveles direccionada por contenido.
+
+    La clave es (modelo_id, hash del texto normalizado) y el valor es la tupla
+    (resultado, confianza, explicación). El primer nivel es un LRU en memoria y el
+    segundo la tabla `cache_predicciones`, que sobrevive a reinicios y se comparte
+    entre procesos. Las predicciones del modelo predeterminado (sin `modelo_id`)
+    solo se guardan en memoria.
+    """
+
+    def __init__(self, max_size=10000, persistent=True):
+        self.max_size = max(0, int(max_size))
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores de aciertos y fallos por nivel
+        self._memory_hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # Nivel en memoria
+
+    def _memory_get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    # Nivel persistente
+
+    def _persistent_get_many(self, model_id, hashes):
+        if not self.persistent or model_id is None or not hashes:
+            return {}
+        try:
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    select(
+                        PrediccionCache.texto_hash,
+                        PrediccionCache.resultado,
+                        PrediccionCache.confianza,
+                        PrediccionCache.explicacion
+                    ).where(
+                        PrediccionCache.modelo_id == model_id,
+                        PrediccionCache.texto_hash.in_(list(hashes))
+                    )
+                ).all()
+            return {
+                row.texto_hash: (row.resultado, float(row.confianza) if row.confianza is not None else 0, row.explicacion)
+                for row in rows
+            }
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché persistente de predicciones: {str(e)}")
+            return {}
+
+    def _persistent_put_many(self, model_id, entries):
+        if not self.persistent or model_id is None or not entries:
+            return
+        try:
+            now = datetime.utcnow()
+            values = [
+                {
+                    "modelo_id": model_id,
+                    "texto_hash": key,
+                    "resultado": resultado,
+                    "confianza": confianza,
+                    "explicacion": explicacion,
+                    "created_at": now
+                }
+                for key, (resultado, confianza, explicacion) in entries.items()
+            ]
+            stmt = insert(PrediccionCache).values(values).on_conflict_do_nothing(
+                index_elements=["modelo_id", "texto_hash"]
+            )
+            with db.engine.begin() as conn:
+                conn.execute(stmt)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir en la caché persistente de predicciones: {str(e)}")
+
+    # API pública
+
+    def get_many(self, model_id, hashes):
+        """Busca varios hashes; devuelve {hash: predicción} solo para los aciertos."""
+        found = {}
+        missing = []
+        for key in dict.fromkeys(hashes):
+            value = self._memory_get((model_id, key))
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        memory_hits = len(found)
+        persisted = self._persistent_get_many(model_id, missing)
+        for key, value in persisted.items():
+            self._memory_put((model_id, key), value)
+            found[key] = value
+
+        with self._lock:
+            self._memory_hits += memory_hits
+            self._persistent_hits += len(persisted)
+            self._misses += len(missing) - len(persisted)
+
+        return found
+
+    def get(self, model_id, key):
+        """Busca un único hash; devuelve la predicción o None."""
+        return self.get_many(model_id, [key]).get(key)
+
+    def put_many(self, model_id, entries):
+        """Guarda {hash: predicción} en ambos niveles."""
+        for key, value in entries.items():
+            self._memory_put((model_id, key), value)
+        self._persistent_put_many(model_id, entries)
+
+    def put(self, model_id, key, value):
+        self.put_many(model_id, {key: value})
+
+    def forget_model(self, model_id):
+        """
+        Libera las entradas en memoria de un modelo que este proceso deja de servir.
+        Las filas persistentes se conservan: otros workers pueden seguir sirviéndolo
+        hasta su siguiente sondeo, y las lecturas ya van filtradas por `modelo_id`.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == model_id]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def invalidate_model(self, model_id):
+        """Elimina todas las entradas de un modelo desactivado (en memoria y en la tabla)."""
+        stale = self.forget_model(model_id)
+
+        if self.persistent and model_id is not None:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(delete(PrediccionCache).where(PrediccionCache.modelo_id == model_id))
+            except Exception as e:
+                logger.warning(f"No se pudo invalidar la caché persistente del modelo {model_id}: {str(e)}")
+
+        logger.info(f"Caché de predicciones invalidada para el modelo {model_id} ({len(stale)} entradas en memoria)")
+
+    def get_stats(self):
+        """Contadores de aciertos/fallos para dimensionar la caché."""
+        with self._lock:
+            hits = self._memory_hits + self._persistent_hits
+            lookups = hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "persistent": self.persistent,
+                "memory_hits": self._memory_hits,
+                "persistent_hits": self._persistent_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0
+            }
+
+
+prediction_cache = PredictionCache(
+    max_size=Config.PREDICTION_CACHE_SIZE,
+    persistent=Config.PREDICTION_CACHE_PERSISTENT
+)
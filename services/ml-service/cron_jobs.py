@@ -2,26 +2,56 @@ import time
 import threading
 import schedule
 import logging
-from scrapers.google_news import GoogleNewsScraper
-from scrapers.twitter_scraper import TwitterScraper
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
+# Duración, resultado y noticias procesadas de cada trabajo programado
+job_seconds = metrics.histogram(
+    "scraper_job_seconds", "Duración de los trabajos de scraping programados", labelnames=("job",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800)
+)
+job_runs_total = metrics.counter(
+    "scraper_job_runs_total", "Ejecuciones de los trabajos de scraping", labelnames=("job", "status")
+)
+job_items_total = metrics.counter(
+    "scraper_job_items_total", "Noticias procesadas por los trabajos de scraping", labelnames=("job",)
+)
+job_last_success = metrics.gauge(
+    "scraper_job_last_success_timestamp_seconds", "Fin de la última ejecución correcta (epoch)", labelnames=("job",)
+)
+
+def _record_job(job, started_at, processed_ids=None, error=False):
+    job_seconds.labels(job=job).observe(time.perf_counter() - started_at)
+    job_runs_total.labels(job=job, status="error" if error else "ok").inc()
+    if not error:
+        job_items_total.labels(job=job).inc(len(processed_ids))
+        job_last_success.labels(job=job).set(time.time())
+
 def job_scrape_news(app):
     """Trabajo programado para scrapear noticias de Google News"""
+    started_at = time.perf_counter()
     with app.app_context():
         try:
+            # Import diferido: selenium y webdriver_manager solo se cargan al ejecutar el trabajo
+            from scrapers.google_news import GoogleNewsScraper
+            
             logger.info("Iniciando scraping programado de noticias desde Google News...")
             scraper = GoogleNewsScraper()
             processed_ids = scraper.scrape_news(limit=10)  # Usa el método que guarda en BD
             logger.info(f"Scraping programado de Google News completado. Se procesaron {len(processed_ids)} noticias.")
+            _record_job("google_news", started_at, processed_ids)
         except Exception as e:
             logger.error(f"Error en el scraping programado de Google News: {str(e)}")
+            _record_job("google_news", started_at, error=True)
 
 def job_scrape_tweets(app):
     """Trabajo programado para scrapear tweets"""
+    started_at = time.perf_counter()
     with app.app_context():
         try:
+            from scrapers.twitter_scraper import TwitterScraper
+            
             logger.info("Iniciando scraping programado de tweets...")
             scraper = TwitterScraper()
             query = "noticias salud mexico enfermedad hospital -toro"
@@ -32,8 +62,10 @@ def job_scrape_tweets(app):
                 min_length=50
             )
             logger.info(f"Scraping programado de Twitter completado. Se procesaron {len(processed_ids)} tweets.")
+            _record_job("twitter", started_at, processed_ids)
         except Exception as e:
             logger.error(f"Error en el scraping programado de Twitter: {str(e)}")
+            _record_job("twitter", started_at, error=True)
 
 def run_scheduler(app):
     """Ejecuta el scheduler en un hilo separado"""
@@ -1,15 +1,252 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.pool import QueuePool
+from collections import Counter
 from config import Config
+from utils import metrics
+import heapq
+import re
+import threading
+import time
+import logging
 
 db = SQLAlchemy()
 
+logger = logging.getLogger(__name__)
+
+# Instrumentación de consultas: sentencias, COMMIT y tiempo en BD por petición
+queries_per_request = metrics.histogram(
+    "db_queries_per_request", "Sentencias SQL ejecutadas por petición", labelnames=("endpoint",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+db_seconds_per_request = metrics.histogram(
+    "db_seconds_per_request", "Tiempo total en la BD por petición", labelnames=("endpoint",)
+)
+slow_queries_total = metrics.counter("db_slow_queries_total", "Sentencias más lentas que SQL_SLOW_QUERY_MS")
+repeated_queries_total = metrics.counter(
+    "db_repeated_query_warnings_total", "Sentencias repetidas más de SQL_REPEATED_QUERY_THRESHOLD veces en una petición (posible N+1)",
+    labelnames=("endpoint",)
+)
+
+# Estado del pool de conexiones del engine de `init_db`, calculado al leer las métricas
+pool_connections = metrics.gauge(
+    "db_pool_connections", "Conexiones del pool por estado", labelnames=("state",)
+)
+
+_whitespace_re = re.compile(r"\s+")
+
+# Sentencias lentas de todo el proceso: plantilla -> [veces, ms máximo, ms totales]
+_slow_statements = {}
+_slow_statements_lock = threading.Lock()
+_MAX_SLOW_STATEMENTS = 50
+
+
+class QueryStats:
+    """Sentencias, COMMIT y tiempo en BD registrados dentro de un bloque `track_queries`."""
+
+    def __init__(self, slowest_size=5):
+        self.statements = 0
+        self.commits = 0
+        self.duration = 0.0
+        self.templates = Counter()
+        self.slowest = []  # heap de (segundos, sentencia) con las `slowest_size` más lentas
+        self._slowest_size = slowest_size
+
+    def _record(self, statement, duration):
+        self.duration += duration
+        if len(self.slowest) < self._slowest_size:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    def repeated(self, threshold):
+        """Plantillas ejecutadas más de `threshold` veces, de más a menos repetida."""
+        return [(template, count) for template, count in self.templates.most_common() if count > threshold]
+
+    def slowest_statements(self):
+        return sorted(self.slowest, reverse=True)
+
+    @property
+    def total(self):
+        return self.statements + self.commits
+
+
+class _Scopes(threading.local):
+    def __init__(self):
+        self.stack = []
+
+_scopes = _Scopes()
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+
+def _template(statement):
+    # SQLAlchemy ya envía las sentencias con parámetros: el texto normalizado es la plantilla
+    return _whitespace_re.sub(" ", statement).strip()
+
+
+def _remember_slow_statement(template, duration_ms):
+    with _slow_statements_lock:
+        entry = _slow_statements.get(template)
+        if entry is None:
+            if len(_slow_statements) >= _MAX_SLOW_STATEMENTS:
+                # Se descarta la plantilla con menor máximo para dejar sitio
+                del _slow_statements[min(_slow_statements, key=lambda key: _slow_statements[key][1])]
+            entry = _slow_statements[template] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] = max(entry[1], duration_ms)
+        entry[2] += duration_ms
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Todas las sentencias se cronometran (registro de lentas); solo se cuentan dentro de un bloque
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+    stack = _scopes.stack
+    if not stack:
+        return
+    template = _template(statement)
+    for stats in stack:
+        stats.statements += 1
+        stats.templates[template] += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    duration = time.perf_counter() - started_at
+    for stats in _scopes.stack:
+        stats._record(statement, duration)
+
+    duration_ms = duration * 1000
+    if duration_ms >= Config.SQL_SLOW_QUERY_MS:
+        template = _template(statement)
+        slow_queries_total.inc()
+        _remember_slow_statement(template, duration_ms)
+        logger.warning(f"Sentencia lenta ({duration_ms:.0f} ms): {template[:500]}")
+
+
+def _on_commit(conn):
+    for stats in _scopes.stack:
+        stats.commits += 1
+
+
+def install_query_listeners(engine=None):
+    """Registra (una vez) los eventos del engine que alimentan `track_queries`."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        engine = engine or db.engine
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "commit", _on_commit)
+        _listeners_installed = True
+
+
+class track_queries:
+    """
+    Registra las sentencias SQL, los COMMIT y el tiempo en BD del hilo actual
+    dentro del bloque. Los bloques anidados también cuentan en los exteriores.
+
+        with track_queries() as stats:
+            ...
+        stats.total, stats.duration, stats.slowest_statements()
+    """
+
+    def __init__(self, slowest_size=None):
+        self.stats = QueryStats(slowest_size or Config.SQL_SLOWEST_PER_REQUEST)
+
+    def __enter__(self):
+        install_query_listeners()
+        _scopes.stack.append(self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc, tb):
+        _scopes.stack.remove(self.stats)
+        return False
+
+
+def report_request_queries(stats, endpoint):
+    """Exporta las cifras de una petición y avisa de sentencias repetidas (posible N+1)."""
+    queries_per_request.labels(endpoint=endpoint).observe(stats.statements)
+    db_seconds_per_request.labels(endpoint=endpoint).observe(stats.duration)
+
+    for template, count in stats.repeated(Config.SQL_REPEATED_QUERY_THRESHOLD):
+        repeated_queries_total.labels(endpoint=endpoint).inc()
+        logger.warning(f"Posible N+1 en {endpoint}: la misma sentencia se ejecutó {count} veces: {template[:300]}")
+
+    if logger.isEnabledFor(logging.DEBUG) and stats.statements:
+        slowest = "; ".join(
+            f"{duration * 1000:.1f} ms {_template(statement)[:120]}" for duration, statement in stats.slowest_statements()
+        )
+        logger.debug(
+            f"{endpoint}: {stats.statements} sentencias, {stats.commits} COMMIT, "
+            f"{stats.duration * 1000:.1f} ms en BD. Más lentas: {slowest}"
+        )
+
+
+def get_query_stats():
+    """Sentencias lentas registradas por este proceso, de mayor a menor tiempo máximo."""
+    with _slow_statements_lock:
+        entries = [(template, list(entry)) for template, entry in _slow_statements.items()]
+    entries.sort(key=lambda item: item[1][1], reverse=True)
+    return {
+        "slow_query_ms": Config.SQL_SLOW_QUERY_MS,
+        "slow_statements": [
+            {"statement": template, "count": count, "max_ms": round(max_ms, 1), "avg_ms": round(total_ms / count, 1)}
+            for template, (count, max_ms, total_ms) in entries
+        ]
+    }
+
+
+def current_query_stats():
+    """`QueryStats` de la petición en curso, o None fuera de una petición."""
+    from flask import g, has_request_context
+
+    if not has_request_context():
+        return None
+    scope = g.get("_query_scope")
+    return scope.stats if scope is not None else None
+
+
+def _instrument_requests(app):
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_queries():
+        scope = track_queries()
+        scope.__enter__()
+        g._query_scope = scope
+
+    @app.teardown_request
+    def _finish_request_queries(exc):
+        scope = g.pop("_query_scope", None)
+        if scope is None:
+            return
+        scope.__exit__(None, None, None)
+        report_request_queries(scope.stats, request.endpoint or "unknown")
+
+
+def _register_pool_metrics(engine):
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    pool_connections.labels(state="checked_out").set_function(pool.checkedout)
+    pool_connections.labels(state="checked_in").set_function(pool.checkedin)
+    # Negativo mientras el pool no ha abierto aún todas sus `pool_size` conexiones
+    pool_connections.labels(state="overflow").set_function(pool.overflow)
+    pool_connections.labels(state="size").set_function(pool.size)
+
+
 def init_db(app):
     """Inicializa la base de datos con SQLAlchemy."""
     app.config["SQLALCHEMY_DATABASE_URI"] = Config.SQLALCHEMY_DATABASE_URI
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = Config.SQLALCHEMY_TRACK_MODIFICATIONS
-    
+
     # Configuración adicional para el pool de conexiones
     app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
         "pool_pre_ping": True,  # Verifica que la conexión esté viva antes de usarla
@@ -18,5 +255,11 @@ def init_db(app):
         "pool_size": 10,        # Tamaño inicial del pool
         "max_overflow": 20      # Conexiones adicionales permitidas
     }
-    
-    db.init_app(app)
\ No newline at end of file
+
+    db.init_app(app)
+
+    # Consultas por petición, tiempo en BD, sentencias lentas y repetidas
+    with app.app_context():
+        install_query_listeners(db.engine)
+        _register_pool_metrics(db.engine)
+    _instrument_requests(app)
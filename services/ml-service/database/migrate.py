@@ -0,0 +1,162 @@
+"""
+Migraciones versionadas del esquema.
+
+`db.sql` crea el esquema completo en una instalación nueva; los cambios
+posteriores viven en `database/migrations/NNNN_descripcion.sql` y llevan una
+base existente al mismo estado. Se aplican en orden, una sola vez, y quedan
+registradas en la tabla `schema_migrations`; deben ser idempotentes
+(IF NOT EXISTS), porque en una base creada con un `db.sql` reciente no cambian
+nada.
+
+Cada migración corre en su propia transacción, salvo las que empiezan con la
+línea `-- migrate: no-transaction` (necesario para CREATE INDEX CONCURRENTLY),
+cuyas sentencias se ejecutan una a una en autocommit. Un advisory lock impide
+que dos procesos migren a la vez.
+
+Uso (desde services/ml-service):
+    python -m database.migrate            # aplica las pendientes
+    python -m database.migrate status     # lista aplicadas y pendientes
+"""
+import argparse
+import hashlib
+import os
+import re
+import logging
+from collections import namedtuple
+from sqlalchemy import create_engine, text
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+ADVISORY_LOCK_KEY = 48151623  # Constante arbitraria compartida por todos los procesos que migran
+
+_filename_re = re.compile(r"^(\d{4})_(\w+)\.sql$")
+# Fin de sentencia: `;` al final de una línea (solo para migraciones sin transacción)
+_statement_end_re = re.compile(r";[ \t]*(?:\n|$)")
+
+Migration = namedtuple("Migration", ["version", "name", "sql", "checksum", "transactional"])
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Migraciones del directorio ordenadas por versión."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _filename_re.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append(Migration(
+            version=match.group(1),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            transactional=not sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+        ))
+    return migrations
+
+
+def _statements(sql):
+    """Divide una migración sin transacción en sentencias, ignorando las que solo son comentarios."""
+    statements = []
+    for chunk in _statement_end_re.split(sql):
+        code = "\n".join(line for line in chunk.splitlines() if not line.strip().startswith("--")).strip()
+        if code:
+            statements.append(code)
+    return statements
+
+
+def _ensure_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(4) PRIMARY KEY,"
+        " nombre VARCHAR NOT NULL,"
+        " checksum VARCHAR(64) NOT NULL,"
+        " applied_at TIMESTAMP DEFAULT now())"
+    ))
+
+
+def _applied(conn):
+    rows = conn.execute(text("SELECT version, checksum FROM schema_migrations")).all()
+    return {version: checksum for version, checksum in rows}
+
+
+def _record(conn, migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, nombre, checksum) VALUES (:version, :nombre, :checksum)"),
+        {"version": migration.version, "nombre": migration.name, "checksum": migration.checksum}
+    )
+
+
+def _apply(engine, migration):
+    if migration.transactional:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(migration.sql)
+            _record(conn, migration)
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in _statements(migration.sql):
+            conn.exec_driver_sql(statement)
+        _record(conn, migration)
+
+
+def get_engine():
+    return create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+
+def upgrade(engine=None, directory=MIGRATIONS_DIR):
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas."""
+    engine = engine or get_engine()
+    applied_now = []
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            with engine.begin() as conn:
+                _ensure_table(conn)
+                applied = _applied(conn)
+
+            for migration in discover(directory):
+                if migration.version in applied:
+                    if applied[migration.version] != migration.checksum:
+                        logger.warning(
+                            f"La migración {migration.version}_{migration.name} cambió después de aplicarse"
+                        )
+                    continue
+                logger.info(f"Aplicando migración {migration.version}_{migration.name}")
+                _apply(engine, migration)
+                applied_now.append(migration.version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+    return applied_now
+
+
+def status(engine=None, directory=MIGRATIONS_DIR):
+    """Lista de (migración, aplicada) en orden de versión."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        applied = _applied(conn)
+    return [(migration, migration.version in applied) for migration in discover(directory)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de la base de datos")
+    parser.add_argument("command", nargs="?", choices=("upgrade", "status"), default="upgrade")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "status":
+        for migration, applied in status():
+            print(f"{migration.version}  {'aplicada ' if applied else 'pendiente'}  {migration.name}")
+    else:
+        versions = upgrade()
+        print(f"Migraciones aplicadas: {', '.join(versions)}" if versions else "El esquema está al día")
+
+
+if __name__ == "__main__":
+    main()
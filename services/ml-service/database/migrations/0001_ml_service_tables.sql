@@ -0,0 +1,28 @@
+-- Tablas y columnas que el ml-service añadió al esquema inicial de db.sql
+ALTER TABLE modelos_ml ADD COLUMN IF NOT EXISTS backend VARCHAR;
+
+CREATE TABLE IF NOT EXISTS cache_predicciones (
+  id SERIAL PRIMARY KEY,
+  modelo_id INT NOT NULL REFERENCES modelos_ml(id) ON DELETE CASCADE,
+  texto_hash VARCHAR(64) NOT NULL,
+  resultado resultado_enum NOT NULL,
+  confianza DECIMAL(5,2),
+  explicacion TEXT,
+  created_at TIMESTAMP DEFAULT now(),
+  UNIQUE (modelo_id, texto_hash)
+);
+
+CREATE TABLE IF NOT EXISTS trabajos_enriquecimiento (
+  id VARCHAR(32) PRIMARY KEY,
+  noticia_id INT REFERENCES noticias(id) ON DELETE CASCADE,
+  estado VARCHAR(16) NOT NULL DEFAULT 'pending',
+  resultado JSON,
+  error TEXT,
+  created_at TIMESTAMP DEFAULT now(),
+  updated_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS frecuencia_terminos (
+  termino VARCHAR(100) PRIMARY KEY,
+  documentos INT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,19 @@
+-- El upsert de keywords (ON CONFLICT (noticia_id, keyword_id)) necesita la restricción única.
+-- Antes se eliminan los enlaces duplicados, conservando el de menor id.
+DELETE FROM noticias_keywords a
+USING noticias_keywords b
+WHERE a.noticia_id = b.noticia_id
+  AND a.keyword_id = b.keyword_id
+  AND a.id > b.id;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conrelid = 'noticias_keywords'::regclass
+      AND conname = 'noticias_keywords_noticia_id_keyword_id_key'
+  ) THEN
+    ALTER TABLE noticias_keywords
+      ADD CONSTRAINT noticias_keywords_noticia_id_keyword_id_key UNIQUE (noticia_id, keyword_id);
+  END IF;
+END $$;
@@ -0,0 +1,29 @@
+-- migrate: no-transaction
+-- Índices para las consultas calientes (ver `python -m database.plan_check`).
+-- CONCURRENTLY no bloquea las escrituras mientras se construye el índice, pero no puede
+-- ir dentro de una transacción. Si una sentencia falla queda un índice INVALID: hay que
+-- borrarlo (DROP INDEX CONCURRENTLY) antes de volver a ejecutar la migración.
+
+-- Búsqueda de noticias por URL (find_existing_news_by_url, get_stored_news, NewsIngestion)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_url ON noticias (url);
+
+-- Rangos de fechas de analytics_routes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_created_at ON noticias (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_fecha_publicacion ON noticias (fecha_publicacion)
+  WHERE fecha_publicacion IS NOT NULL;
+
+-- Claves foráneas usadas en joins y agrupaciones
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_tema_id ON noticias (tema_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_fuente_id ON noticias (fuente_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_historial_consultas_usuario ON historial_consultas (usuario_id, fecha_consulta);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_trabajos_enriquecimiento_noticia ON trabajos_enriquecimiento (noticia_id);
+
+-- Noticias de una keyword (la restricción única ya cubre noticia_id -> keyword_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_noticias_keywords_keyword ON noticias_keywords (keyword_id, noticia_id);
+
+-- Clasificación de una noticia por modelo, y la más reciente de una noticia
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clasificacion_noticia_modelo ON clasificacion_noticias (noticia_id, modelo_id);
+
+-- Noticias falsas (red de fake news, dashboard): índice parcial, mucho menor que uno sobre resultado
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clasificacion_falsas ON clasificacion_noticias (noticia_id)
+  WHERE resultado = 'falsa';
@@ -0,0 +1,80 @@
+-- La ingesta (NewsIngestion, ON CONFLICT (url)) necesita que la URL de una noticia sea única.
+-- Las noticias duplicadas se fusionan en la de menor id: sus filas dependientes pasan a
+-- ella y después se borran. El bloqueo evita que entren duplicados nuevos entre la
+-- limpieza y la restricción (las lecturas siguen funcionando). Los contadores de las
+-- fuentes afectadas se recalculan a partir de las clasificaciones que quedan.
+LOCK TABLE noticias IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TEMPORARY TABLE noticias_duplicadas ON COMMIT DROP AS
+SELECT n.id, d.conservada
+FROM noticias n
+JOIN (
+  SELECT url, min(id) AS conservada FROM noticias WHERE url IS NOT NULL GROUP BY url HAVING count(*) > 1
+) d ON d.url = n.url
+WHERE n.id <> d.conservada;
+
+-- Fuentes de las noticias fusionadas (conservadas y duplicadas), antes de borrar nada
+CREATE TEMPORARY TABLE fuentes_afectadas ON COMMIT DROP AS
+SELECT DISTINCT n.fuente_id AS id
+FROM noticias n
+WHERE n.fuente_id IS NOT NULL
+  AND (n.id IN (SELECT id FROM noticias_duplicadas) OR n.id IN (SELECT conservada FROM noticias_duplicadas));
+
+UPDATE clasificacion_noticias t SET noticia_id = d.conservada FROM noticias_duplicadas d WHERE t.noticia_id = d.id;
+UPDATE trabajos_enriquecimiento t SET noticia_id = d.conservada FROM noticias_duplicadas d WHERE t.noticia_id = d.id;
+UPDATE historial_consultas t SET noticia_id = d.conservada FROM noticias_duplicadas d WHERE t.noticia_id = d.id;
+UPDATE interacciones_noticia t SET noticia_id = d.conservada FROM noticias_duplicadas d WHERE t.noticia_id = d.id;
+UPDATE notificaciones t SET noticia_id = d.conservada FROM noticias_duplicadas d WHERE t.noticia_id = d.id;
+
+-- Las keywords se enlazan a la noticia conservada; los enlaces de las duplicadas caen en cascada
+INSERT INTO noticias_keywords (noticia_id, keyword_id)
+SELECT DISTINCT d.conservada, nk.keyword_id
+FROM noticias_keywords nk JOIN noticias_duplicadas d ON d.id = nk.noticia_id
+ON CONFLICT (noticia_id, keyword_id) DO NOTHING;
+
+DELETE FROM noticias n USING noticias_duplicadas d WHERE n.id = d.id;
+
+-- Una clasificación por noticia y modelo, como la mantiene la ingesta: se queda la más reciente
+DELETE FROM clasificacion_noticias c
+USING (
+  SELECT id, row_number() OVER (
+    PARTITION BY noticia_id, modelo_id ORDER BY fecha_clasificacion DESC NULLS LAST, id DESC
+  ) AS orden
+  FROM clasificacion_noticias
+  WHERE noticia_id IN (SELECT DISTINCT conservada FROM noticias_duplicadas)
+) r
+WHERE c.id = r.id AND r.orden > 1;
+
+-- Mismo cálculo que `_source_counters_update`, sobre las clasificaciones que quedan
+UPDATE fuentes f
+SET noticias_verdaderas = c.verdaderas,
+    noticias_falsas = c.falsas,
+    confiabilidad = CASE
+      WHEN c.verdaderas + c.falsas > 0 THEN c.verdaderas::numeric / (c.verdaderas + c.falsas)
+      ELSE f.confiabilidad
+    END,
+    updated_at = now()
+FROM (
+  SELECT a.id,
+         count(cn.id) FILTER (WHERE cn.resultado = 'verdadera') AS verdaderas,
+         count(cn.id) FILTER (WHERE cn.resultado = 'falsa') AS falsas
+  FROM fuentes_afectadas a
+  LEFT JOIN noticias n ON n.fuente_id = a.id
+  LEFT JOIN clasificacion_noticias cn ON cn.noticia_id = n.id
+  GROUP BY a.id
+) c
+WHERE f.id = c.id;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conrelid = 'noticias'::regclass
+      AND conname = 'noticias_url_key'
+  ) THEN
+    ALTER TABLE noticias ADD CONSTRAINT noticias_url_key UNIQUE (url);
+  END IF;
+END $$;
+
+-- El índice único de la restricción sustituye al índice simple de 0003
+DROP INDEX IF EXISTS idx_noticias_url;
@@ -25,7 +25,7 @@ class Noticia(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String, nullable=False)
     contenido = db.Column(db.Text, nullable=False)
-    url = db.Column(db.String)
+    url = db.Column(db.String, unique=True)
     fecha_publicacion = db.Column(db.DateTime)
     fuente_id = db.Column(db.Integer, db.ForeignKey('fuentes.id', ondelete='SET NULL'))
     tema_id = db.Column(db.Integer, db.ForeignKey('temas.id', ondelete='SET NULL'))
@@ -53,6 +53,7 @@ class ModeloML(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime)
     modelo_base = db.Column(db.Integer, db.ForeignKey('modelos_ml.id', ondelete='CASCADE')) 
+    backend = db.Column(db.String)  # Backend de inferencia: pytorch, onnx o quantized (NULL = Config)
 
     # Relaciones
     clasificaciones = db.relationship('ClasificacionNoticia', backref='modelo', lazy=True)
@@ -70,6 +71,33 @@ class ClasificacionNoticia(db.Model):
     fecha_clasificacion = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class PrediccionCache(db.Model):
+    __tablename__ = 'cache_predicciones'
+    __table_args__ = (
+        db.UniqueConstraint('modelo_id', 'texto_hash'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    modelo_id = db.Column(db.Integer, db.ForeignKey('modelos_ml.id', ondelete='CASCADE'), nullable=False)
+    texto_hash = db.Column(db.String(64), nullable=False)
+    resultado = db.Column(db.Enum('verdadera', 'falsa', 'dudosa', name='resultado_enum'), nullable=False)
+    confianza = db.Column(db.Numeric(5, 2))
+    explicacion = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TrabajoEnriquecimiento(db.Model):
+    __tablename__ = 'trabajos_enriquecimiento'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    noticia_id = db.Column(db.Integer, db.ForeignKey('noticias.id', ondelete='CASCADE'))
+    estado = db.Column(db.String(16), nullable=False, default='pending')
+    resultado = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime)
+
+
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
     
@@ -115,8 +143,18 @@ class Keyword(db.Model):
     palabra = db.Column(db.String, unique=True, nullable=False)
     relevancia = db.Column(db.Numeric(5, 2), default=1.0)
 
+class FrecuenciaTermino(db.Model):
+    __tablename__ = 'frecuencia_terminos'
+    
+    # Número de noticias en que aparece cada lema; la fila '__total__' guarda el total de noticias
+    termino = db.Column(db.String(100), primary_key=True)
+    documentos = db.Column(db.Integer, nullable=False, default=0)
+
 class NoticiaKeyword(db.Model):
     __tablename__ = 'noticias_keywords'
+    __table_args__ = (
+        db.UniqueConstraint('noticia_id', 'keyword_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     noticia_id = db.Column(db.Integer, db.ForeignKey('noticias.id', ondelete='CASCADE'))
@@ -0,0 +1,226 @@
+"""
+Comprueba con EXPLAIN que las consultas calientes usan índices.
+
+Crea un esquema temporal con `db.sql`, lo llena con un conjunto sintético grande
+(generado en el servidor con generate_series), aplica las migraciones, ejecuta
+ANALYZE y revisa el plan de cada consulta: debe usar alguno de los índices
+esperados y no hacer Seq Scan sobre las tablas grandes que consulta. Sale con
+código 1 si alguna consulta falla, para poder usarlo en CI.
+
+No toca las tablas del esquema público; el esquema temporal se borra al terminar.
+
+Uso (desde services/ml-service):
+    python -m database.plan_check --news 200000
+    python -m database.plan_check --keep      # conserva el esquema para inspeccionarlo
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, func, text
+from config import Config
+from database.models import Noticia, ClasificacionNoticia, Keyword, NoticiaKeyword
+from database.migrate import upgrade
+
+SCHEMA_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "db.sql")
+
+# `indexes`: grupos de índices; el plan debe usar al menos uno de cada grupo.
+# `no_seq_scan`: tablas grandes que no se pueden recorrer completas.
+Check = namedtuple("Check", ["name", "statement", "indexes", "no_seq_scan"])
+
+SEEDED_TABLES = ("temas", "fuentes", "modelos_ml", "noticias", "keywords", "noticias_keywords", "clasificacion_noticias")
+
+SEED_SQL = """
+INSERT INTO temas (nombre, palabras_clave)
+SELECT 'tema ' || i, 'salud, vacuna' FROM generate_series(1, 20) i;
+
+INSERT INTO fuentes (nombre, url)
+SELECT 'fuente ' || i, 'https://fuente' || i || '.invalid' FROM generate_series(1, :sources) i;
+
+INSERT INTO modelos_ml (nombre, version, activo) VALUES ('seed', '1', true), ('seed', '2', false);
+
+INSERT INTO noticias (titulo, contenido, url, fecha_publicacion, fuente_id, tema_id, created_at)
+SELECT
+  'Noticia ' || i,
+  'Contenido sintético de la noticia ' || i,
+  'https://seed.invalid/noticias/' || i,
+  CASE WHEN i % 5 = 0 THEN NULL ELSE now() - (i % 365) * interval '1 day' - (i % 24) * interval '1 hour' END,
+  1 + i % :sources,
+  1 + i % 20,
+  now() - (i % 365) * interval '1 day' - (i % 1440) * interval '1 minute'
+FROM generate_series(1, :news) i;
+
+INSERT INTO keywords (palabra, relevancia)
+SELECT 'kw' || i, 1 FROM generate_series(1, :keywords) i;
+
+INSERT INTO noticias_keywords (noticia_id, keyword_id)
+SELECT n, 1 + (n * 7919 + k * 104729) % :keywords
+FROM generate_series(1, :news) n, generate_series(1, 5) k
+ON CONFLICT DO NOTHING;
+
+INSERT INTO clasificacion_noticias (noticia_id, modelo_id, resultado, confianza, fecha_clasificacion)
+SELECT
+  i,
+  1 + i % 2,
+  CAST(CASE WHEN i % 10 < 3 THEN 'falsa' ELSE 'verdadera' END AS resultado_enum),
+  80,
+  now() - (i % 365) * interval '1 day'
+FROM generate_series(1, :news) i;
+"""
+
+
+def build_checks(news):
+    now = datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    news_id = news // 2
+
+    return [
+        Check(
+            "noticia por url",
+            select(Noticia.id).where(Noticia.url == f"https://seed.invalid/noticias/{news_id}")
+            .order_by(Noticia.id).limit(1),
+            [{"noticias_url_key"}],
+            {"noticias"}
+        ),
+        Check(
+            "noticias del día (created_at)",
+            select(func.count(Noticia.id)).where(Noticia.created_at >= today_start, Noticia.created_at <= today_end),
+            [{"idx_noticias_created_at"}],
+            {"noticias"}
+        ),
+        Check(
+            "top keywords por fecha_publicacion",
+            select(Keyword.palabra, func.count(NoticiaKeyword.keyword_id).label("count"))
+            .join(NoticiaKeyword, NoticiaKeyword.keyword_id == Keyword.id)
+            .join(Noticia, Noticia.id == NoticiaKeyword.noticia_id)
+            .where(Noticia.fecha_publicacion >= now - timedelta(days=7), Noticia.fecha_publicacion.isnot(None))
+            .group_by(Keyword.palabra)
+            .order_by(func.count(NoticiaKeyword.keyword_id).desc())
+            .limit(10),
+            [{"idx_noticias_fecha_publicacion"}],
+            {"noticias"}
+        ),
+        Check(
+            "noticias de una keyword",
+            select(NoticiaKeyword.noticia_id)
+            .join(Keyword, Keyword.id == NoticiaKeyword.keyword_id)
+            .where(Keyword.palabra == "kw42"),
+            [{"idx_noticias_keywords_keyword"}],
+            {"noticias_keywords"}
+        ),
+        Check(
+            "clasificación por noticia y modelo",
+            select(ClasificacionNoticia.id).where(
+                ClasificacionNoticia.noticia_id == news_id, ClasificacionNoticia.modelo_id == 1
+            ),
+            [{"idx_clasificacion_noticia_modelo"}],
+            {"clasificacion_noticias"}
+        ),
+        Check(
+            "última clasificación de una noticia",
+            select(ClasificacionNoticia.resultado).where(ClasificacionNoticia.noticia_id == news_id)
+            .order_by(ClasificacionNoticia.fecha_clasificacion.desc(), ClasificacionNoticia.id.desc())
+            .limit(1),
+            [{"idx_clasificacion_noticia_modelo"}],
+            {"clasificacion_noticias"}
+        ),
+        Check(
+            "noticias falsas del día",
+            select(func.count(ClasificacionNoticia.id))
+            .join(Noticia, Noticia.id == ClasificacionNoticia.noticia_id)
+            .where(
+                Noticia.created_at >= today_start,
+                Noticia.created_at <= today_end,
+                ClasificacionNoticia.resultado == "falsa"
+            ),
+            [{"idx_noticias_created_at"}, {"idx_clasificacion_falsas", "idx_clasificacion_noticia_modelo"}],
+            {"noticias", "clasificacion_noticias"}
+        ),
+    ]
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(conn, statement):
+    """Nodos del plan de `statement` (EXPLAIN en formato JSON)."""
+    compiled = statement.compile(dialect=conn.dialect)
+    raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+
+def evaluate(check, nodes):
+    """Lista de problemas del plan (vacía si la consulta usa los índices esperados)."""
+    used = {node["Index Name"] for node in nodes if "Index Name" in node}
+    problems = [
+        f"sin índice de {sorted(group)}" for group in check.indexes if not used & group
+    ]
+    problems += [
+        f"Seq Scan sobre {node['Relation Name']}"
+        for node in nodes
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in check.no_seq_scan
+    ]
+    return used, problems
+
+
+def seed(engine, news, sources, keywords):
+    with open(SCHEMA_SQL, encoding="utf-8") as f:
+        schema_sql = f.read()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(schema_sql)
+        conn.execute(text(SEED_SQL), {"news": news, "sources": sources, "keywords": keywords})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica con EXPLAIN que las consultas calientes usan índices")
+    parser.add_argument("--news", type=int, default=100000, help="Noticias sintéticas")
+    parser.add_argument("--sources", type=int, default=500)
+    parser.add_argument("--keywords", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="No borrar el esquema temporal")
+    args = parser.parse_args()
+
+    schema = f"plan_check_{uuid.uuid4().hex[:8]}"
+    base_engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+    with base_engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+
+    # Todas las conexiones trabajan dentro del esquema temporal
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI, connect_args={"options": f"-c search_path={schema}"})
+    failures = 0
+    try:
+        print(f"Esquema {schema}: {args.news} noticias sintéticas")
+        seed(engine, args.news, args.sources, args.keywords)
+        upgrade(engine)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(f"ANALYZE {', '.join(SEEDED_TABLES)}")
+
+        with engine.connect() as conn:
+            for check in build_checks(args.news):
+                used, problems = evaluate(check, explain(conn, check.statement))
+                failures += bool(problems)
+                status = "OK   " if not problems else "FALLA"
+                print(f"{status} {check.name:<40} índices: {', '.join(sorted(used)) or '-'}")
+                for problem in problems:
+                    print(f"      {problem}")
+    finally:
+        engine.dispose()
+        if args.keep:
+            print(f"Esquema conservado: {schema}")
+        else:
+            with base_engine.begin() as conn:
+                conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        base_engine.dispose()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
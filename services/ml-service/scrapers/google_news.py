@@ -6,12 +6,14 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from newspaper import Article
+from utils import http_client
 from utils.db_utils import (
-    get_or_create_source, save_news, get_active_model, 
-    save_classification, classify_topic, extract_keywords, 
-    save_news_keywords, find_existing_news_by_url
+    get_active_model, classify_topic, classify_topics, extract_keywords, extract_keywords_batch,
+    find_existing_news_by_url, NewsIngestion
 )
-from core.classify_service import predict_news
+from core.classify_service import predict_news_each
+from utils.text_analysis import TextAnalysis
+from utils.stage_timing import StageTimer
 from database.db import db
 from urllib.parse import urlparse
 
@@ -62,6 +64,14 @@ class GoogleNewsScraper:
         Returns:
             list: Lista de IDs de noticias procesadas
         """
+        # Duración de cada etapa del pipeline (también en el histograma pipeline_stage_seconds)
+        timer = StageTimer("google_news")
+        try:
+            return self._scrape_news(rss_url, limit, timer)
+        finally:
+            logger.info(f"Etapas del scraping de Google News: {timer.summary()}")
+    
+    def _scrape_news(self, rss_url, limit, timer):
         if rss_url is None:
             # URL predeterminada - noticias de salud en español
             rss_url = "https://news.google.com/rss/topics/CAAqJggKIiBDQkFTRWdvSUwyMHZNR3QwTlRFU0JtVnpMVFF4T1NnQVAB?hl=es-419&gl=MX&ceid=MX%3Aes-419"
@@ -70,11 +80,15 @@ class GoogleNewsScraper:
         self._init_driver()
         
         # Obtener el feed
-        feed = feedparser.parse(rss_url)
+        with timer.stage("feed"):
+            feed = feedparser.parse(rss_url)
         
         # Lista para almacenar los IDs de las noticias procesadas
         processed_news_ids = []
         
+        # Artículos descargados pendientes de clasificar en un solo batch
+        pending_articles = []
+        
         # Procesar las noticias
         for entry in feed.entries[:limit]:
             try:
@@ -82,13 +96,15 @@ class GoogleNewsScraper:
                 link_google = entry.link
                 
                 # Seguir la redirección para obtener la URL real
-                real_url = self.get_actual_url(link_google)
+                with timer.stage("url_resolution"):
+                    real_url = self.get_actual_url(link_google)
                 
                 if not real_url:
                     continue
                 
                 # Verificar si la noticia ya existe en la base de datos
-                existing_news = find_existing_news_by_url(real_url)
+                with timer.stage("stored_lookup"):
+                    existing_news = find_existing_news_by_url(real_url)
                 if existing_news:
                     logger.info(f"Noticia con URL {real_url} ya existe en la BD con ID {existing_news.id}")
                     processed_news_ids.append(existing_news.id)
@@ -96,9 +112,10 @@ class GoogleNewsScraper:
                 
                 # Extraer el contenido de la noticia
                 try:
-                    articulo = Article(real_url, language="es")
-                    articulo.download()
-                    articulo.parse()
+                    with timer.stage("download"):
+                        articulo = Article(real_url, language="es")
+                        articulo.download(input_html=http_client.fetch_html(real_url))
+                        articulo.parse()
                     
                     # Extraer contenido completo y fecha
                     contenido = articulo.text
@@ -108,44 +125,13 @@ class GoogleNewsScraper:
                     if not contenido or len(contenido) < 100:
                         logger.warning(f"Contenido demasiado corto para: {real_url}")
                         continue
-                        
-                    # 1. Obtener o crear la fuente
-                    fuente_id = get_or_create_source(real_url)
-                    
-                    # 2. Clasificar el tema
-                    tema_nombre, tema_id = classify_topic(contenido)
-                    
-                    # 3. Guardar la noticia
-                    noticia_id = save_news(
-                        titulo,
-                        contenido,
-                        real_url,
-                        fecha_publicacion,
-                        fuente_id,
-                        tema_id
-                    )
                     
-                    # 4. Extraer y guardar keywords
-                    keywords = extract_keywords(contenido, num_keywords=5)
-                    save_news_keywords(noticia_id, keywords)
-                    
-                    # 5. Clasificar la noticia (verdadera/falsa)
-                    resultado, confianza, explicacion = predict_news(contenido)
-                    modelo_id = get_active_model()
-                    
-                    # 6. Guardar la clasificación
-                    clasificacion_id = save_classification(
-                        noticia_id, 
-                        modelo_id, 
-                        resultado, 
-                        confianza, 
-                        explicacion
-                    )
-                    
-                    # Añadir a la lista de procesados
-                    processed_news_ids.append(noticia_id)
-                    
-                    logger.info(f"Noticia procesada: {titulo} | Clasificación: {resultado} ({confianza}%)")
+                    pending_articles.append({
+                        "titulo": titulo,
+                        "url": real_url,
+                        "contenido": contenido,
+                        "fecha_publicacion": fecha_publicacion
+                    })
                     
                 except Exception as e:
                     logger.error(f"Error al procesar artículo de {real_url}: {str(e)}")
@@ -158,6 +144,55 @@ class GoogleNewsScraper:
         # Cerrar el driver
         self.close_driver()
         
+        if not pending_articles:
+            return processed_news_ids
+        
+        # Un análisis por artículo, compartido por la clasificación, el tema y las keywords
+        analisis = [TextAnalysis(articulo["contenido"]) for articulo in pending_articles]
+        
+        # Clasificar todas las noticias (verdadera/falsa) en un solo batch
+        with timer.stage("inference"):
+            predicciones = predict_news_each(analisis)
+        
+        modelo_id = get_active_model()
+        
+        # Temas y keywords de todo el lote en una sola pasada (índice de temas e IDF precalculados)
+        with timer.stage("topic"):
+            temas = classify_topics(analisis)
+        with timer.stage("keywords"):
+            keywords_lote = extract_keywords_batch(analisis, num_keywords=5)
+        
+        for articulo, texto, (tema_nombre, tema_id), keywords, prediccion in zip(
+            pending_articles, analisis, temas, keywords_lote, predicciones
+        ):
+            # Solo se descartan los artículos que no se pudieron clasificar
+            if prediccion is None:
+                continue
+            resultado, confianza, explicacion = prediccion
+            try:
+                # Guardar fuente, noticia, keywords y clasificación en una sola transacción
+                with timer.stage("save"):
+                    ingestion = NewsIngestion(
+                        articulo["titulo"],
+                        articulo["contenido"],
+                        articulo["url"],
+                        articulo["fecha_publicacion"]
+                    )
+                    ingestion.set_topic(tema_id)
+                    ingestion.set_keywords(keywords)
+                    ingestion.set_terms(texto.lemmas)
+                    ingestion.set_classification(modelo_id, resultado, confianza, explicacion)
+                    noticia_id = ingestion.commit()["news_id"]
+                
+                # Añadir a la lista de procesados
+                processed_news_ids.append(noticia_id)
+                
+                logger.info(f"Noticia procesada: {articulo['titulo']} | Clasificación: {resultado} ({confianza}%)")
+                
+            except Exception as e:
+                logger.error(f"Error al guardar artículo de {articulo['url']}: {str(e)}")
+                continue
+        
         return processed_news_ids
     
     def get_news_without_saving(self, rss_url=None, limit=5):
@@ -182,8 +217,9 @@ class GoogleNewsScraper:
         # Obtener el feed
         feed = feedparser.parse(rss_url)
         
-        # Lista para almacenar los resultados
+        # Lista para almacenar los resultados (y el análisis de cada contenido, en el mismo orden)
         results = []
+        analisis = []
         
         # Procesar las noticias
         for entry in feed.entries[:limit]:
@@ -200,7 +236,7 @@ class GoogleNewsScraper:
                 # Extraer el contenido de la noticia
                 try:
                     articulo = Article(real_url, language="es")
-                    articulo.download()
+                    articulo.download(input_html=http_client.fetch_html(real_url))
                     articulo.parse()
                     
                     # Extraer contenido completo y fecha
@@ -216,16 +252,15 @@ class GoogleNewsScraper:
                     parsed_url = urlparse(real_url)
                     fuente = parsed_url.netloc.replace('www.', '')
                     
+                    texto = TextAnalysis(contenido)
+                    
                     # Clasificar el tema
-                    tema_nombre, _ = classify_topic(contenido)
+                    tema_nombre, _ = classify_topic(texto)
                     
                     # Extraer keywords
-                    keywords = extract_keywords(contenido, num_keywords=5)
+                    keywords = extract_keywords(texto, num_keywords=5)
                     
-                    # Clasificar la noticia (verdadera/falsa)
-                    resultado, confianza, explicacion = predict_news(contenido)
-                    
-                    # Crear objeto de resultado
+                    # Crear objeto de resultado (la clasificación se añade después en batch)
                     news_item = {
                         "titulo": titulo,
                         "url": real_url,
@@ -233,16 +268,12 @@ class GoogleNewsScraper:
                         "fuente": fuente,
                         "contenido": contenido,
                         "tema": tema_nombre,
-                        "clasificacion": resultado,
-                        "confianza": confianza,
-                        "explicacion": explicacion,
                         "palabras_clave": keywords
                     }
                     
                     # Añadir a la lista de resultados
                     results.append(news_item)
-                    
-                    logger.info(f"Noticia analizada (sin guardar): {titulo} | Clasificación: {resultado} ({confianza}%)")
+                    analisis.append(texto)
                     
                 except Exception as e:
                     logger.error(f"Error al procesar artículo de {real_url}: {str(e)}")
@@ -255,4 +286,23 @@ class GoogleNewsScraper:
         # Cerrar el driver
         self.close_driver()
         
-        return results
\ No newline at end of file
+        if not results:
+            return results
+        
+        # Clasificar todas las noticias (verdadera/falsa) en un solo batch
+        predicciones = predict_news_each(analisis)
+        
+        classified = []
+        for news_item, prediccion in zip(results, predicciones):
+            # Solo se descartan las noticias que no se pudieron clasificar
+            if prediccion is None:
+                continue
+            resultado, confianza, explicacion = prediccion
+            news_item["clasificacion"] = resultado
+            news_item["confianza"] = confianza
+            news_item["explicacion"] = explicacion
+            classified.append(news_item)
+            
+            logger.info(f"Noticia analizada (sin guardar): {news_item['titulo']} | Clasificación: {resultado} ({confianza}%)")
+        
+        return classified
\ No newline at end of file
@@ -11,11 +11,12 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 import os
 from utils.db_utils import (
-    get_or_create_source, save_news, get_active_model, 
-    save_classification, classify_topic, extract_keywords, 
-    save_news_keywords, find_existing_news_by_url
+    get_active_model, classify_topic, classify_topics, extract_keywords, extract_keywords_batch,
+    find_existing_news_by_url, NewsIngestion
 )
-from core.classify_service import predict_news
+from core.classify_service import predict_news_each
+from utils.text_analysis import TextAnalysis
+from utils.stage_timing import StageTimer
 
 logger = logging.getLogger(__name__)
 
@@ -161,89 +162,130 @@ class TwitterScraper:
         # Lista para almacenar los IDs de las noticias procesadas
         processed_news_ids = []
         tweets_processed = 0
+        seen_urls = set()
+        # Duración de cada etapa del pipeline (también en el histograma pipeline_stage_seconds)
+        timer = StageTimer("twitter")
         
         # Procesar tweets hasta alcanzar el límite
         while len(processed_news_ids) < limit:
-            self._scroll_down(3)
-            tweets = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="tweet"]')
+            with timer.stage("scroll"):
+                self._scroll_down(3)
+                tweets = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="tweet"]')
             
             # Si no hay más tweets para cargar, salir del bucle
             if not tweets:
                 break
+            
+            # Tweets nuevos de esta pasada, pendientes de clasificar en un solo batch
+            pending_tweets = []
+            new_tweets_found = False
                 
             for tweet in tweets:
+                if len(processed_news_ids) + len(pending_tweets) >= limit:
+                    break
+                
                 # Extraer contenido del tweet
-                tweet_data = self._extract_tweet_content(tweet)
+                with timer.stage("extraction"):
+                    tweet_data = self._extract_tweet_content(tweet)
                 if not tweet_data or len(tweet_data["content"]) < min_length:
                     continue
                 
+                # Evitar procesar tweets ya vistos en pasadas anteriores
+                if tweet_data["url"] in seen_urls:
+                    continue
+                seen_urls.add(tweet_data["url"])
+                new_tweets_found = True
+                
                 tweets_processed += 1
                 
                 try:
                     # Verificar si la noticia ya existe en la base de datos
-                    existing_news = find_existing_news_by_url(tweet_data["url"])
+                    with timer.stage("stored_lookup"):
+                        existing_news = find_existing_news_by_url(tweet_data["url"])
                     if existing_news:
                         logger.info(f"Tweet con URL {tweet_data['url']} ya existe en la BD con ID {existing_news.id}")
                         processed_news_ids.append(existing_news.id)
-                        
-                        # Si hemos alcanzado el límite, salir
-                        if len(processed_news_ids) >= limit:
-                            break
-                            
                         continue
                     
-                    # 1. Obtener o crear la fuente
-                    fuente_id = get_or_create_source(tweet_data["url"])
-                    
-                    # 2. Clasificar el tema
-                    tema_nombre, tema_id = classify_topic(tweet_data["content"])
-                    
-                    # 3. Guardar la noticia
-                    noticia_id = save_news(
-                        f"Tweet de {tweet_data['author']}",
-                        tweet_data["content"],
-                        tweet_data["url"],
-                        tweet_data["date"],
-                        fuente_id,
-                        tema_id
-                    )
-                    
-                    # 4. Extraer y guardar keywords
-                    keywords = extract_keywords(tweet_data["content"], num_keywords=5)
-                    save_news_keywords(noticia_id, keywords)
-                    
-                    # 5. Clasificar la noticia (verdadera/falsa)
-                    resultado, confianza, explicacion = predict_news(tweet_data["content"])
-                    modelo_id = get_active_model()
-                    
-                    # 6. Guardar la clasificación
-                    clasificacion_id = save_classification(
-                        noticia_id, 
-                        modelo_id, 
-                        resultado, 
-                        confianza, 
-                        explicacion
-                    )
-                    
-                    # Añadir a la lista de procesados
-                    processed_news_ids.append(noticia_id)
-                    
-                    logger.info(f"Tweet procesado: {tweet_data['author']} | Clasificación: {resultado} ({confianza}%)")
-                    
-                    # Si hemos alcanzado el límite, salir
-                    if len(processed_news_ids) >= limit:
-                        break
+                    pending_tweets.append(tweet_data)
                         
                 except Exception as e:
                     logger.error(f"Error al procesar tweet: {str(e)}")
                     continue
+            
+            if pending_tweets:
+                processed_news_ids.extend(self._save_tweets_batch(pending_tweets, timer))
+            
+            # Si el scroll no trajo tweets nuevos, no hay más que procesar
+            if not new_tweets_found:
+                break
         
         # Cerrar el driver
         self.close_driver()
         
         logger.info(f"Scraping de Twitter completado. Se procesaron {len(processed_news_ids)} tweets de un total de {tweets_processed} analizados.")
+        logger.info(f"Etapas del scraping de Twitter: {timer.summary()}")
         return processed_news_ids
 
+    def _save_tweets_batch(self, pending_tweets, timer):
+        """
+        Clasifica un grupo de tweets en un solo batch y los guarda en la base de datos.
+        
+        Args:
+            pending_tweets (list): Datos de tweets extraídos con `_extract_tweet_content`
+            timer (StageTimer): Cronómetro del scraping en curso
+            
+        Returns:
+            list: Lista de IDs de noticias guardadas
+        """
+        # Un análisis por tweet, compartido por la clasificación, el tema y las keywords
+        analisis = [TextAnalysis(tweet_data["content"]) for tweet_data in pending_tweets]
+        
+        # Clasificar los tweets (verdadero/falso) en un solo forward pass
+        with timer.stage("inference"):
+            predicciones = predict_news_each(analisis)
+        
+        modelo_id = get_active_model()
+        
+        # Temas y keywords de todo el lote en una sola pasada (índice de temas e IDF precalculados)
+        with timer.stage("topic"):
+            temas = classify_topics(analisis)
+        with timer.stage("keywords"):
+            keywords_lote = extract_keywords_batch(analisis, num_keywords=5)
+        saved_ids = []
+        
+        for tweet_data, texto, (tema_nombre, tema_id), keywords, prediccion in zip(
+            pending_tweets, analisis, temas, keywords_lote, predicciones
+        ):
+            # Solo se descartan los tweets que no se pudieron clasificar
+            if prediccion is None:
+                continue
+            resultado, confianza, explicacion = prediccion
+            try:
+                # Guardar fuente, noticia, keywords y clasificación en una sola transacción
+                with timer.stage("save"):
+                    ingestion = NewsIngestion(
+                        f"Tweet de {tweet_data['author']}",
+                        tweet_data["content"],
+                        tweet_data["url"],
+                        tweet_data["date"]
+                    )
+                    ingestion.set_topic(tema_id)
+                    ingestion.set_keywords(keywords)
+                    ingestion.set_terms(texto.lemmas)
+                    ingestion.set_classification(modelo_id, resultado, confianza, explicacion)
+                    noticia_id = ingestion.commit()["news_id"]
+                
+                saved_ids.append(noticia_id)
+                
+                logger.info(f"Tweet procesado: {tweet_data['author']} | Clasificación: {resultado} ({confianza}%)")
+                
+            except Exception as e:
+                logger.error(f"Error al procesar tweet: {str(e)}")
+                continue
+        
+        return saved_ids
+
     def get_tweets_without_saving(self, query="noticias salud", start_date=None, end_date=None, limit=10, min_length=50):
         """
         Scrapea tweets según los criterios especificados, los clasifica pero NO los guarda en la base de datos.
@@ -286,6 +328,7 @@ class TwitterScraper:
         # Lista para almacenar los resultados
         results = []
         tweets_processed = 0
+        seen_urls = set()
         
         # Procesar tweets hasta alcanzar el límite
         while len(results) < limit:
@@ -295,50 +338,69 @@ class TwitterScraper:
             # Si no hay más tweets para cargar, salir del bucle
             if not tweets:
                 break
+            
+            # Tweets nuevos de esta pasada, pendientes de clasificar en un solo batch
+            pending_items = []
+            pending_analisis = []
                 
             for tweet in tweets:
+                if len(results) + len(pending_items) >= limit:
+                    break
+                
                 # Evitar procesar tweets ya vistos
                 tweet_data = self._extract_tweet_content(tweet)
                 if not tweet_data or len(tweet_data["content"]) < min_length:
                     continue
+                if tweet_data["url"] in seen_urls:
+                    continue
+                seen_urls.add(tweet_data["url"])
                 
                 tweets_processed += 1
                 
                 try:
+                    texto = TextAnalysis(tweet_data["content"])
+                    
                     # Clasificar el tema
-                    tema_nombre, _ = classify_topic(tweet_data["content"])
+                    tema_nombre, _ = classify_topic(texto)
                     
                     # Extraer keywords
-                    keywords = extract_keywords(tweet_data["content"], num_keywords=5)
-                    
-                    # Clasificar el tweet (verdadero/falso)
-                    resultado, confianza, explicacion = predict_news(tweet_data["content"])
+                    keywords = extract_keywords(texto, num_keywords=5)
                     
-                    # Crear objeto de resultado
-                    tweet_item = {
+                    # Crear objeto de resultado (la clasificación se añade después en batch)
+                    pending_items.append({
                         "autor": tweet_data["author"],
                         "fecha": tweet_data["date"].isoformat(),
                         "url": tweet_data["url"],
                         "contenido": tweet_data["content"],
                         "tema": tema_nombre,
-                        "clasificacion": resultado,
-                        "confianza": confianza,
-                        "explicacion": explicacion,
                         "palabras_clave": keywords
-                    }
-                    
-                    # Añadir a la lista de resultados
-                    results.append(tweet_item)
-                    
-                    logger.info(f"Tweet analizado (sin guardar): {tweet_data['author']} | Clasificación: {resultado} ({confianza}%)")
-                    
-                    # Si hemos alcanzado el límite, salir
-                    if len(results) >= limit:
-                        break
+                    })
+                    pending_analisis.append(texto)
                         
                 except Exception as e:
                     logger.error(f"Error al analizar tweet: {str(e)}")
                     continue
+            
+            # Si el scroll no trajo tweets nuevos, no hay más que analizar
+            if not pending_items:
+                break
+            
+            # Clasificar los tweets (verdadero/falso) en un solo batch
+            predicciones = predict_news_each(pending_analisis)
+            
+            for tweet_item, prediccion in zip(pending_items, predicciones):
+                # Solo se descartan los tweets que no se pudieron clasificar
+                if prediccion is None:
+                    continue
+                resultado, confianza, explicacion = prediccion
+                tweet_item["clasificacion"] = resultado
+                tweet_item["confianza"] = confianza
+                tweet_item["explicacion"] = explicacion
+                
+                # Añadir a la lista de resultados
+                results.append(tweet_item)
+                
+                logger.info(f"Tweet analizado (sin guardar): {tweet_item['autor']} | Clasificación: {resultado} ({confianza}%)")
         
         # Cerrar el driver
         self.close_driver()
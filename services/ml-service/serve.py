@@ -0,0 +1,150 @@
+"""
+Servidor de producción pre-fork para el ml-service.
+
+El proceso maestro carga el modelo una sola vez y hace fork de N workers que
+comparten los pesos mediante copy-on-write. Cada worker limita los hilos de
+torch (intra-op e inter-op) para que entre todos no sobresuscriban los núcleos.
+
+Uso (desde services/ml-service):
+    python serve.py --workers 4 --port 5000
+    python serve.py --workers 2 --threads-per-worker 4 --no-scheduler
+    python serve.py --workers 4 --metrics-port 9100   # métricas del worker N en 9100 + N
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Servidor pre-fork del ml-service")
+    parser.add_argument("--host", default=os.getenv("ML_SERVICE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ML_SERVICE_PORT", 5000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ML_SERVICE_WORKERS", 2)),
+                        help="Número de procesos worker")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Hilos intra-op de torch por worker (por defecto: núcleos / workers)")
+    parser.add_argument("--no-scheduler", action="store_true",
+                        help="No ejecutar los trabajos de scraping (por defecto corren en el worker 0)")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("ML_SERVICE_METRICS_PORT", 0)),
+                        help="Primer puerto de métricas Prometheus; cada worker usa el suyo (0 = desactivado)")
+    return parser.parse_args()
+
+
+def _threads_per_worker(args):
+    if args.threads_per_worker:
+        return args.threads_per_worker
+    return max(1, (os.cpu_count() or 1) // max(1, args.workers))
+
+
+def main():
+    args = parse_args()
+    threads = _threads_per_worker(args)
+
+    # Las librerías numéricas leen estas variables al importarse: fijarlas antes que torch
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    import gc
+    import logging
+    import torch
+    from werkzeug.serving import make_server
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from app import app
+    from database.db import db
+    from core.model_manager import model_manager
+    from cron_jobs import start_scheduler
+    from api.routes.metrics_routes import metrics_wsgi_app
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger("serve")
+
+    # Cargar el modelo en el maestro sin ejecutar inferencia (los pools de hilos no sobreviven al fork)
+    with app.app_context():
+        model_manager.load_active(warmup=False)
+        # Las conexiones abiertas no deben compartirse entre procesos
+        db.engine.dispose()
+
+    # Congelar los objetos actuales para que el GC no escriba en sus páginas y rompa el copy-on-write
+    gc.collect()
+    gc.freeze()
+
+    server = make_server(args.host, args.port, app, threaded=True)
+    logger.info(f"Escuchando en http://{args.host}:{args.port} con {args.workers} workers x {threads} hilos de torch")
+
+    def run_worker(slot):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        torch.set_num_threads(threads)
+        with app.app_context():
+            model_manager.current.backend.after_fork(threads)
+            model_manager.warm_up()
+
+        # Los hilos en segundo plano no sobreviven al fork: arrancarlos en cada worker
+        model_manager.start(app)
+        if slot == 0 and not args.no_scheduler:
+            start_scheduler(app)
+        if args.metrics_port:
+            # Cada worker tiene sus propias métricas: un puerto por worker para que Prometheus los lea todos
+            metrics_server = make_server(args.host, args.metrics_port + slot, metrics_wsgi_app, threaded=True)
+            threading.Thread(target=metrics_server.serve_forever, name="metrics", daemon=True).start()
+
+        logger.info(f"Worker {slot} (pid {os.getpid()}) listo")
+        server.serve_forever()
+
+    workers = {}
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            # El hijo nunca debe volver a este punto: saldría por el código del maestro
+            # (atexit, socket heredado, bucle de supervisión)
+            try:
+                run_worker(slot)
+            except BaseException:
+                logger.exception(f"Worker {slot} (pid {os.getpid()}) terminó por un error")
+                os._exit(1)
+            finally:
+                os._exit(0)
+        workers[pid] = slot
+
+    for slot in range(args.workers):
+        spawn(slot)
+
+    def shutdown(signum, frame):
+        logger.info("Deteniendo workers...")
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(workers):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Supervisar: reemplazar cualquier worker que termine inesperadamente
+    while True:
+        pid, status = os.wait()
+        slot = workers.pop(pid, None)
+        if slot is None:
+            continue
+        logger.warning(f"Worker {slot} (pid {pid}) terminó con estado {status}; reiniciando")
+        time.sleep(1)
+        spawn(slot)
+
+
+if __name__ == "__main__":
+    main()
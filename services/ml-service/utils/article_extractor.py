@@ -1,10 +1,15 @@
-from newspaper import Article
+from utils import http_client
+
 
 def extract_news_data(url):
     """Extrae el título, contenido, autor y fecha de publicación de una noticia desde una URL."""
     try:
+        # Import diferido: newspaper es costoso de importar y solo se necesita al extraer
+        from newspaper import Article
+
+        # El HTML se descarga con el cliente compartido (pool keep-alive, timeouts, reintentos)
         article = Article(url)
-        article.download()
+        article.download(input_html=http_client.fetch_html(url))
         article.parse()
 
         return {
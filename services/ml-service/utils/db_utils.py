@@ -1,61 +1,145 @@
-from database.db import db
+from database.db import db, track_queries
 from database.models import Fuente, Noticia, ModeloML, ClasificacionNoticia, HistorialConsulta, Tema, Keyword, NoticiaKeyword
+from sqlalchemy import (
+    select, insert, update, func, true, literal, exists, values, column, case, cast, Integer, Numeric, String
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 from urllib.parse import urlparse
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from config import Config
+from collections import Counter, OrderedDict
+from utils.text_analysis import TextAnalysis
+from utils.topic_index import topic_index, UNCLASSIFIED as UNCLASSIFIED_TOPIC
+from utils.idf_store import idf_store, document_terms, term_frequency_upsert
+from utils import metrics
+import time
+import threading
 import logging
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Descargar recursos de NLTK (debes ejecutar esto una vez)
-nltk.download("punkt")
-nltk.download("stopwords")
-nltk.download("wordnet")
+# Los recursos de NLTK (tokenizador, lematizador y stopwords en español e inglés) y
+# scikit-learn se cargan la primera vez que se usan, desde la caché local `NLTK_DATA_DIR`
 
-# Configurar el lematizador y las stopwords en español e inglés
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words("spanish") + stopwords.words("english"))
+# Caché del ID del modelo activo: [id, instante de la consulta]
+_active_model_cache = [None, None]
+
+# Máximo representable en `keywords.relevancia` (NUMERIC(5, 2))
+MAX_KEYWORD_RELEVANCE = 999.99
+
+# Viajes a la BD por noticia guardada con `NewsIngestion`
+ingestion_round_trips = metrics.histogram(
+    "db_ingestion_round_trips", "Sentencias SQL y COMMIT por noticia guardada",
+    buckets=[2, 4, 6, 8, 10, 15, 20, 30, 50]
+)
+
+# Índice en memoria URL -> id de noticia (LRU acotado por `KNOWN_URL_INDEX_SIZE`)
+_known_url_index = OrderedDict()
+_known_url_lock = threading.Lock()
+
+# Caché en memoria URL base de la fuente (esquema + netloc) -> id (LRU acotado por `SOURCE_CACHE_SIZE`)
+_source_cache = OrderedDict()
+_source_cache_lock = threading.Lock()
+_source_cache_hits = 0
+_source_cache_misses = 0
+source_cache_lookups = metrics.counter(
+    "source_cache_lookups_total", "Búsquedas de fuente en la caché en memoria", labelnames=("result",)
+)
+
+def _source_key(url):
+    """URL base (esquema + netloc) con la que se identifica la fuente, y su nombre."""
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}", parsed_url.netloc.replace('www.', '')
+
+def lookup_source(base_url):
+    """ID de fuente en la caché en memoria, o None. Cuenta aciertos y fallos."""
+    global _source_cache_hits, _source_cache_misses
+    with _source_cache_lock:
+        fuente_id = _source_cache.get(base_url)
+        if fuente_id is not None:
+            _source_cache.move_to_end(base_url)
+            _source_cache_hits += 1
+        else:
+            _source_cache_misses += 1
+    source_cache_lookups.labels(result="hit" if fuente_id is not None else "miss").inc()
+    return fuente_id
+
+def remember_source(base_url, fuente_id):
+    """Registra una fuente ya confirmada en la BD (llamar solo después del COMMIT)."""
+    if fuente_id is None or Config.SOURCE_CACHE_SIZE <= 0:
+        return
+    with _source_cache_lock:
+        _source_cache[base_url] = fuente_id
+        _source_cache.move_to_end(base_url)
+        while len(_source_cache) > Config.SOURCE_CACHE_SIZE:
+            _source_cache.popitem(last=False)
+
+def forget_source(base_url):
+    with _source_cache_lock:
+        _source_cache.pop(base_url, None)
+
+def get_source_cache_stats():
+    with _source_cache_lock:
+        lookups = _source_cache_hits + _source_cache_misses
+        return {
+            "size": len(_source_cache),
+            "max_size": Config.SOURCE_CACHE_SIZE,
+            "hits": _source_cache_hits,
+            "misses": _source_cache_misses,
+            "hit_rate": round(_source_cache_hits / lookups, 4) if lookups else 0
+        }
+
+def _upsert_source(session, base_url, nombre):
+    """
+    Crea la fuente si no existe y devuelve su id: INSERT ... ON CONFLICT DO NOTHING
+    RETURNING, con la fila existente como alternativa, en una sola sentencia.
+    """
+    inserted = (
+        pg_insert(Fuente)
+        .values(
+            nombre=nombre,
+            url=base_url,
+            confiabilidad=0.50,
+            noticias_verdaderas=0,
+            noticias_falsas=0,
+            verificada=False,
+            created_at=datetime.utcnow()
+        )
+        .on_conflict_do_nothing(index_elements=["url"])
+        .returning(Fuente.id)
+        .cte("fuente_insertada")
+    )
+    # Si ya existía, el INSERT no devuelve nada y se toma la fila existente
+    fuente_id = session.execute(
+        select(inserted.c.id).union_all(select(Fuente.id).where(Fuente.url == base_url)).limit(1)
+    ).scalar()
+    if fuente_id is None:
+        # Otra transacción la insertó durante la sentencia, que no ve esa fila en su snapshot;
+        # una consulta nueva sí la ve
+        fuente_id = session.execute(select(Fuente.id).where(Fuente.url == base_url)).scalar()
+    return fuente_id
 
 def get_or_create_source(url):
-    """Verifica si la fuente existe en la BD; si no, la crea usando SQLAlchemy."""
+    """Verifica si la fuente existe (caché en memoria por netloc); si no, la crea con un upsert."""
+    base_url, nombre = _source_key(url)
+    fuente_id = lookup_source(base_url)
+    if fuente_id is not None:
+        return fuente_id
+
     try:
-        parsed_url = urlparse(url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        
-        # Buscar la fuente por URL
-        fuente = Fuente.query.filter_by(url=base_url).first()
-        
-        if fuente:
-            return fuente.id
-        else:
-            nombre = parsed_url.netloc.replace('www.', '')
-            
-            # Crear nueva fuente
-            nueva_fuente = Fuente(
-                nombre=nombre,
-                url=base_url,
-                confiabilidad=0.50,
-                noticias_verdaderas=0,
-                noticias_falsas=0,
-                verificada=False,
-                created_at=datetime.utcnow()
-            )
-            db.session.add(nueva_fuente)
-            db.session.commit()
-            return nueva_fuente.id
+        fuente_id = _upsert_source(db.session, base_url, nombre)
+        db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Error al obtener o crear fuente: {str(e)}")
         raise
 
+    remember_source(base_url, fuente_id)
+    return fuente_id
+
 def get_topics_from_db():
     """Extrae los temas y sus palabras clave desde la base de datos usando SQLAlchemy."""
     try:
@@ -76,126 +160,234 @@ def get_topics_from_db():
         return {}, {}
 
 def classify_topic(text):
-    """Asigna un tema basado en palabras clave obtenidas de la base de datos."""
+    """Asigna un tema basado en palabras clave obtenidas de la base de datos (acepta texto o `TextAnalysis`)."""
     try:
-        topic_keywords, topic_ids = get_topics_from_db()
-        
-        if not topic_keywords:
-            logger.warning("No se encontraron temas activos con palabras clave")
-            return "Sin clasificar", None
-        
-        topics = list(topic_keywords.keys())
-        documents = [" ".join(topic_keywords[topic]) for topic in topics]
-
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(documents + [text])
-        
-        similarities = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1]).flatten()
-        
-        best_match_index = similarities.argmax()
-        
-        # Si la mejor coincidencia tiene una similitud muy baja, no asignar tema
-        if similarities[best_match_index] < 0.01:  # Umbral arbitrario, ajustar según necesidad
-            return "Sin clasificar", None
-            
-        best_topic = topics[best_match_index]
-
-        return best_topic, topic_ids[best_topic]
-    
+        return topic_index.classify(text)
     except Exception as e:
         logger.error(f"Error al clasificar tema: {str(e)}")
-        return "Sin clasificar", None
+        return UNCLASSIFIED_TOPIC
 
-def extract_keywords(text, num_keywords=5):
-    """Extrae palabras clave relevantes de un texto usando TF-IDF"""
+def classify_topics(texts):
+    """Versión por lotes de `classify_topic`: un solo producto disperso para todos los textos."""
     try:
-        # Tokenizar el texto y eliminar stop words y lematizar
-        words = word_tokenize(text.lower())
-        words = [lemmatizer.lemmatize(word) for word in words if word.isalpha() and word not in stop_words]
-
-        if len(words) == 0:
-            return []
-
-        # Aplicar TF-IDF para obtener la relevancia de las palabras
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform([' '.join(words)])
-
-        # Obtener los índices de las palabras más relevantes
-        feature_names = vectorizer.get_feature_names_out()
-        scores = tfidf_matrix.sum(axis=0).A1  # Sumar los puntajes TF-IDF de todas las palabras
-
-        # Crear un diccionario de palabras con sus respectivos puntajes
-        word_scores = dict(zip(feature_names, scores))
-
-        # Ordenar las palabras por relevancia (puntuación más alta)
-        sorted_word_scores = sorted(word_scores.items(), key=lambda x: x[1], reverse=True)
+        return topic_index.classify_many(texts)
+    except Exception as e:
+        logger.error(f"Error al clasificar temas: {str(e)}")
+        return [UNCLASSIFIED_TOPIC] * len(texts)
 
-        # Tomar las N palabras más relevantes
-        top_keywords = [word for word, score in sorted_word_scores[:num_keywords]]
+def extract_keywords(text, num_keywords=5):
+    """Extrae palabras clave relevantes de un texto (o `TextAnalysis`) con TF-IDF sobre el corpus de noticias"""
+    return extract_keywords_batch([text], num_keywords)[0]
 
-        return top_keywords
+def extract_keywords_batch(texts, num_keywords=5):
+    """Palabras clave de varios textos (o `TextAnalysis`) puntuados en una sola pasada contra el IDF precalculado"""
+    documents = []
+    try:
+        # Tokens sin stop words y lematizados, memorizados en el análisis de cada texto
+        documents = [[word for word in TextAnalysis.of(text).lemmas if len(word) > 1] for text in texts]
+        return idf_store.top_terms(documents, num_keywords)
     
     except Exception as e:
         logger.error(f"Error al extraer palabras clave con TF-IDF: {str(e)}")
         # En caso de error, intentamos con el método simple de frecuencia
         try:
-            if len(words) > 0:
-                freq_dist = nltk.FreqDist(words)
-                return [word for word, freq in freq_dist.most_common(num_keywords)]
-            return []
+            if len(documents) == len(texts):
+                return [[word for word, freq in Counter(words).most_common(num_keywords)] for words in documents]
+            return [[] for _ in texts]
         except:
-            return []
+            return [[] for _ in texts]
+
+def _keyword_upsert(word_counts):
+    """
+    INSERT ... ON CONFLICT que crea las palabras nuevas y suma a `relevancia` las
+    apariciones de las existentes (con tope en el máximo de la columna), devolviendo
+    (id, palabra). Las palabras van ordenadas para que escritores concurrentes
+    bloqueen las filas en el mismo orden y no se interbloqueen.
+    """
+    stmt = pg_insert(Keyword).values([
+        {"palabra": word, "relevancia": count}
+        for word, count in sorted(word_counts.items())
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=["palabra"],
+        set_={"relevancia": func.least(Keyword.relevancia + stmt.excluded.relevancia, MAX_KEYWORD_RELEVANCE)}
+    ).returning(Keyword.id, Keyword.palabra)
+
+def save_keywords_bulk(news_keywords, session=None, commit=True):
+    """
+    Guarda las palabras clave de una o varias noticias en un solo viaje a la BD.
+
+    `news_keywords` es {noticia_id: [palabras]}. Cada palabra incrementa su
+    relevancia una vez por noticia y los enlaces `noticias_keywords` se insertan con
+    ON CONFLICT DO NOTHING sobre (noticia_id, keyword_id). Devuelve {palabra: id}.
+    """
+    session = session or db.session
+    pairs = sorted({
+        (noticia_id, word)
+        for noticia_id, words in news_keywords.items()
+        for word in words if word
+    })
+    if not pairs:
+        return {}
+
+    word_counts = Counter(word for _, word in pairs)
 
-def get_or_create_keyword(word):
-    """Busca una palabra clave en la base de datos o la inserta si no existe usando SQLAlchemy."""
     try:
-        # Verificar si la keyword ya existe
-        keyword = Keyword.query.filter_by(palabra=word).first()
-
-        if keyword:
-            # Incrementar la relevancia en 1.0
-            keyword.relevancia = float(keyword.relevancia) + 1.0
-            db.session.commit()
-            return keyword.id
-        else:
-            # Crear una nueva keyword con relevancia inicial de 1.0
-            new_keyword = Keyword(
-                palabra=word,
-                relevancia=1.0
+        upserted = _keyword_upsert(word_counts).cte("keywords_upsert")
+        pares = values(
+            column("noticia_id", Integer), column("palabra", String), name="pares"
+        ).data(pairs)
+        links = (
+            pg_insert(NoticiaKeyword)
+            .from_select(
+                ["noticia_id", "keyword_id"],
+                select(pares.c.noticia_id, upserted.c.id).join(upserted, upserted.c.palabra == pares.c.palabra)
             )
-            db.session.add(new_keyword)
-            db.session.commit()
-            return new_keyword.id
+            .on_conflict_do_nothing(index_elements=["noticia_id", "keyword_id"])
+            .cte("enlaces")
+        )
+        # Un único viaje: upsert de keywords + enlaces (CTE de escritura) y los ids de vuelta
+        rows = session.execute(select(upserted.c.id, upserted.c.palabra).add_cte(links)).all()
+        if commit:
+            session.commit()
+        return {row.palabra: row.id for row in rows}
+    except SQLAlchemyError as e:
+        session.rollback()
+        logger.error(f"Error al guardar palabras clave en bloque: {str(e)}")
+        raise
+
+def get_or_create_keyword(word):
+    """Busca una palabra clave en la base de datos o la inserta si no existe, incrementando su relevancia."""
+    try:
+        keyword_id = db.session.execute(_keyword_upsert({word: 1})).scalar()
+        db.session.commit()
+        return keyword_id
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Error al obtener o crear palabra clave: {str(e)}")
         raise
 
 def save_news_keywords(noticia_id, keywords):
-    """Guarda la relación entre una noticia y sus palabras clave usando SQLAlchemy."""
+    """Guarda la relación entre una noticia y sus palabras clave (un solo viaje a la BD)."""
+    save_keywords_bulk({noticia_id: keywords})
+
+def save_document_terms(documents):
+    """Suma a las frecuencias de documento los lemas de noticias nuevas (una lista por noticia)."""
+    documents = [document_terms(lemmas) for lemmas in documents]
+    documents = [terms for terms in documents if terms]
+    if not documents:
+        return
     try:
-        for word in keywords:
-            keyword_id = get_or_create_keyword(word)
-            
-            # Verificar si ya existe la relación
-            exists = NoticiaKeyword.query.filter_by(
-                noticia_id=noticia_id, 
-                keyword_id=keyword_id
-            ).first()
-            
-            if not exists:
-                noticia_keyword = NoticiaKeyword(
-                    noticia_id=noticia_id,
-                    keyword_id=keyword_id
-                )
-                db.session.add(noticia_keyword)
-        
+        db.session.execute(term_frequency_upsert(documents))
         db.session.commit()
+        idf_store.observe(documents)
     except SQLAlchemyError as e:
         db.session.rollback()
-        logger.error(f"Error al guardar palabras clave de la noticia: {str(e)}")
+        logger.error(f"Error al actualizar las frecuencias de documento: {str(e)}")
         raise
 
+def remember_news_url(url, noticia_id):
+    """Registra una URL conocida en el índice en memoria."""
+    if not url or noticia_id is None or Config.KNOWN_URL_INDEX_SIZE <= 0:
+        return
+    with _known_url_lock:
+        _known_url_index[url] = noticia_id
+        _known_url_index.move_to_end(url)
+        while len(_known_url_index) > Config.KNOWN_URL_INDEX_SIZE:
+            _known_url_index.popitem(last=False)
+
+def lookup_news_url(url):
+    """ID de noticia de una URL ya vista por este proceso, o None."""
+    with _known_url_lock:
+        noticia_id = _known_url_index.get(url)
+        if noticia_id is not None:
+            _known_url_index.move_to_end(url)
+        return noticia_id
+
+def forget_news_url(url):
+    with _known_url_lock:
+        _known_url_index.pop(url, None)
+
+def get_stored_news(url):
+    """
+    Carga en una sola consulta todo lo necesario para responder sobre una URL ya
+    analizada: la noticia, el nombre de su tema, sus palabras clave y su
+    clasificación más reciente. Devuelve un dict o None si la URL no está guardada.
+
+    Si la URL está en el índice en memoria se busca por clave primaria.
+    """
+    if not url:
+        return None
+
+    try:
+        # Clasificación más reciente de la noticia (LATERAL: una fila por noticia)
+        ultima = (
+            select(
+                ClasificacionNoticia.id,
+                ClasificacionNoticia.resultado,
+                ClasificacionNoticia.confianza,
+                ClasificacionNoticia.explicacion
+            )
+            .where(ClasificacionNoticia.noticia_id == Noticia.id)
+            .order_by(ClasificacionNoticia.fecha_clasificacion.desc(), ClasificacionNoticia.id.desc())
+            .limit(1)
+            .lateral()
+        )
+        palabras = (
+            select(func.array_agg(Keyword.palabra))
+            .join(NoticiaKeyword, NoticiaKeyword.keyword_id == Keyword.id)
+            .where(NoticiaKeyword.noticia_id == Noticia.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Noticia.id,
+                Noticia.titulo,
+                Noticia.contenido,
+                Noticia.url,
+                Noticia.fecha_publicacion,
+                Tema.nombre.label("tema"),
+                palabras.label("keywords"),
+                ultima.c.id.label("clasificacion_id"),
+                ultima.c.resultado,
+                ultima.c.confianza,
+                ultima.c.explicacion
+            )
+            .outerjoin(Tema, Tema.id == Noticia.tema_id)
+            .outerjoin(ultima, true())
+        )
+
+        noticia_id = lookup_news_url(url)
+        if noticia_id is not None:
+            stmt = stmt.where(Noticia.id == noticia_id)
+        else:
+            stmt = stmt.where(Noticia.url == url).order_by(Noticia.id).limit(1)
+
+        row = db.session.execute(stmt).first()
+        if row is None:
+            if noticia_id is not None:
+                # La noticia se eliminó: la entrada del índice ya no es válida
+                forget_news_url(url)
+            return None
+
+        remember_news_url(url, row.id)
+        return {
+            "id": row.id,
+            "titulo": row.titulo,
+            "contenido": row.contenido,
+            "url": row.url,
+            "fecha_publicacion": row.fecha_publicacion,
+            "tema": row.tema,
+            "keywords": list(row.keywords or []),
+            "clasificacion_id": row.clasificacion_id,
+            "resultado": row.resultado,
+            "confianza": float(row.confianza) if row.confianza is not None else 0,
+            "explicacion": row.explicacion
+        }
+    except SQLAlchemyError as e:
+        logger.error(f"Error al cargar la noticia guardada por URL: {str(e)}")
+        return None
+
 def find_existing_news_by_url(url):
     """Busca si ya existe una noticia con la misma URL en la base de datos."""
     if not url:
@@ -203,6 +395,8 @@ def find_existing_news_by_url(url):
         
     try:
         noticia = Noticia.query.filter_by(url=url).first()
+        if noticia:
+            remember_news_url(url, noticia.id)
         return noticia
     except SQLAlchemyError as e:
         logger.error(f"Error al buscar noticia existente por URL: {str(e)}")
@@ -233,21 +427,59 @@ def save_news(titulo, contenido, url, fecha_publicacion, fuente_id, tema_id=None
         )
         db.session.add(nueva_noticia)
         db.session.commit()
+        remember_news_url(url, nueva_noticia.id)
         return nueva_noticia.id
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Error al guardar noticia: {str(e)}")
         raise
 
-def get_active_model():
-    """Obtiene el ID del modelo activo usando SQLAlchemy."""
+def get_active_model(max_age=None):
+    """
+    Obtiene el ID del modelo activo usando SQLAlchemy.
+    El resultado se cachea durante `ACTIVE_MODEL_TTL` segundos (o `max_age`) para
+    no consultar la BD en cada clasificación.
+    """
+    ttl = Config.ACTIVE_MODEL_TTL if max_age is None else max_age
+    cached_id, cached_at = _active_model_cache
+    if cached_at is not None and time.monotonic() - cached_at < ttl:
+        return cached_id
+
     try:
         modelo = ModeloML.query.filter_by(activo=True).order_by(ModeloML.fecha_entrenamiento.desc()).first()
-        return modelo.id if modelo else None
+        active_id = modelo.id if modelo else None
+        _active_model_cache[:] = [active_id, time.monotonic()]
+        return active_id
     except SQLAlchemyError as e:
         logger.error(f"Error al obtener modelo activo: {str(e)}")
         raise
 
+def invalidate_active_model_cache():
+    """Fuerza a que la siguiente llamada a `get_active_model` consulte la BD."""
+    _active_model_cache[:] = [None, None]
+
+def _source_counters_update(fuente_id, resultado):
+    """
+    UPDATE atómico de los contadores de una fuente por una clasificación nueva.
+    Los incrementos y `confiabilidad` (verdaderas / total) se calculan en la BD
+    sobre la fila bloqueada, así que escrituras concurrentes no pierden cuentas.
+    `fuente_id` puede ser un valor o una subconsulta escalar.
+    """
+    verdaderas = func.coalesce(Fuente.noticias_verdaderas, 0) + (1 if resultado == 'verdadera' else 0)
+    falsas = func.coalesce(Fuente.noticias_falsas, 0) + (1 if resultado == 'falsa' else 0)
+    total = verdaderas + falsas
+    return (
+        update(Fuente)
+        .where(Fuente.id == fuente_id)
+        .values(
+            noticias_verdaderas=verdaderas,
+            noticias_falsas=falsas,
+            confiabilidad=case((total > 0, cast(verdaderas, Numeric) / total), else_=Fuente.confiabilidad),
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
 def save_classification(noticia_id, modelo_id, resultado, confianza, explicacion):
     """Guarda la clasificación en la BD usando SQLAlchemy."""
     try:
@@ -282,24 +514,10 @@ def save_classification(noticia_id, modelo_id, resultado, confianza, explicacion
         )
         db.session.add(nueva_clasificacion)
         
-        # Obtener la noticia y su fuente
-        noticia = Noticia.query.get(noticia_id)
-        if noticia and noticia.fuente_id:
-            fuente = Fuente.query.get(noticia.fuente_id)
-            
-            # Actualizar contadores según el resultado
-            if resultado == 'verdadera':
-                fuente.noticias_verdaderas += 1
-            elif resultado == 'falsa':
-                fuente.noticias_falsas += 1
-                
-            # Recalcular confiabilidad
-            total_noticias = fuente.noticias_verdaderas + fuente.noticias_falsas
-            if total_noticias > 0:
-                fuente.confiabilidad = fuente.noticias_verdaderas / total_noticias
-                
-            # Actualizar timestamp
-            fuente.updated_at = datetime.utcnow()
+        # Contadores y confiabilidad de la fuente de la noticia, calculados en la BD (una sentencia)
+        db.session.execute(_source_counters_update(
+            select(Noticia.fuente_id).where(Noticia.id == noticia_id).scalar_subquery(), resultado
+        ))
         
         db.session.commit()
         return nueva_clasificacion.id
@@ -326,4 +544,224 @@ def save_consultation(usuario_id, noticia_id):
     except SQLAlchemyError as e:
         db.session.rollback()
         logger.error(f"Error al guardar consulta: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+# Ingesta en una sola unidad de trabajo
+
+# Cuenta las sentencias SQL y los COMMIT del hilo actual dentro del bloque:
+#     with count_round_trips() as trips:
+#         ...
+#     trips.total
+count_round_trips = track_queries
+
+class NewsIngestion:
+    """
+    Unidad de trabajo para guardar una noticia clasificada.
+
+    Reúne la fuente, la noticia, sus palabras clave, la clasificación y la consulta
+    del usuario, y las escribe en una sola transacción con el mínimo de viajes a la
+    BD: cada paso es una única sentencia (las comprobaciones de existencia van
+    dentro de la propia sentencia) y hay un único COMMIT.
+
+        ingestion = NewsIngestion(titulo, contenido, url, fecha_publicacion)
+        ingestion.set_topic(tema_id)
+        ingestion.set_keywords(keywords)
+        ingestion.set_terms(analysis.lemmas)
+        ingestion.set_classification(modelo_id, resultado, confianza, explicacion)
+        ingestion.set_consultation(usuario_id)
+        ids = ingestion.commit()
+
+    `commit()` devuelve un dict con `news_id`, `source_id`, `classification_id`,
+    `consultation_id`, `created` (si la noticia es nueva) y `round_trips`.
+    """
+
+    def __init__(self, titulo, contenido, url=None, fecha_publicacion=None):
+        self.titulo = titulo
+        self.contenido = contenido
+        self.url = url
+        self.fecha_publicacion = fecha_publicacion
+        self.tema_id = None
+        self.keywords = []
+        self.terms = []
+        self.classification = None
+        self.usuario_id = None
+
+    def set_topic(self, tema_id):
+        self.tema_id = tema_id
+        return self
+
+    def set_keywords(self, keywords):
+        # Sin duplicados y en el orden original
+        self.keywords = list(dict.fromkeys(word for word in keywords if word))
+        return self
+
+    def set_terms(self, lemmas):
+        # Lemas del contenido; si la noticia es nueva se suman a las frecuencias de documento
+        self.terms = document_terms(lemmas)
+        return self
+
+    def set_classification(self, modelo_id, resultado, confianza, explicacion):
+        self.classification = (modelo_id, resultado, confianza, explicacion)
+        return self
+
+    def set_consultation(self, usuario_id):
+        self.usuario_id = usuario_id
+        return self
+
+    # Pasos (cada uno es una sentencia, salvo donde se indica)
+
+    def _save_source(self, session):
+        """Id de la fuente: de la caché en memoria o con un upsert (ver `_upsert_source`)."""
+        base_url, nombre = _source_key(self.url)
+        fuente_id = lookup_source(base_url)
+        if fuente_id is None:
+            fuente_id = _upsert_source(session, base_url, nombre)
+        return fuente_id
+
+    def _save_news(self, session, fuente_id):
+        now = datetime.utcnow()
+        values = {
+            "titulo": self.titulo,
+            "contenido": self.contenido,
+            "url": self.url,
+            "fecha_publicacion": self.fecha_publicacion,
+            "fuente_id": fuente_id,
+            "tema_id": self.tema_id,
+            "created_at": now
+        }
+        if not self.url:
+            news_id = session.execute(insert(Noticia).values(**values).returning(Noticia.id)).scalar()
+            return news_id, True
+
+        # `noticias.url` es única (migración 0004): dos ingestas concurrentes de la misma URL
+        # no pueden insertar las dos; la que pierde toma la fila existente
+        inserted = (
+            pg_insert(Noticia)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["url"])
+            .returning(Noticia.id)
+            .cte("noticia_insertada")
+        )
+        row = session.execute(
+            select(inserted.c.id, literal(True).label("created"))
+            .union_all(select(Noticia.id, literal(False).label("created")).where(Noticia.url == self.url))
+            .limit(1)
+        ).first()
+        if row is None:
+            # Otra transacción la insertó durante la sentencia, que no ve esa fila en su snapshot
+            return session.execute(select(Noticia.id).where(Noticia.url == self.url)).scalar(), False
+        return row.id, row.created
+
+    def _save_keywords(self, session, news_id):
+        """Upsert de keywords y enlaces en una sola sentencia (ver `save_keywords_bulk`)."""
+        if self.keywords:
+            save_keywords_bulk({news_id: self.keywords}, session=session, commit=False)
+
+    def _save_terms(self, session):
+        """Suma los términos de la noticia nueva a `frecuencia_terminos` (ver `term_frequency_upsert`)."""
+        session.execute(term_frequency_upsert([self.terms]))
+
+    def _save_classification(self, session, news_id, created):
+        modelo_id, resultado, confianza, explicacion = self.classification
+        now = datetime.utcnow()
+        values = {
+            "noticia_id": news_id,
+            "modelo_id": modelo_id,
+            "resultado": resultado,
+            "confianza": confianza,
+            "explicacion": explicacion,
+            "fecha_clasificacion": now
+        }
+
+        if created:
+            classification_id = session.execute(
+                insert(ClasificacionNoticia).values(**values).returning(ClasificacionNoticia.id)
+            ).scalar()
+            new_classification = True
+        else:
+            # Actualizar la clasificación de este modelo si existe; si no, insertarla (una sentencia)
+            table = ClasificacionNoticia.__table__
+            updated = (
+                update(ClasificacionNoticia)
+                .where(
+                    ClasificacionNoticia.noticia_id == news_id,
+                    ClasificacionNoticia.modelo_id == modelo_id
+                )
+                .values(resultado=resultado, confianza=confianza, explicacion=explicacion, fecha_clasificacion=now)
+                .returning(ClasificacionNoticia.id)
+                .cte("clasificacion_actualizada")
+            )
+            inserted = (
+                insert(ClasificacionNoticia)
+                .from_select(
+                    list(values),
+                    select(*[literal(value, table.c[name].type) for name, value in values.items()])
+                    .where(~exists(select(updated.c.id)))
+                )
+                .returning(ClasificacionNoticia.id)
+                .cte("clasificacion_insertada")
+            )
+            row = session.execute(
+                select(updated.c.id, literal(False).label("created")).union_all(
+                    select(inserted.c.id, literal(True).label("created"))
+                )
+            ).first()
+            classification_id, new_classification = row.id, row.created
+
+        return classification_id, new_classification
+
+    def _save_source_counters(self, session, fuente_id):
+        """Incremento atómico de los contadores de la fuente (ver `_source_counters_update`)."""
+        session.execute(_source_counters_update(fuente_id, self.classification[1]))
+
+    def _save_consultation(self, session, news_id):
+        return session.execute(
+            insert(HistorialConsulta)
+            .values(usuario_id=self.usuario_id, noticia_id=news_id, fecha_consulta=datetime.utcnow())
+            .returning(HistorialConsulta.id)
+        ).scalar()
+
+    def commit(self):
+        """Escribe todo en una transacción; si algo falla se revierte completo."""
+        session = db.session
+        with count_round_trips() as trips:
+            try:
+                fuente_id = self._save_source(session) if self.url else None
+                news_id, created = self._save_news(session, fuente_id)
+                self._save_keywords(session, news_id)
+                if created and self.terms:
+                    self._save_terms(session)
+                classification_id, new_classification = (
+                    self._save_classification(session, news_id, created)
+                    if self.classification else (None, False)
+                )
+                consultation_id = self._save_consultation(session, news_id) if self.usuario_id else None
+                # Solo una clasificación nueva cuenta para la fuente. Va justo antes del COMMIT
+                # para que el bloqueo de la fila (muy disputada en fuentes como x.com) dure lo mínimo
+                if new_classification and fuente_id:
+                    self._save_source_counters(session, fuente_id)
+                session.commit()
+            except Exception as e:
+                # Cualquier error (también fuera de SQLAlchemy) deja la sesión limpia para la petición
+                session.rollback()
+                if self.url:
+                    # Por si el id de fuente en caché ya no existe (fuente borrada)
+                    forget_source(_source_key(self.url)[0])
+                logger.error(f"Error al guardar la noticia en una unidad de trabajo: {str(e)}")
+                raise
+
+        if fuente_id is not None:
+            remember_source(_source_key(self.url)[0], fuente_id)
+        remember_news_url(self.url, news_id)
+        if created and self.terms:
+            idf_store.observe([self.terms])
+        ingestion_round_trips.observe(trips.total)
+        logger.debug(f"Noticia {news_id} guardada en {trips.total} viajes a la BD")
+        return {
+            "news_id": news_id,
+            "source_id": fuente_id,
+            "classification_id": classification_id,
+            "consultation_id": consultation_id,
+            "created": created,
+            "round_trips": trips.total
+        }
@@ -0,0 +1,155 @@
+"""
+Cliente HTTP compartido para todas las peticiones salientes del ml-service
+(descarga de artículos, API de búsqueda).
+
+Una única `requests.Session` por proceso mantiene un pool de conexiones
+keep-alive por host, de modo que las visitas repetidas a los mismos dominios de
+noticias reutilizan las conexiones TCP/TLS. Todas las peticiones llevan timeout,
+reintentos con backoff exponencial para errores transitorios y un tamaño máximo
+de respuesta.
+
+Los reintentos se hacen en `get` y no en el adaptador para poder acotarlos con
+el `deadline` del llamador: no se empieza un reintento cuya espera termine
+después del plazo, y el timeout de cada intento se recorta a lo que queda. Un
+429 solo se reintenta si hay plazo y su `Retry-After` cabe en él.
+"""
+import os
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+RATE_LIMITED = 429
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class ResponseTooLarge(requests.RequestException):
+    """La respuesta supera `HTTP_MAX_RESPONSE_BYTES`."""
+
+
+def _build_session():
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,  # Número de hosts con pool propio
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,          # Conexiones reutilizables por host
+        max_retries=0                                   # Los reintentos los hace `get`
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": Config.HTTP_USER_AGENT})
+    return session
+
+
+def get_session():
+    """Sesión del proceso actual (tras un fork se crea otra: los sockets no se comparten)."""
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _remaining_timeout(timeout, deadline):
+    """`timeout` recortado al tiempo que queda hasta `deadline` (instante de `time.monotonic`)."""
+    if deadline is None:
+        return timeout
+    remaining = max(0.001, deadline - time.monotonic())
+    if isinstance(timeout, tuple):
+        return tuple(min(value, remaining) for value in timeout)
+    return min(timeout, remaining)
+
+
+def _retry_wait(response, attempt):
+    """Espera antes del reintento número `attempt` (desde 0): backoff exponencial o `Retry-After`."""
+    wait = Config.HTTP_BACKOFF_FACTOR * (2 ** attempt)
+    retry_after = response.headers.get("Retry-After", "").strip() if response is not None else ""
+    if retry_after.isdigit():
+        wait = max(wait, int(retry_after))
+    return wait
+
+
+def _can_retry(attempt, wait, deadline):
+    if attempt >= Config.HTTP_MAX_RETRIES:
+        return False
+    return deadline is None or time.monotonic() + wait < deadline
+
+
+def get(url, params=None, timeout=None, max_bytes=None, deadline=None, **kwargs):
+    """
+    GET a través de la sesión compartida.
+
+    `timeout` es un número o una tupla (conexión, lectura); por defecto
+    (`HTTP_CONNECT_TIMEOUT`, `HTTP_READ_TIMEOUT`). `deadline` (instante de
+    `time.monotonic`) acota el tiempo total, reintentos incluidos. Los errores de
+    conexión, los timeouts y los estados de `RETRY_STATUS_CODES` se reintentan
+    hasta `HTTP_MAX_RETRIES` veces; si no quedan reintentos se lanza el error o se
+    devuelve la última respuesta. El cuerpo se lee por bloques y se lanza
+    `ResponseTooLarge` en cuanto supera `max_bytes`.
+    """
+    timeout = timeout or (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+    max_bytes = max_bytes or Config.HTTP_MAX_RESPONSE_BYTES
+
+    attempt = 0
+    while True:
+        try:
+            response = get_session().get(
+                url, params=params, timeout=_remaining_timeout(timeout, deadline), stream=True, **kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            wait = _retry_wait(None, attempt)
+            if not _can_retry(attempt, wait, deadline):
+                raise
+            logger.debug(f"Reintentando {url} en {wait:.1f}s: {str(e)}")
+        else:
+            retryable = response.status_code in RETRY_STATUS_CODES or (
+                response.status_code == RATE_LIMITED and deadline is not None
+            )
+            wait = _retry_wait(response, attempt)
+            if not retryable or not _can_retry(attempt, wait, deadline):
+                return _read_body(url, response, max_bytes)
+            response.close()
+            logger.debug(f"Reintentando {url} en {wait:.1f}s: estado {response.status_code}")
+        time.sleep(wait)
+        attempt += 1
+
+
+def _read_body(url, response, max_bytes):
+    try:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"Respuesta de {url} demasiado grande ({declared} bytes)")
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLarge(f"Respuesta de {url} demasiado grande (más de {max_bytes} bytes)")
+            chunks.append(chunk)
+
+        # Cuerpo ya leído: `text`, `json()` y `content` funcionan como en una respuesta normal
+        response._content = b"".join(chunks)
+        return response
+    finally:
+        # Devuelve la conexión al pool (o la descarta si la lectura se cortó)
+        response.close()
+
+
+def fetch_html(url, timeout=None):
+    """Descarga el HTML de una página y lo devuelve como texto; lanza `requests.RequestException` si falla."""
+    response = get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
@@ -0,0 +1,188 @@
+"""
+Frecuencias de documento (df) del corpus de `noticias` para `extract_keywords`.
+
+La tabla `frecuencia_terminos` guarda, por lema, en cuántas noticias aparece, y
+la fila `__total__` cuántas noticias se han contado. Se construye una vez desde
+el corpus (`python -m utils.idf_store --rebuild`) y después se actualiza en la
+misma transacción con que `NewsIngestion` guarda cada noticia nueva.
+
+Cada proceso mantiene una copia en memoria que recarga cada
+`IDF_REFRESH_INTERVAL` segundos (y suma al momento las noticias que guarda él
+mismo), de modo que puntuar un documento es contar sus lemas y multiplicar por
+un IDF ya calculado, sin ajustar ningún vectorizador.
+"""
+import threading
+import time
+import logging
+from collections import Counter
+from sqlalchemy import select, insert, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.db import db
+from database.models import FrecuenciaTermino, Noticia
+from config import Config
+from utils.text_analysis import TextAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Los lemas son alfabéticos, así que no puede coincidir con un término real
+TOTAL_TERM = "__total__"
+MAX_TERM_LENGTH = 100
+
+
+def _identity_analyzer(terms):
+    return terms
+
+
+def document_terms(lemmas):
+    """Términos distintos de un documento, tal como se cuentan en la tabla (ordenados)."""
+    return sorted({word[:MAX_TERM_LENGTH] for word in lemmas if len(word) > 1})
+
+
+def term_frequency_upsert(documents):
+    """
+    Sentencia que suma a `frecuencia_terminos` los términos de `documents` (una
+    colección de términos por noticia nueva) y el número de noticias al total.
+    """
+    counts = Counter()
+    for terms in documents:
+        counts.update(set(terms))
+    counts[TOTAL_TERM] += len(documents)
+
+    # Orden estable de filas: dos transacciones concurrentes bloquean en el mismo orden
+    statement = pg_insert(FrecuenciaTermino).values(
+        [{"termino": term, "documentos": count} for term, count in sorted(counts.items())]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[FrecuenciaTermino.termino],
+        set_={"documentos": FrecuenciaTermino.documentos + statement.excluded.documentos}
+    )
+
+
+class IdfStore:
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._snapshot = ({}, 0)  # (df por término, total de noticias)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        rows = db.session.execute(select(FrecuenciaTermino.termino, FrecuenciaTermino.documentos)).all()
+        document_frequency = {termino: documentos for termino, documentos in rows}
+        total = document_frequency.pop(TOTAL_TERM, 0)
+        return document_frequency, total
+
+    def get(self):
+        """(df, total) vigentes; se recargan de la BD cada `refresh_interval` segundos."""
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_interval:
+            return self._snapshot
+
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+                try:
+                    self._snapshot = self._load()
+                    logger.info(f"IDF cargado: {len(self._snapshot[0])} términos, {self._snapshot[1]} noticias")
+                except Exception as e:
+                    # Sin tabla o sin BD el IDF es constante y la puntuación queda en frecuencia de términos
+                    logger.warning(f"No se pudieron cargar las frecuencias de documento: {str(e)}")
+                self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def observe(self, documents):
+        """Suma a la copia en memoria las noticias que este proceso acaba de guardar."""
+        with self._lock:
+            document_frequency, total = self._snapshot
+            for terms in documents:
+                for term in set(terms):
+                    document_frequency[term] = document_frequency.get(term, 0) + 1
+            self._snapshot = (document_frequency, total + len(documents))
+
+    def top_terms(self, documents, num_terms=5):
+        """
+        Para cada documento (lista de lemas) devuelve los `num_terms` términos con
+        mayor tf·idf. Todo el lote se cuenta en una sola matriz dispersa y se
+        pondera con un único producto por la diagonal de IDF.
+        """
+        import numpy as np
+        from scipy.sparse import diags
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        results = [[] for _ in documents]
+        non_empty = [index for index, words in enumerate(documents) if words]
+        if not non_empty:
+            return results
+
+        document_frequency, total = self.get()
+
+        vectorizer = CountVectorizer(analyzer=_identity_analyzer)
+        counts = vectorizer.fit_transform([documents[index] for index in non_empty])
+        vocabulary = vectorizer.get_feature_names_out()
+
+        df = np.fromiter(
+            (document_frequency.get(term, 0) for term in vocabulary), dtype=np.float64, count=len(vocabulary)
+        )
+        # Misma fórmula que TfidfVectorizer(smooth_idf=True); sin corpus el IDF vale 1 para todos
+        idf = np.log((1 + total) / (1 + df)) + 1
+        scores = (counts @ diags(idf)).tocsr()
+
+        for row, index in enumerate(non_empty):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            columns = scores.indices[start:end]
+            # Mayor puntuación primero; los empates, en orden alfabético (las columnas ya lo están)
+            order = np.lexsort((columns, -scores.data[start:end]))
+            results[index] = [vocabulary[column] for column in columns[order[:num_terms]]]
+        return results
+
+    def rebuild_from_corpus(self, batch_size=500):
+        """
+        Recalcula la tabla desde todas las noticias. Es una operación de
+        mantenimiento: las noticias guardadas mientras se ejecuta pueden quedar
+        contadas dos veces o ninguna.
+        """
+        document_frequency = Counter()
+        total = 0
+        contents = db.session.execute(
+            select(Noticia.contenido).execution_options(yield_per=batch_size)
+        ).scalars()
+        for contenido in contents:
+            document_frequency.update(document_terms(TextAnalysis(contenido or "").lemmas))
+            total += 1
+
+        rows = [{"termino": term, "documentos": count} for term, count in sorted(document_frequency.items())]
+        rows.append({"termino": TOTAL_TERM, "documentos": total})
+
+        db.session.execute(delete(FrecuenciaTermino))
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(FrecuenciaTermino), rows[start:start + 5000])
+        db.session.commit()
+
+        with self._lock:
+            self._snapshot = (dict(document_frequency), total)
+            self._loaded_at = time.monotonic()
+        return total, len(document_frequency)
+
+    def get_stats(self):
+        document_frequency, total = self._snapshot
+        return {"terms": len(document_frequency), "documents": total}
+
+
+idf_store = IdfStore(refresh_interval=Config.IDF_REFRESH_INTERVAL)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Frecuencias de documento del corpus de noticias")
+    parser.add_argument("--rebuild", action="store_true", help="Recalcular la tabla desde todas las noticias")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app import app
+
+    with app.app_context():
+        if args.rebuild:
+            total, terms = idf_store.rebuild_from_corpus()
+            print(f"{total} noticias, {terms} términos")
+        else:
+            idf_store.get()
+            print(idf_store.get_stats())
@@ -0,0 +1,280 @@
+"""
+Métricas en proceso (contadores, gauges e histogramas con etiquetas) y su
+exposición en el formato de texto de Prometheus (`render`).
+
+Los contadores e histogramas se reparten en un fragmento por hilo: cada hilo
+escribe solo en el suyo, así que `inc`/`observe` no toman ningún lock y el
+coste de sumar los fragmentos lo paga la lectura (`snapshot`, `render`). Los
+fragmentos se indexan por el identificador del hilo, que Python reutiliza
+cuando un hilo termina, de modo que su número no crece con los hilos por
+petición del servidor.
+"""
+import math
+import threading
+from bisect import bisect_left
+from threading import get_ident
+
+# Registro global de métricas del servicio
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Shards:
+    """Un fragmento por hilo; solo la creación del fragmento de un hilo nuevo toma el lock."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def local(self):
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(get_ident(), self._factory())
+        return shard
+
+    def all(self):
+        with self._lock:
+            return list(self._shards.values())
+
+
+class _Metric:
+    """Base para métricas con etiquetas opcionales."""
+
+    kind = None
+
+    def __init__(self, name, description="", labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        """Devuelve la serie hija para una combinación de etiquetas."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"La métrica {self.name} requiere etiquetas: {self.labelnames}")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def snapshot(self):
+        """Copia de todas las series como {etiquetas: valor}."""
+        with self._lock:
+            children = list(self._children.items())
+        return {key: child.snapshot() for key, child in children}
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(lambda: [0])
+
+    def inc(self, amount=1):
+        # Solo este hilo escribe en su fragmento: no hace falta lock
+        self._shards.local()[0] += amount
+
+    def snapshot(self):
+        return sum(shard[0] for shard in self._shards.all())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0
+        self._function = None
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        """Calcula el valor al leer la métrica (p. ej. el estado del pool de conexiones)."""
+        self._function = function
+
+    def snapshot(self):
+        if self._function is None:
+            return self._value
+        try:
+            return self._function()
+        except Exception:
+            # Una fuente no disponible (p. ej. sin BD) no debe romper la exposición del resto
+            return None
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class _HistogramShard:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._shards = _Shards(lambda: _HistogramShard(len(buckets) + 1))
+
+    def observe(self, value):
+        shard = self._shards.local()
+        shard.counts[bisect_left(self._buckets, value)] += 1
+        shard.sum += value
+
+    def snapshot(self):
+        counts = [0] * (len(self._buckets) + 1)
+        total = 0.0
+        for shard in self._shards.all():
+            for index, count in enumerate(shard.counts):
+                counts[index] += count
+            total += shard.sum
+
+        # Conteos acumulados por límite superior, como en Prometheus
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self._buckets, counts):
+            running += count
+            cumulative[bound] = running
+        running += counts[-1]
+        cumulative["+Inf"] = running
+
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, description="", labelnames=(), buckets=None):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+def _get_or_create(cls, name, description, labelnames, **kwargs):
+    metric = _registry.get(name)
+    if metric is None:
+        with _registry_lock:
+            metric = _registry.get(name)
+            if metric is None:
+                metric = cls(name, description, labelnames, **kwargs)
+                _registry[name] = metric
+    return metric
+
+
+def counter(name, description="", labelnames=()):
+    """Obtiene o registra un contador."""
+    return _get_or_create(Counter, name, description, labelnames)
+
+
+def gauge(name, description="", labelnames=()):
+    """Obtiene o registra un gauge."""
+    return _get_or_create(Gauge, name, description, labelnames)
+
+
+def histogram(name, description="", labelnames=(), buckets=None):
+    """Obtiene o registra un histograma."""
+    return _get_or_create(Histogram, name, description, labelnames, buckets=buckets)
+
+
+def snapshot(prefix=None):
+    """Devuelve todas las métricas registradas (o las que empiezan por `prefix`) como diccionario."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+
+    result = {}
+    for metric in metrics:
+        if prefix and not metric.name.startswith(prefix):
+            continue
+        series = metric.snapshot()
+        if not metric.labelnames:
+            result[metric.name] = series.get((), 0 if metric.kind != "histogram" else None)
+        else:
+            result[metric.name] = {
+                ",".join(f"{n}={v}" for n, v in zip(metric.labelnames, key)): value
+                for key, value in series.items()
+            }
+    return result
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _escape(value, quotes=True):
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quotes else value
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render():
+    """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {_escape(metric.description, quotes=False)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for key, value in sorted(metric.snapshot().items()):
+            labels = list(zip(metric.labelnames, key))
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for bound, count in value["buckets"].items():
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                lines.append(f"{metric.name}_bucket{_format_labels(labels + [('le', le)])} {count}")
+            lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
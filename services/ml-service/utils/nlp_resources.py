@@ -0,0 +1,132 @@
+"""
+Recursos de NLTK resueltos desde una caché local, sin descargas al importar.
+
+Para poblar la caché (p. ej. al construir la imagen):
+    python -m utils.nlp_resources
+"""
+import re
+import threading
+from functools import lru_cache
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# (ruta dentro de nltk_data, paquete de descarga)
+REQUIRED_RESOURCES = [
+    ("tokenizers/punkt_tab", "punkt_tab"),
+    ("corpora/stopwords", "stopwords"),
+    ("corpora/wordnet", "wordnet"),
+]
+
+_lock = threading.Lock()
+_resources = {}
+_simple_token_re = re.compile(r"\w+|[^\w\s]")
+
+
+def _configure_nltk():
+    import nltk
+
+    if Config.NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, Config.NLTK_DATA_DIR)
+    return nltk
+
+
+def _has_resource(nltk, path):
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        return False
+
+
+def ensure_resources(download=None):
+    """
+    Comprueba qué recursos están en la caché local. Solo descarga los que falten si
+    `download` (o `NLTK_AUTO_DOWNLOAD`) lo permite. Devuelve {paquete: disponible}.
+    """
+    nltk = _configure_nltk()
+    download = Config.NLTK_AUTO_DOWNLOAD if download is None else download
+
+    available = {}
+    for path, package in REQUIRED_RESOURCES:
+        found = _has_resource(nltk, path)
+        if not found and download:
+            try:
+                nltk.download(package, download_dir=Config.NLTK_DATA_DIR, quiet=True)
+                found = _has_resource(nltk, path)
+            except Exception as e:
+                logger.warning(f"No se pudo descargar el recurso NLTK '{package}': {str(e)}")
+        available[package] = found
+    return available
+
+
+def _load():
+    """Carga tokenizador, lematizador y stopwords la primera vez que se necesitan."""
+    if _resources:
+        return _resources
+
+    with _lock:
+        if _resources:
+            return _resources
+
+        available = ensure_resources()
+        missing = [package for package, found in available.items() if not found]
+        if missing:
+            logger.warning(f"Recursos NLTK no disponibles en {Config.NLTK_DATA_DIR}: {missing}. Se usarán alternativas simples.")
+
+        if available.get("punkt_tab"):
+            from nltk.tokenize import word_tokenize
+            tokenize = word_tokenize
+        else:
+            tokenize = _simple_token_re.findall
+
+        stop_words = set()
+        if available.get("stopwords"):
+            from nltk.corpus import stopwords
+            stop_words = set(stopwords.words("spanish") + stopwords.words("english"))
+
+        if available.get("wordnet"):
+            from nltk.stem import WordNetLemmatizer
+            lemmatize = WordNetLemmatizer().lemmatize
+        else:
+            lemmatize = lambda word: word
+
+        _resources.update({
+            "tokenize": tokenize,
+            "stop_words": stop_words,
+            "lemmatize": lemmatize,
+        })
+        return _resources
+
+
+def word_tokenize(text):
+    return _load()["tokenize"](text)
+
+
+@lru_cache(maxsize=Config.LEMMA_CACHE_SIZE)
+def lemmatize(word):
+    # Los scrapers lematizan las mismas palabras una y otra vez: LRU acotado por `LEMMA_CACHE_SIZE`
+    return _load()["lemmatize"](word)
+
+
+def get_lemma_cache_stats():
+    info = lemmatize.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0
+    }
+
+
+def get_stop_words():
+    return _load()["stop_words"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for package, found in ensure_resources(download=True).items():
+        print(f"{package}: {'ok' if found else 'no disponible'}")
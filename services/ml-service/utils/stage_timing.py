@@ -0,0 +1,80 @@
+"""
+Cronómetros por etapa para los pipelines de clasificación (/predict y scrapers).
+
+    timer = StageTimer("google_news")
+    with timer.stage("inference"):
+        ...
+    timer.summary()          # "inference=812.3ms, save=40.1ms"
+
+Cada etapa se acumula en el histograma `pipeline_stage_seconds{pipeline, stage}`.
+Dentro de una petición, `request_timer(pipeline)` deja el cronómetro en `flask.g`,
+`stage(name)` mide sobre él desde cualquier función (fuera de una petición no hace
+nada) y `init_stage_timing(app)` devuelve las etapas en la cabecera Server-Timing,
+junto con el tiempo en BD de la petición.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from flask import g, has_request_context
+from utils import metrics
+
+stage_seconds = metrics.histogram(
+    "pipeline_stage_seconds", "Duración de cada etapa de los pipelines de clasificación",
+    labelnames=("pipeline", "stage"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+
+class StageTimer:
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.stages = {}  # etapa -> segundos acumulados, en orden de primera aparición
+
+    @contextmanager
+    def stage(self, name):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started_at)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        stage_seconds.labels(pipeline=self.pipeline, stage=name).observe(seconds)
+
+    def server_timing(self):
+        """Etapas en formato de la cabecera Server-Timing (milisegundos)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+    def summary(self):
+        return ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.stages.items())
+
+
+def request_timer(pipeline):
+    """Crea el cronómetro de la petición actual."""
+    timer = StageTimer(pipeline)
+    g._stage_timer = timer
+    return timer
+
+
+def stage(name):
+    """Mide una etapa con el cronómetro de la petición actual, si lo hay."""
+    timer = g.get("_stage_timer") if has_request_context() else None
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def init_stage_timing(app):
+    """Añade la cabecera Server-Timing a las respuestas de las peticiones cronometradas."""
+    from database.db import current_query_stats
+
+    @app.after_request
+    def _add_server_timing(response):
+        timer = g.get("_stage_timer")
+        if timer is None or not timer.stages:
+            return response
+
+        entries = [timer.server_timing()]
+        queries = current_query_stats()
+        if queries is not None and queries.statements:
+            entries.append(f'db;dur={queries.duration * 1000:.1f};desc="{queries.statements} queries"')
+        response.headers.add("Server-Timing", ", ".join(entries))
+        return response
@@ -0,0 +1,120 @@
+"""
+Análisis de texto compartido por inferencia, palabras clave y temas.
+
+Un `TextAnalysis` envuelve un texto durante una petición (o un artículo durante
+un scraping) y memoriza todo lo que se deriva de él: el texto normalizado y su
+hash, los ids del tokenizador de HuggingFace, los tokens de NLTK, los lemas y
+los términos al estilo de scikit-learn. Así cada representación se calcula una
+sola vez aunque la usen varias etapas.
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from utils import nlp_resources
+
+_whitespace_re = re.compile(r"\s+")
+# Mismo patrón que el tokenizador por defecto de scikit-learn (`TfidfVectorizer`)
+_term_re = re.compile(r"(?u)\b\w\w+\b")
+
+
+def normalize_text(text):
+    """Normaliza un texto para que copias sindicadas o re-publicadas compartan clave."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _whitespace_re.sub(" ", text).strip()
+
+
+def split_terms(text):
+    """Términos en minúsculas como los obtendría `TfidfVectorizer` con su configuración por defecto."""
+    return _term_re.findall(text.lower())
+
+
+class TextAnalysis:
+    """
+    Representaciones memorizadas de un texto.
+
+    Las propiedades se calculan la primera vez que se leen. Las codificaciones
+    del tokenizador de HuggingFace se guardan por tokenizador, ya que un cambio
+    de modelo en caliente puede traer otro vocabulario.
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._normalized = None
+        self._hash = None
+        self._tokens = None
+        self._lemmas = None
+        self._terms = None
+        self._encodings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, text):
+        """Devuelve `text` si ya es un `TextAnalysis`; si no, lo envuelve."""
+        return text if isinstance(text, cls) else cls(text)
+
+    @property
+    def normalized(self):
+        if self._normalized is None:
+            self._normalized = normalize_text(self.text)
+        return self._normalized
+
+    @property
+    def hash(self):
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.normalized.encode("utf-8")).hexdigest()
+        return self._hash
+
+    @property
+    def tokens(self):
+        """Tokens de NLTK del texto en minúsculas."""
+        if self._tokens is None:
+            self._tokens = nlp_resources.word_tokenize(self.normalized.lower())
+        return self._tokens
+
+    @property
+    def lemmas(self):
+        """Lemas de las palabras alfabéticas que no son stopwords, en orden de aparición."""
+        if self._lemmas is None:
+            stop_words = nlp_resources.get_stop_words()
+            self._lemmas = [
+                nlp_resources.lemmatize(word) for word in self.tokens
+                if word.isalpha() and word not in stop_words
+            ]
+        return self._lemmas
+
+    @property
+    def terms(self):
+        """Términos al estilo de scikit-learn, para comparar contra los temas."""
+        if self._terms is None:
+            self._terms = split_terms(self.normalized)
+        return self._terms
+
+    def get_encoding(self, tokenizer):
+        """Codificación ya calculada para `tokenizer` (dict de listas) o None."""
+        entry = self._encodings.get(id(tokenizer))
+        # Se compara la identidad para no confundir un tokenizador liberado con otro nuevo
+        if entry is not None and entry[0] is tokenizer:
+            return entry[1]
+        return None
+
+    def set_encoding(self, tokenizer, encoding):
+        with self._lock:
+            self._encodings[id(tokenizer)] = (tokenizer, encoding)
+
+
+def encode_many(analyses, tokenizer, max_length):
+    """
+    Devuelve la codificación sin relleno de cada análisis para `tokenizer`.
+
+    Solo se tokenizan, en una única llamada por lotes, los textos que aún no la tienen.
+    Se codifica el texto normalizado, el mismo del que sale el `hash` con el que se
+    cachea la predicción: dos textos con la misma clave reciben la misma entrada.
+    """
+    missing = [analysis for analysis in analyses if analysis.get_encoding(tokenizer) is None]
+    if missing:
+        batch = tokenizer([analysis.normalized for analysis in missing], truncation=True, max_length=max_length)
+        keys = list(batch.keys())
+        for index, analysis in enumerate(missing):
+            analysis.set_encoding(tokenizer, {key: batch[key][index] for key in keys})
+    return [analysis.get_encoding(tokenizer) for analysis in analyses]
@@ -0,0 +1,170 @@
+"""
+Índice precompilado de temas para `classify_topic`.
+
+La matriz TF-IDF de los temas (una fila por tema activo, normalizada L2) se
+construye una sola vez y se reconstruye solo cuando cambia la tabla `temas`,
+detectado con un checksum que se consulta como mucho cada
+`TOPIC_INDEX_CHECK_INTERVAL` segundos. Asignar tema a un documento es entonces
+una transformación con el vocabulario ya ajustado y un producto disperso; un
+lote de documentos se puntúa con una sola multiplicación de matrices.
+
+Para conservar la escala de la similitud original (vectorizador ajustado sobre
+los temas más el documento), la norma del documento incluye también sus
+términos que no aparecen en ningún tema, con el idf de un término sin
+documentos.
+"""
+import math
+import threading
+import time
+import logging
+from collections import Counter, namedtuple
+from sqlalchemy import select, func, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from database.db import db
+from database.models import Tema
+from config import Config
+from utils.text_analysis import TextAnalysis, split_terms
+
+logger = logging.getLogger(__name__)
+
+UNCLASSIFIED = ("Sin clasificar", None)
+
+# Estado inmutable del índice: se reemplaza completo al reconstruir
+_CompiledTopics = namedtuple(
+    "_CompiledTopics", ["checksum", "names", "ids", "vectorizer", "matrix", "unknown_idf"]
+)
+
+
+def _identity_analyzer(terms):
+    return terms
+
+
+class TopicIndex:
+    def __init__(self, check_interval=30, min_similarity=0.01):
+        self.check_interval = check_interval
+        self.min_similarity = min_similarity
+        self._compiled = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def _checksum(self):
+        """Checksum de la tabla `temas` calculado en la BD (una fila, sin traer los temas)."""
+        row_text = func.concat_ws(":", Tema.id, Tema.nombre, Tema.palabras_clave, Tema.activo)
+        return db.session.execute(
+            select(func.md5(func.coalesce(func.string_agg(row_text, aggregate_order_by(literal("|"), Tema.id)), "")))
+        ).scalar()
+
+    def _build(self, checksum):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import normalize
+
+        # Los errores de BD se propagan: no se guarda un índice vacío con un checksum válido
+        temas = db.session.execute(
+            select(Tema.id, Tema.nombre, Tema.palabras_clave)
+            .where(Tema.activo.is_(True), Tema.palabras_clave.isnot(None), Tema.palabras_clave != "")
+            .order_by(Tema.id)
+        ).all()
+        if not temas:
+            logger.warning("No se encontraron temas activos con palabras clave")
+            return _CompiledTopics(checksum, [], [], None, None, None)
+
+        # Sin normalizar: los documentos se dividen por su norma completa en `classify_many`
+        vectorizer = TfidfVectorizer(analyzer=_identity_analyzer, norm=None)
+        # Matriz temas x términos con filas normalizadas L2; se guarda traspuesta para el producto
+        matrix = normalize(
+            vectorizer.fit_transform([split_terms(" ".join(tema.palabras_clave.split(", "))) for tema in temas])
+        )
+        # idf suavizado de scikit-learn para un término que no aparece en ningún tema
+        unknown_idf = math.log(1 + len(temas)) + 1
+        self.rebuilds += 1
+        logger.info(f"Índice de temas reconstruido: {len(temas)} temas, {len(vectorizer.vocabulary_)} términos")
+        return _CompiledTopics(
+            checksum, [tema.nombre for tema in temas], [tema.id for tema in temas], vectorizer, matrix.T.tocsr(),
+            unknown_idf
+        )
+
+    def get(self):
+        """Índice vigente; comprueba el checksum si ha pasado `check_interval` desde la última vez."""
+        compiled = self._compiled
+        checked_at = self._checked_at
+        if compiled is not None and time.monotonic() - checked_at < self.check_interval:
+            return compiled
+
+        with self._lock:
+            if self._compiled is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._compiled
+            try:
+                checksum = self._checksum()
+            except Exception as e:
+                # Sin BD se sigue sirviendo el último índice conocido
+                logger.warning(f"No se pudo comprobar la versión de los temas: {str(e)}")
+                if self._compiled is None:
+                    raise
+                checksum = self._compiled.checksum
+
+            if self._compiled is None or checksum != self._compiled.checksum:
+                self._compiled = self._build(checksum)
+            self._checked_at = time.monotonic()
+            return self._compiled
+
+    def invalidate(self):
+        """Fuerza la comprobación del checksum en la siguiente llamada."""
+        self._checked_at = time.monotonic() - self.check_interval
+
+    def classify_many(self, texts):
+        """Asigna (nombre, id) de tema a cada texto (o `TextAnalysis`) con un solo producto disperso."""
+        if not texts:
+            return []
+
+        compiled = self.get()
+        if not compiled.names:
+            return [UNCLASSIFIED] * len(texts)
+
+        terms = [TextAnalysis.of(text).terms for text in texts]
+        documents = compiled.vectorizer.transform(terms)
+        # Temas normalizados L2; el producto se divide por la norma de cada documento para obtener el coseno
+        similarities = (documents @ compiled.matrix).toarray()
+        norms = self._document_norms(compiled, documents, terms)
+        similarities /= norms[:, None]
+        best = similarities.argmax(axis=1)
+
+        results = []
+        for row, index in enumerate(best):
+            if similarities[row, index] < self.min_similarity:
+                results.append(UNCLASSIFIED)
+            else:
+                results.append((compiled.names[index], compiled.ids[index]))
+        return results
+
+    @staticmethod
+    def _document_norms(compiled, documents, terms):
+        """Norma L2 del vector TF-IDF de cada documento contando también los términos fuera del vocabulario."""
+        import numpy as np
+
+        vocabulary = compiled.vectorizer.vocabulary_
+        norms = np.asarray(documents.multiply(documents).sum(axis=1), dtype=float).ravel()
+        for row, document_terms in enumerate(terms):
+            unknown = Counter(term for term in document_terms if term not in vocabulary)
+            norms[row] += sum((count * compiled.unknown_idf) ** 2 for count in unknown.values())
+        # Un documento sin términos tiene similitud 0 con todos los temas
+        norms[norms == 0] = 1.0
+        return np.sqrt(norms)
+
+    def classify(self, text):
+        return self.classify_many([text])[0]
+
+    def get_stats(self):
+        compiled = self._compiled
+        return {
+            "topics": len(compiled.names) if compiled else 0,
+            "terms": len(compiled.vectorizer.vocabulary_) if compiled and compiled.vectorizer else 0,
+            "checksum": compiled.checksum if compiled else None,
+            "rebuilds": self.rebuilds
+        }
+
+
+topic_index = TopicIndex(
+    check_interval=Config.TOPIC_INDEX_CHECK_INTERVAL,
+    min_similarity=Config.TOPIC_MIN_SIMILARITY
+)
@@ -0,0 +1,277 @@
+"""
+Búsqueda web con caché para las noticias relacionadas y el chatbot.
+
+Los resultados se guardan por (consulta normalizada, lr, gl, num) con un TTL, en
+un LRU acotado en memoria y, opcionalmente, en un directorio en disco que
+sobrevive a reinicios y se comparte entre workers.
+
+El proveedor se elige con `SEARCH_PROVIDER`:
+    google   Google Custom Search (requiere GOOGLE_API_KEY y GOOGLE_CX)
+    fixture  resultados locales desde el JSON de `SEARCH_FIXTURE_PATH`,
+             para benchmarks y pruebas sin red
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import logging
+import requests
+from collections import OrderedDict
+from config import Config
+from utils import http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+PROVIDER_GOOGLE = "google"
+PROVIDER_FIXTURE = "fixture"
+
+_whitespace_re = re.compile(r"\s+")
+
+
+class SearchError(Exception):
+    """Error del proveedor de búsqueda (respuesta no válida, red, cuota...)."""
+
+
+def normalize_query(query):
+    """Normaliza una consulta para que variantes de mayúsculas o espacios compartan entrada en la caché."""
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    return _whitespace_re.sub(" ", query).strip()
+
+
+class SearchProvider:
+    """
+    Interfaz de un proveedor de búsqueda.
+
+    `search` devuelve una lista de resultados con al menos `title`, `link` y
+    `snippet`, y lanza `SearchError` si la búsqueda falla.
+    """
+
+    name = None
+
+    def is_configured(self):
+        return True
+
+    def search(self, query, num=10, lr=None, gl=None, timeout=None):
+        raise NotImplementedError
+
+
+class GoogleSearchProvider(SearchProvider):
+    name = PROVIDER_GOOGLE
+
+    def __init__(self, api_key=None, cx=None):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.cx = cx or os.getenv("GOOGLE_CX")
+
+    def is_configured(self):
+        return bool(self.api_key and self.cx)
+
+    def search(self, query, num=10, lr=None, gl=None, timeout=None):
+        params = {"q": query, "key": self.api_key, "cx": self.cx, "num": min(num, 10)}
+        if lr:
+            params["lr"] = lr
+        if gl:
+            params["gl"] = gl
+
+        # El timeout es el presupuesto de toda la búsqueda, reintentos incluidos
+        timeout = timeout or Config.SEARCH_TIMEOUT_S
+        try:
+            response = http_client.get(
+                GOOGLE_SEARCH_URL, params=params, timeout=timeout, deadline=time.monotonic() + timeout
+            )
+        except requests.RequestException as e:
+            raise SearchError(str(e)) from e
+
+        if response.status_code != 200:
+            raise SearchError(f"Google Search API error: {response.status_code}")
+
+        return [
+            {"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+            for item in response.json().get("items", [])
+        ]
+
+
+class FixtureSearchProvider(SearchProvider):
+    """
+    Proveedor local que responde desde un archivo JSON:
+        {"queries": {"<consulta normalizada>": [resultados]}, "default": [resultados]}
+    Las consultas sin entrada propia reciben los resultados de `default`.
+    """
+
+    name = PROVIDER_FIXTURE
+
+    def __init__(self, path=None):
+        self.path = path or Config.SEARCH_FIXTURE_PATH
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.queries = {normalize_query(query): items for query, items in data.get("queries", {}).items()}
+        self.default = data.get("default", [])
+
+    def search(self, query, num=10, lr=None, gl=None, timeout=None):
+        return list(self.queries.get(normalize_query(query), self.default)[:num])
+
+
+class SearchCache:
+    """Caché TTL de resultados: LRU acotado en memoria más un nivel opcional en disco."""
+
+    def __init__(self, ttl, max_size, directory=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.directory = directory or None
+        self._entries = OrderedDict()  # clave -> (instante de guardado, resultados)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(query, num, lr, gl):
+        return json.dumps([normalize_query(query), num, lr or "", gl or ""], ensure_ascii=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry["stored_at"], entry["results"]
+
+    def _write_disk(self, key, stored_at, results):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "stored_at": stored_at, "results": results}, f, ensure_ascii=False)
+            # Reemplazo atómico: otros workers nunca leen un archivo a medias
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la búsqueda en disco: {str(e)}")
+
+    def _remember(self, key, stored_at, results):
+        self._entries[key] = (stored_at, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.directory:
+            entry = self._read_disk(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                with self._lock:
+                    self._remember(key, *entry)
+                    self._disk_hits += 1
+                return entry[1]
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key, results):
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, stored_at, results)
+        if self.directory:
+            self._write_disk(key, stored_at, results)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "disk": bool(self.directory),
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0
+            }
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+search_cache = SearchCache(Config.SEARCH_CACHE_TTL, Config.SEARCH_CACHE_SIZE, Config.SEARCH_CACHE_DIR)
+
+
+def build_provider(name=None):
+    name = (name or Config.SEARCH_PROVIDER).lower()
+    if name == PROVIDER_FIXTURE:
+        return FixtureSearchProvider()
+    if name != PROVIDER_GOOGLE:
+        logger.warning(f"Proveedor de búsqueda desconocido '{name}'; se usará '{PROVIDER_GOOGLE}'")
+    return GoogleSearchProvider()
+
+
+def get_provider():
+    """Proveedor configurado, creado en el primer uso."""
+    global _provider
+
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = build_provider()
+    return _provider
+
+
+def set_provider(provider):
+    """Reemplaza el proveedor (p. ej. por uno de fixtures) y vacía la caché en memoria."""
+    global _provider
+
+    with _provider_lock:
+        _provider = provider
+    search_cache.clear()
+
+
+def is_available():
+    return get_provider().is_configured()
+
+
+def search(query, num=10, lr=None, gl=None, timeout=None):
+    """
+    Busca `query` y devuelve la lista de resultados, desde la caché si hay una
+    entrada vigente. Los errores del proveedor se propagan como `SearchError` y
+    no se guardan en la caché.
+    """
+    key = SearchCache.make_key(query, num, lr, gl)
+    results = search_cache.get(key)
+    if results is not None:
+        return results
+
+    results = get_provider().search(query, num=num, lr=lr, gl=gl, timeout=timeout)
+    search_cache.put(key, results)
+    return results
+
+
+def cached(query, num=10, lr=None, gl=None):
+    """Resultados de `query` solo si hay una entrada vigente en la caché (nunca llama al proveedor)."""
+    return search_cache.get(SearchCache.make_key(query, num, lr, gl))
+
+
+def get_stats():
+    return {"provider": get_provider().name, **search_cache.get_stats()}